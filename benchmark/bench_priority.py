@@ -0,0 +1,110 @@
+"""
+就绪队列优先级调度基准测试
+
+混合一个大规模低优先级任务流与持续到达的小规模高优先级任务流, 调度端每个时钟周期
+最多取出capacity个就绪任务, 按优先级统计任务在就绪队列中的等待时间(周期数)。对比:
+    set         原有无序集合 + SPOP
+    zset-strict 有序集合严格按优先级(老化时间取极大值)
+    zset-aging  有序集合 + 优先级老化
+
+时钟为模拟时钟, 分值通过RedisJobStore.ready_score按模拟时间计算, 结果与机器速度无关
+
+    APP_ENV=dev python -m benchmark.bench_priority --bulk 2000 --urgent-size 30 --capacity 20
+"""
+
+import argparse
+import asyncio
+from benchmark.bench_util import create_redis
+from config.env import SchedulerConfig
+from module_admin.service.job_service import RedisJobStore
+
+BENCH_KEY = "bench:priority:ready"
+TICK_MS = 100
+
+
+def percentile(values, q):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def simulate(store: RedisJobStore, mode: str, args) -> dict:
+    redis = store.redis
+    await redis.delete(BENCH_KEY)
+    enqueued = {}
+    waits = {args.low_priority: [], args.high_priority: []}
+
+    async def enqueue(job_uids, priority, tick):
+        if mode == "set":
+            await redis.sadd(BENCH_KEY, *job_uids)
+        else:
+            now_ms = tick * TICK_MS
+            await redis.zadd(
+                BENCH_KEY,
+                {job_uid: store.ready_score(priority, now_ms) for job_uid in job_uids},
+            )
+        for job_uid in job_uids:
+            enqueued[job_uid] = (priority, tick)
+
+    async def dispatch():
+        if mode == "set":
+            return await redis.spop(BENCH_KEY, args.capacity) or []
+        return [job_uid for job_uid, _ in await redis.zpopmin(BENCH_KEY, args.capacity)]
+
+    await enqueue([f"bulk-{i}" for i in range(args.bulk)], args.low_priority, 0)
+    tick = 0
+    flows = 0
+    while True:
+        if tick < args.urgent_ticks and tick % args.urgent_every == 0:
+            await enqueue(
+                [f"urgent{flows}-{i}" for i in range(args.urgent_size)],
+                args.high_priority,
+                tick,
+            )
+            flows += 1
+        for job_uid in await dispatch():
+            priority, enqueue_tick = enqueued.pop(job_uid)
+            waits[priority].append(tick - enqueue_tick)
+        tick += 1
+        if not enqueued and tick >= args.urgent_ticks:
+            break
+    await redis.delete(BENCH_KEY)
+    return waits
+
+
+async def main(args):
+    redis = await create_redis()
+    store = RedisJobStore(redis)
+    aging_ms = args.aging_ticks * TICK_MS
+
+    print(
+        f"{'mode':<13}{'priority':>9}{'jobs':>7}{'p50':>7}{'p99':>7}{'max':>7}"
+        f"   (等待周期数, 每周期最多调度{args.capacity}个)"
+    )
+    for mode in ("set", "zset-strict", "zset-aging"):
+        SchedulerConfig.scheduler_priority_aging_ms = (
+            aging_ms if mode == "zset-aging" else 10**12
+        )
+        waits = await simulate(store, mode, args)
+        for priority in (args.high_priority, args.low_priority):
+            values = waits[priority]
+            print(
+                f"{mode:<13}{priority:>9}{len(values):>7}{percentile(values, 0.5):>7}"
+                f"{percentile(values, 0.99):>7}{max(values, default=0):>7}"
+            )
+    await redis.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="就绪队列优先级调度基准测试")
+    parser.add_argument("--bulk", type=int, default=2000, help="低优先级任务流的任务数量")
+    parser.add_argument("--urgent-size", type=int, default=30, help="每个高优先级任务流的任务数量")
+    parser.add_argument("--urgent-every", type=int, default=2, help="高优先级任务流到达间隔(周期)")
+    parser.add_argument("--urgent-ticks", type=int, default=200, help="高优先级任务流持续到达的周期数")
+    parser.add_argument("--capacity", type=int, default=20, help="每周期最多调度的任务数")
+    parser.add_argument("--low-priority", type=int, default=0)
+    parser.add_argument("--high-priority", type=int, default=5)
+    parser.add_argument("--aging-ticks", type=int, default=10, help="每级优先级折算的等待周期数")
+    main_args = parser.parse_args()
+    asyncio.run(main(main_args))
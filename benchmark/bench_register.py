@@ -0,0 +1,117 @@
+"""
+任务流注册基准测试
+
+对比逐任务顺序注册(每个任务/依赖边若干次往返)与按执行计划批量事务注册(单次往返)的
+Redis往返次数和耗时; 执行计划在计时前编译, 与生产环境中执行计划缓存命中时的注册路径一致
+
+    APP_ENV=dev python -m benchmark.bench_register --jobs 500 --fan-in 2
+"""
+
+import argparse
+import asyncio
+import json
+from functools import partial
+from benchmark.bench_util import RoundTripCounter, build_layered_task, create_redis, timer
+from module_admin.entity.vo.task_vo import JobModel, JobSchedulerModel
+from module_admin.service.job_service import (
+    DependencyManager,
+    ExecutionPlanCache,
+    RedisJobStore,
+    RedisKeys,
+)
+
+
+async def register_sequential(store: RedisJobStore, jobs, run_id: str):
+    """原有的逐任务注册流程, 每个任务与依赖边各自往返, 仅作为基准对照"""
+    redis = store.redis
+    for job in jobs:
+        job_key = RedisKeys.JOB_PARAM.format(job_uid=job.job_uid)
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.delete(job_key)
+            pipe.hset(
+                job_key,
+                mapping={field: json.dumps(value) for field, value in job.model_dump().items()},
+            )
+            pipe.expire(job_key, 86400)
+            await pipe.execute()
+        dependencies = json.loads(job.job_dependencies)
+        if not dependencies:
+            score = RedisJobStore.ready_score()
+            ready_key = RedisKeys.READY_JOBS.format(run_uid=job.run_uid)
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.zadd(ready_key, {job.job_uid: score})
+                pipe.expire(ready_key, 86400)
+                pipe.zadd(RedisKeys.READY_TASKS, {job.run_uid: score}, lt=True)
+                await pipe.execute()
+            continue
+        dep_count_key = RedisKeys.DEP_COUNT.format(job_uid=job.job_uid)
+        await redis.set(dep_count_key, len(dependencies))
+        await redis.expire(dep_count_key, 86400)
+        for dep_job_uid in dependencies:
+            dep_key = RedisKeys.DEPS.format(
+                job_uid=JobSchedulerModel.scoped_uid(dep_job_uid, run_id)
+            )
+            await redis.sadd(dep_key, job.job_uid)
+            await redis.expire(dep_key, 86400)
+
+
+async def cleanup(redis, task_uid: str, job_uids, run_id: str):
+    run_uid = JobSchedulerModel.scoped_uid(task_uid, run_id)
+    async with redis.pipeline(transaction=False) as pipe:
+        for job_uid in job_uids:
+            job_uid = JobSchedulerModel.scoped_uid(job_uid, run_id)
+            pipe.delete(
+                RedisKeys.JOB_PARAM.format(job_uid=job_uid),
+                RedisKeys.DEP_COUNT.format(job_uid=job_uid),
+                RedisKeys.DEPS.format(job_uid=job_uid),
+            )
+        pipe.delete(RedisKeys.READY_JOBS.format(run_uid=run_uid))
+        pipe.zrem(RedisKeys.READY_TASKS, run_uid)
+        await pipe.execute()
+
+
+async def main(job_count: int, fan_in: int):
+    redis = await create_redis()
+    counter = RoundTripCounter(redis)
+    store = RedisJobStore(redis)
+    dependency_mgr = DependencyManager(store)
+    run_id = "bench"
+
+    rows = []
+    for name in ("sequential", "plan"):
+        task_uid = f"bench-{name}"
+        jobs = build_layered_task(task_uid, job_count, fan_in=fan_in)
+        job_uids = [job.job_uid for job in jobs]
+        edges = sum(len(json.loads(job.job_dependencies)) for job in jobs)
+        if name == "sequential":
+            for job in jobs:
+                job.job_uid = JobSchedulerModel.scoped_uid(job.job_uid, run_id)
+                job.run_id = run_id
+            register = partial(register_sequential, store, jobs, run_id)
+        else:
+            task_yaml = [
+                JobModel(**job.model_dump(include=set(JobModel.model_fields))) for job in jobs
+            ]
+            plan = ExecutionPlanCache.compile(task_yaml, ExecutionPlanCache.plan_hash(task_yaml))
+            register = partial(dependency_mgr.register_plan, plan, task_uid, run_id)
+
+        counter.reset()
+        with timer() as elapsed:
+            await register()
+        rows.append((name, len(jobs), edges, counter.count, elapsed["elapsed"]))
+        await cleanup(redis, task_uid, job_uids, run_id)
+
+    counter.restore()
+    await redis.aclose()
+
+    print(f"{'mode':<12}{'jobs':>8}{'edges':>8}{'round trips':>14}{'elapsed(ms)':>14}")
+    for name, jobs, edges, round_trips, elapsed in rows:
+        print(f"{name:<12}{jobs:>8}{edges:>8}{round_trips:>14}{elapsed * 1000:>14.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="任务流注册基准测试")
+    parser.add_argument("--jobs", type=int, default=500, help="任务数量")
+    parser.add_argument("--fan-in", type=int, default=2, help="每个任务的依赖数量")
+    args = parser.parse_args()
+    asyncio.run(main(args.jobs, args.fan_in))
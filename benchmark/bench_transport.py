@@ -0,0 +1,102 @@
+"""
+派发传输方式基准测试
+
+针对本地桩服务 /operator/add_job, 测量每种派发传输方式的吞吐量与p50/p99延迟,
+并以原实现(每次请求新建ClientSession)作为基线
+
+    APP_ENV=dev python -m benchmark.bench_transport --requests 1000 --concurrency 50 --jobs 5
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import aiohttp
+from benchmark.stub_operator import start_stub_operator
+from module_admin.entity.vo.task_vo import JobExecuteModel
+from module_admin.service.transport_service import TRANSPORTS, create_transport
+
+
+class NewSessionTransport:
+    """原实现: 每次请求新建会话和连接器"""
+
+    name = "new session"
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def request(self, method, endpoint, params=None, json=None):
+        async with aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=30),
+            connector=aiohttp.TCPConnector(limit=100),
+        ) as client:
+            async with client.request(
+                method, f"{self.base_url}{endpoint}", json=json
+            ) as response:
+                response.raise_for_status()
+                return await response.json()
+
+
+async def run(transport, payload, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await transport.request("POST", "/operator/add_job", json=payload)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await transport.start()
+    # 预热, 建立连接/拉起工作进程
+    await transport.request("POST", "/operator/add_job", json=payload)
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    await transport.close()
+
+    latencies.sort()
+    return (
+        transport.name,
+        requests / elapsed,
+        statistics.median(latencies),
+        latencies[max(int(len(latencies) * 0.99) - 1, 0)],
+    )
+
+
+async def main(requests: int, concurrency: int, jobs: int, port: int, delay: float):
+    base_url = f"http://127.0.0.1:{port}"
+    runner = await start_stub_operator(port=port, delay=delay)
+    payload = [
+        JobExecuteModel(
+            job_uid=f"job{i}", invoke_target="module_task.scheduler_test.job"
+        ).model_dump()
+        for i in range(jobs)
+    ]
+
+    transports = [NewSessionTransport(base_url)] + [
+        create_transport(name, base_url) for name in TRANSPORTS
+    ]
+    rows = [await run(transport, payload, requests, concurrency) for transport in transports]
+    await runner.cleanup()
+
+    print(f"{'transport':<14}{'req/s':>10}{'p50(ms)':>10}{'p99(ms)':>10}")
+    for name, throughput, p50, p99 in rows:
+        print(f"{name:<14}{throughput:>10.1f}{p50:>10.2f}{p99:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="派发传输方式基准测试")
+    parser.add_argument("--requests", type=int, default=1000, help="请求总数")
+    parser.add_argument("--concurrency", type=int, default=50, help="并发请求数")
+    parser.add_argument("--jobs", type=int, default=5, help="每个请求携带的任务数")
+    parser.add_argument("--port", type=int, default=18088, help="桩服务端口")
+    parser.add_argument("--delay", type=float, default=0.0, help="桩服务处理耗时(秒)")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.jobs, args.port, args.delay))
@@ -0,0 +1,105 @@
+"""
+基准测试公共工具
+
+运行方式(在项目根目录):
+    APP_ENV=dev python -m benchmark.<脚本名>
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from typing import List
+from redis import asyncio as aioredis
+from config.env import RedisConfig
+from module_admin.entity.vo.task_vo import JobSchedulerModel
+
+
+async def create_redis() -> aioredis.Redis:
+    """按当前环境配置创建Redis连接"""
+    return await aioredis.from_url(
+        url=f"redis://{RedisConfig.redis_host}",
+        port=RedisConfig.redis_port,
+        username=RedisConfig.redis_username,
+        password=RedisConfig.redis_password,
+        db=RedisConfig.redis_database,
+        encoding="utf-8",
+        decode_responses=True,
+    )
+
+
+class RoundTripCounter:
+    """
+    统计Redis往返次数
+    单条命令计1次, 一次pipeline.execute()计1次
+    """
+
+    def __init__(self, redis: aioredis.Redis):
+        self.redis = redis
+        self.count = 0
+        self._execute_command = redis.execute_command
+        self._pipeline = redis.pipeline
+        redis.execute_command = self._count_command
+        redis.pipeline = self._count_pipeline
+
+    async def _count_command(self, *args, **options):
+        self.count += 1
+        return await self._execute_command(*args, **options)
+
+    def _count_pipeline(self, *args, **kwargs):
+        pipe = self._pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        async def _execute(*e_args, **e_kwargs):
+            self.count += 1
+            return await execute(*e_args, **e_kwargs)
+
+        pipe.execute = _execute
+        return pipe
+
+    def reset(self):
+        self.count = 0
+
+    def restore(self):
+        self.redis.execute_command = self._execute_command
+        self.redis.pipeline = self._pipeline
+
+
+@contextmanager
+def timer():
+    """返回一个在退出时写入耗时(秒)的字典"""
+    result = {}
+    start = time.perf_counter()
+    yield result
+    result["elapsed"] = time.perf_counter() - start
+
+
+def build_layered_task(
+    task_uid: str, job_count: int, fan_in: int = 2, width: int = 20
+) -> List[JobSchedulerModel]:
+    """
+    构造分层DAG, 每层width个任务, 每个任务依赖上一层的fan_in个任务
+    """
+    jobs = []
+    for index in range(job_count):
+        layer = index // width
+        dependencies = []
+        if layer > 0:
+            prev_start = (layer - 1) * width
+            dependencies = [
+                f"{task_uid}-job{prev_start + (index + k) % width}"
+                for k in range(fan_in)
+            ]
+        jobs.append(
+            JobSchedulerModel(
+                job_uid=f"{task_uid}-job{index}",
+                job_name=f"job{index}",
+                job_parties='["alice","bob"]',
+                job_dependencies=json.dumps(dependencies),
+                job_executor="default",
+                invoke_target="module_task.scheduler_test.job",
+                job_args="",
+                job_kwargs="",
+                task_uid=task_uid,
+            )
+        )
+    return jobs
@@ -0,0 +1,115 @@
+"""
+多进程分片调度吞吐量基准测试
+
+向分片完成事件流写入一批事件, 分别启动1/2/4/...个调度进程(ShardedCompletionWorker)
+消费, 测量处理完全部事件的吞吐量。事件处理使用合成负载(CPU耗时+Redis读写+I/O等待),
+不依赖数据库与算子层
+
+    APP_ENV=dev python -m benchmark.bench_workers --events 20000 --tasks 64 --workers 1 2 4
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+from benchmark.bench_util import create_redis
+from module_admin.service.completion_service import (
+    CompletionStreamService,
+    ShardedCompletionWorker,
+)
+from module_admin.service.job_service import RedisKeys
+
+PROCESSED_KEY = "bench:workers:processed"
+
+
+async def synthetic_handler(redis, event, cpu_ms: float, io_ms: float):
+    """模拟一次完成事件处理: 解析/序列化的CPU开销、Redis往返与数据库I/O等待"""
+    deadline = time.perf_counter() + cpu_ms / 1000
+    while time.perf_counter() < deadline:
+        json.loads(json.dumps(event.model_dump()))
+    await redis.incr(PROCESSED_KEY)
+    if io_ms:
+        await asyncio.sleep(io_ms / 1000)
+
+
+async def run_worker(shards: int, expected: int, cpu_ms: float, io_ms: float):
+    redis = await create_redis()
+    worker = ShardedCompletionWorker(
+        shards=shards,
+        lease_ms=3000,
+        handler=lambda r, e: synthetic_handler(r, e, cpu_ms, io_ms),
+    )
+    await worker.start(redis)
+    while int(await redis.get(PROCESSED_KEY) or 0) < expected:
+        await asyncio.sleep(0.05)
+    await worker.stop()
+    await redis.aclose()
+
+
+def worker_process(shards: int, expected: int, cpu_ms: float, io_ms: float):
+    asyncio.run(run_worker(shards, expected, cpu_ms, io_ms))
+
+
+async def reset(shards: int):
+    redis = await create_redis()
+    keys = [RedisKeys.COMPLETION_STREAM.format(shard=shard) for shard in range(shards)]
+    keys += [RedisKeys.SHARD_LEASE.format(shard=shard) for shard in range(shards)]
+    await redis.delete(PROCESSED_KEY, RedisKeys.SCHEDULER_WORKERS, *keys)
+    await redis.aclose()
+
+
+async def publish(events: int, tasks: int, shards: int):
+    redis = await create_redis()
+    async with redis.pipeline(transaction=False) as pipe:
+        for index in range(events):
+            task_uid = f"bench-task-{index % tasks}"
+            shard = CompletionStreamService.shard_of(task_uid, shards)
+            pipe.xadd(
+                RedisKeys.COMPLETION_STREAM.format(shard=shard),
+                {
+                    "job_uid": f"{task_uid}-job{index}",
+                    "task_uid": task_uid,
+                    "success": "1",
+                    "error_detail": "",
+                },
+            )
+        await pipe.execute()
+    await redis.aclose()
+
+
+def main(events: int, tasks: int, shards: int, workers: list, cpu_ms: float, io_ms: float):
+    context = multiprocessing.get_context("spawn")
+    rows = []
+    for count in workers:
+        asyncio.run(reset(shards))
+        asyncio.run(publish(events, tasks, shards))
+        start = time.perf_counter()
+        processes = [
+            context.Process(target=worker_process, args=(shards, events, cpu_ms, io_ms))
+            for _ in range(count)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+        rows.append((count, events / elapsed))
+    asyncio.run(reset(shards))
+
+    baseline = rows[0][1]
+    print(f"{'workers':>8}{'events/s':>12}{'speedup':>10}")
+    for count, throughput in rows:
+        print(f"{count:>8}{throughput:>12.1f}{throughput / baseline:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="多进程分片调度吞吐量基准测试")
+    parser.add_argument("--events", type=int, default=20000, help="完成事件数量")
+    parser.add_argument("--tasks", type=int, default=64, help="任务流数量")
+    parser.add_argument("--shards", type=int, default=8, help="分片数量")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="调度进程数")
+    parser.add_argument("--cpu-ms", type=float, default=1.0, help="单事件CPU耗时(毫秒)")
+    parser.add_argument("--io-ms", type=float, default=5.0, help="单事件I/O等待(毫秒)")
+    args = parser.parse_args()
+    main(args.events, args.tasks, args.shards, args.workers, args.cpu_ms, args.io_ms)
@@ -0,0 +1,39 @@
+"""
+本地算子层桩服务, 供派发相关的基准测试使用
+
+/operator/add_job 对每个任务立即返回成功, 可通过delay模拟算子层处理耗时
+"""
+
+import asyncio
+from aiohttp import web
+
+
+def create_stub_app(delay: float = 0.0) -> web.Application:
+    async def add_job(request: web.Request):
+        jobs = await request.json()
+        if delay:
+            await asyncio.sleep(delay)
+        return web.json_response(
+            {"data": [{"job_uid": job["job_uid"], "success": True} for job in jobs]}
+        )
+
+    async def stop_job(request: web.Request):
+        job_uids = request.query.getall("job_uids", [])
+        return web.json_response(
+            {"data": [{"job_uid": job_uid, "success": True} for job_uid in job_uids]}
+        )
+
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app.router.add_post("/operator/add_job", add_job)
+    app.router.add_get("/operator/stop_job", stop_job)
+    return app
+
+
+async def start_stub_operator(
+    host: str = "127.0.0.1", port: int = 18088, delay: float = 0.0
+) -> web.AppRunner:
+    """启动桩服务, 调用方负责 await runner.cleanup()"""
+    runner = web.AppRunner(create_stub_app(delay), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
@@ -4,7 +4,7 @@ import sys
 from dotenv import load_dotenv
 from functools import lru_cache
 from pydantic_settings import BaseSettings
-from typing import Literal
+from typing import Dict, Literal
 
 
 # # note: BaseSettings 自动获得以下核心功能：
@@ -26,6 +26,7 @@ class AppSettings(BaseSettings):
     app_port: int = 9099
     app_version: str = "1.0.0"
     app_reload: bool = True
+    app_workers: int = 1  # uvicorn工作进程数（开启热重载时无效）
     app_ip_location_query: bool = True  # IP属地查询开关
     app_same_time_login: bool = True  # 多端登录控制
 
@@ -67,6 +68,90 @@ class OperatorSettings(BaseSettings):
     operator_port: int = 8088
     operator_root_path: str = ""
     operator_version: str = "1.0.0"
+    operator_timeout: float = 30.0
+    operator_max_retries: int = 3
+    # 连接池: 总连接数、单主机连接数(0不限制)、keep-alive保持时间(秒)、DNS缓存时间(秒)
+    operator_pool_size: int = 100
+    operator_pool_per_host: int = 0
+    operator_keepalive_timeout: float = 30.0
+    operator_dns_cache_ttl: int = 300
+    # 派发传输方式: aiohttp/httpx共享连接池, thread/process在共享线程池/进程池中发送同步请求
+    operator_transport: Literal["aiohttp", "httpx", "thread", "process"] = "aiohttp"
+    operator_transport_workers: int = 8
+    # 批量派发: 每个请求的最大任务数与最大请求体字节数, 同时发送的请求数
+    operator_batch_max_jobs: int = 200
+    operator_batch_max_bytes: int = 1048576
+    operator_batch_concurrency: int = 4
+
+
+class SchedulerSettings(BaseSettings):
+    """
+    调度器配置
+    """
+
+    # 任务日志写后缓冲(任务完成检查点记录共用该配置)
+    scheduler_log_buffer_enabled: bool = True
+    scheduler_log_batch_size: int = 200
+    scheduler_log_flush_interval: float = 1.0
+    scheduler_log_max_queue: int = 10000
+    # 任务日志写入失败后的首次重试等待时间与最大等待时间(秒), 只在关闭时丢弃仍无法写入的日志
+    scheduler_log_retry_backoff: float = 1.0
+    scheduler_log_retry_max_backoff: float = 30.0
+    # 任务流进度写库防抖: 最小写入间隔(秒)与最小进度变化
+    scheduler_progress_flush_interval: float = 1.0
+    scheduler_progress_flush_delta: float = 0.05
+    # 任务完成事件流: 是否在本进程消费、消费组、并发数、重新认领空闲时间(毫秒)、最大投递次数;
+    # 事件流不按长度截断, 只删除已确认的事件, 积压时不会丢失未处理的事件
+    scheduler_completion_consumer_enabled: bool = True
+    scheduler_completion_group: str = "scheduler"
+    scheduler_completion_concurrency: int = 16
+    scheduler_completion_claim_idle_ms: int = 60000
+    scheduler_completion_max_deliveries: int = 5
+    # 多进程调度: 完成事件按task_uid分片的数量(应不小于调度进程数)与分片租约时长(毫秒)
+    scheduler_shards: int = 8
+    scheduler_shard_lease_ms: int = 15000
+    # 就绪队列优先级老化: 每级优先级折算的提前入队时间(毫秒),
+    # 低优先级任务等待超过优先级差乘以该值后即排在新入队的高优先级任务之前
+    scheduler_priority_aging_ms: int = 60000
+    # 并发限制: 按任务执行器与参与方限制同时运行的任务数, 未配置的执行器/参与方不限制
+    # 环境变量以JSON给出, 如 SCHEDULER_PARTY_LIMITS='{"alice": 4, "bob": 4}'
+    scheduler_executor_limits: Dict[str, int] = {}
+    scheduler_party_limits: Dict[str, int] = {}
+    # 未单独配置的参与方的默认并发上限, 0表示不限制
+    scheduler_party_default_limit: int = 0
+    # 并发槽位最长占用时间(毫秒), 超时未释放的槽位视为泄漏并被回收
+    scheduler_slot_ttl_ms: int = 86400000
+    # 禁止并发(concurrent=1)的任务流在上一次运行未结束时再次启动的处理策略:
+    # reject直接拒绝, queue排队等待上一次运行结束后启动(最多排队scheduler_max_pending_runs次)
+    scheduler_overlap_policy: Literal["reject", "queue"] = "reject"
+    scheduler_max_pending_runs: int = 10
+    # 定时触发引擎: 是否在本进程运行、触发延迟容忍时间(秒)、
+    # 立即执行策略的最大连续补偿次数、同时启动任务流的最大数量
+    scheduler_cron_enabled: bool = True
+    scheduler_cron_misfire_grace: float = 5.0
+    scheduler_cron_max_catchup: int = 100
+    scheduler_cron_concurrency: int = 16
+    # 定时触发主节点租约时长(毫秒): 多副本部署时只有持有租约的进程触发定时任务流,
+    # 主节点失联后最长在该时间后由其他进程接管
+    scheduler_leader_lease_ms: int = 10000
+    # 执行计划缓存: 进程内LRU容量与Redis中的缓存时间(秒)
+    scheduler_plan_cache_size: int = 256
+    scheduler_plan_cache_ttl: int = 604800
+    # 调度定时器: 是否在本进程运行与扫描间隔(秒), 周期性派发重试到期等遗留的就绪任务
+    scheduler_timer_enabled: bool = True
+    scheduler_timer_interval: float = 5.0
+    # 任务失败重试的最大等待时间(秒), 指数退避的等待时间不超过该值
+    scheduler_retry_max_backoff: float = 3600.0
+    # 任务完成检查点在Redis中的保存时间(秒), 过期后从sys_job_run表恢复
+    scheduler_checkpoint_ttl: int = 604800
+    # 任务结果缓存(仅cacheable任务): 缓存时间(秒)与最大条目数, 超出时淘汰最久未使用的条目
+    scheduler_result_cache_ttl: int = 604800
+    scheduler_result_cache_max: int = 10000
+    # 未配置timeout的任务的执行超时时间(秒), 下发后超时仍未收到完成回调的任务按失败处理(可重试);
+    # 默认0为不限制, 只有显式配置了timeout的任务受超时扫描约束, 避免误杀耗时较长的正常任务
+    scheduler_job_timeout: float = 0
+    # 超时任务的失败事件发布后仍未被处理(如发布前进程退出)时, 重新发布的间隔(秒)
+    scheduler_job_timeout_recheck: float = 60.0
 
 
 class GetConfig:
@@ -109,6 +194,14 @@ class GetConfig:
         # 实例化算子层配置模型
         return OperatorSettings()
 
+    @lru_cache()
+    def get_scheduler_config(self):
+        """
+        获取调度器配置
+        """
+        # 实例化调度器配置模型
+        return SchedulerSettings()
+
     @staticmethod
     def parse_cli_args():
         """
@@ -164,3 +257,5 @@ DataBaseConfig = get_config.get_database_config()
 RedisConfig = get_config.get_redis_config()
 # operator算子层配置
 OperatorConfig = get_config.get_operator_config()
+# 调度器配置
+SchedulerConfig = get_config.get_scheduler_config()
@@ -1,10 +1,17 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, Request, Form, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, Request, Form, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from config.get_db import get_db
 from utils.log_util import logger
 from module_admin.service.task_service import TaskService
-from module_admin.service.job_service import TaskSchedulerService
+from module_admin.service.job_log_service import job_log_buffer, job_run_buffer
+from module_admin.service.job_service import RedisJobStore, plan_cache
+from module_admin.service.completion_service import (
+    CompletionStreamService,
+    completion_worker,
+)
+from module_admin.service.cron_service import cron_engine, cron_leader
+from module_admin.service.timer_service import scheduler_timer
 from module_admin.entity.vo.task_vo import (
     TaskModel,
     TaskPageQueryModel,
@@ -86,15 +93,11 @@ async def add_task(
 async def job_completed(
     request: Request,
     job_completed: JobExecuteResponseModel,
-    background_tasks: BackgroundTasks,
-    query_db: AsyncSession = Depends(get_db),
 ):
-    task_scheduler = TaskSchedulerService(request.app.state.redis, query_db)
-    background_tasks.add_task(
-        task_scheduler.handle_job_completion,
-        job_completed.job_uid,
-        job_completed.success,
-        job_completed.error_detail,
+    # 只追加到完成事件流, 由消费者异步处理, 进程重启也不会丢失事件;
+    # 算子层需原样返回派发请求中的dispatch_token, 迟到的回调据此识别
+    await CompletionStreamService.publish_completion(
+        request.app.state.redis, job_completed
     )
     return ResponseUtil.success(
         msg="记录成功", dict_content={"job_uid": job_completed.job_uid}
@@ -159,6 +162,36 @@ async def execute_system_task(
 
     # return ResponseUtil.success(msg="任务启动成功", dict_content={"task_uid": task_uid})
 
+@taskController.post("/task/resume")
+async def resume_task(
+    request: Request,
+    task_uid: str = Query(..., description="任务唯一标识"),  # 作为查询参数
+    query_db: AsyncSession = Depends(get_db),
+):
+    """从检查点恢复失败或被停止的任务流, 已成功的任务不再执行"""
+    resume_task_result = await TaskService.resume_task_services(
+        query_db, request.app.state.redis, task_uid
+    )
+    logger.info(resume_task_result.message)
+
+    return ResponseUtil.success(
+        msg=resume_task_result.message, dict_content={"task_uid": task_uid}
+    )
+
+
+@taskController.get("/task/levels")
+async def get_task_levels(
+    request: Request,
+    task_uid: str = Query(..., description="任务唯一标识"),  # 作为查询参数
+    query_db: AsyncSession = Depends(get_db),
+):
+    """任务流的拓扑层级, 同一层级的任务之间没有依赖"""
+    levels = await TaskService.get_task_levels_services(
+        query_db, request.app.state.redis, task_uid
+    )
+    return ResponseUtil.success(data={"task_uid": task_uid, "levels": levels})
+
+
 @taskController.post("/task/stop")
 async def stop_task(
     request: Request,
@@ -171,3 +204,26 @@ async def stop_task(
     logger.info("任务停止成功")
 
     return ResponseUtil.success(msg="任务停止成功", dict_content={"task_uid": task_uid})
+
+
+@taskController.get("/metrics")
+async def get_scheduler_metrics(request: Request):
+    """调度器运行指标"""
+    return ResponseUtil.success(
+        data={
+            "job_log_buffer": job_log_buffer.metrics(),
+            "job_run_buffer": job_run_buffer.metrics(),
+            "completion_worker": completion_worker.metrics(),
+            "cron_engine": cron_engine.metrics(),
+            "leader": cron_leader.metrics(),
+            "plan_cache": plan_cache.metrics(),
+            "scheduler_timer": scheduler_timer.metrics(),
+            "slots": await RedisJobStore(request.app.state.redis).get_slot_usage(),
+        }
+    )
+
+
+@taskController.get("/leader")
+async def get_scheduler_leader():
+    """定时触发主节点及租约状态"""
+    return ResponseUtil.success(data=await cron_leader.status())
@@ -1,4 +1,6 @@
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
 from module_admin.entity.do.task_do import SysJobLog
 from module_admin.entity.vo.task_vo import JobLogModel
 
@@ -21,4 +23,21 @@ class JobLogDao:
         db.add(db_task_log)
         await db.flush()
 
-        return db_task_log
\ No newline at end of file
+        return db_task_log
+
+    @classmethod
+    async def add_job_logs_bulk_dao(cls, db: AsyncSession, job_logs: List[JobLogModel]):
+        """
+        批量新增定时任务日志数据库操作, 使用一条多行INSERT语句
+
+        :param db: orm对象
+        :param job_logs: 定时任务日志对象列表
+        :return:
+        """
+        if not job_logs:
+            return
+        await db.execute(
+            insert(SysJobLog).values(
+                [job_log.model_dump(exclude={"job_log_id"}) for job_log in job_logs]
+            )
+        )
@@ -0,0 +1,91 @@
+from datetime import datetime
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Iterable, List, Optional
+from module_admin.entity.do.task_do import SysJobRun
+from module_admin.entity.vo.task_vo import JobRunModel
+
+
+class JobRunDao:
+    """
+    任务完成检查点模块数据库操作层
+    """
+
+    @classmethod
+    async def add_job_runs_bulk_dao(cls, db: AsyncSession, job_runs: List[JobRunModel]):
+        """
+        批量新增任务完成记录数据库操作, 使用一条多行INSERT语句
+
+        :param db: orm对象
+        :param job_runs: 任务完成记录对象列表
+        :return:
+        """
+        if not job_runs:
+            return
+        await db.execute(
+            insert(SysJobRun).values(
+                [job_run.model_dump(exclude={"job_run_id"}) for job_run in job_runs]
+            )
+        )
+
+    @classmethod
+    async def get_latest_run_id_dao(cls, db: AsyncSession, task_uid: str) -> Optional[str]:
+        """
+        获取任务流最近一次有完成记录的运行ID
+
+        :param db: orm对象
+        :param task_uid: 任务流UID
+        :return: 运行ID, 没有完成记录时返回None
+        """
+        result = await db.execute(
+            select(SysJobRun.run_id)
+            .where(SysJobRun.task_uid == task_uid)
+            .order_by(SysJobRun.create_time.desc(), SysJobRun.job_run_id.desc())
+            .limit(1)
+        )
+        return result.scalars().first()
+
+    @classmethod
+    async def get_completed_indexes_dao(
+        cls, db: AsyncSession, task_uid: str, plan_hash: str, run_id: str
+    ) -> List[int]:
+        """
+        获取任务流一次运行在指定执行计划下已完成任务的下标
+
+        :param db: orm对象
+        :param task_uid: 任务流UID
+        :param plan_hash: 执行计划哈希
+        :param run_id: 运行ID
+        :return: 已完成任务的下标列表
+        """
+        result = await db.execute(
+            select(SysJobRun.job_index)
+            .where(
+                SysJobRun.task_uid == task_uid,
+                SysJobRun.plan_hash == plan_hash,
+                SysJobRun.run_id == run_id,
+            )
+            .distinct()
+        )
+        return list(result.scalars().all())
+
+    @classmethod
+    async def delete_job_runs_dao(
+        cls, db: AsyncSession, task_uid: str, keep_run_ids: Iterable[str], before: datetime
+    ):
+        """
+        删除任务流其他运行的完成记录数据库操作
+
+        :param db: orm对象
+        :param task_uid: 任务流UID
+        :param keep_run_ids: 保留完成记录的运行ID(仍在执行的运行)
+        :param before: 只删除早于该时间的记录, 之后启动的运行不受影响
+        :return:
+        """
+        await db.execute(
+            delete(SysJobRun).where(
+                SysJobRun.task_uid == task_uid,
+                SysJobRun.run_id.not_in(list(keep_run_ids)),
+                SysJobRun.create_time < before,
+            )
+        )
@@ -73,4 +73,21 @@ class SysTaskLog(Base):
         Index('idx_task_uid', 'task_uid'),
         Index('idx_time', 'create_time'),
         {'comment': '定时任务流调度日志表'}
-    )
\ No newline at end of file
+    )
+
+
+class SysJobRun(Base):
+    __tablename__ = 'sys_job_run'
+
+    job_run_id = Column(BigInteger, primary_key=True, autoincrement=True, comment='任务运行记录ID')
+    task_uid = Column(String(64), nullable=False, comment='任务流UID')
+    plan_hash = Column(String(64), nullable=False, comment='执行计划哈希(task_yaml内容哈希)')
+    job_index = Column(BigInteger, nullable=False, comment='任务在执行计划中的下标')
+    job_uid = Column(String(64), nullable=False, comment='任务UID')
+    run_id = Column(String(8), default='', comment='检查点所属的运行ID')
+    create_time = Column(DateTime, comment='完成时间')
+
+    __table_args__ = (
+        Index('idx_task_run', 'task_uid', 'run_id'),
+        {'comment': '任务完成检查点表'}
+    )
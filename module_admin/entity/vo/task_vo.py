@@ -2,10 +2,12 @@ from datetime import datetime
 from pydantic import BaseModel, ConfigDict, Field, field_validator
 from pydantic.alias_generators import to_camel
 from pydantic_validation_decorator import NotBlank, Size
-from typing import Literal, Optional, List
+from typing import Dict, Literal, Optional, List, Tuple
 from module_admin.annotation.pydantic_annotation import as_query
+import hashlib
 import json
 from utils.common_util import SnakeCaseUtil
+from utils.dag_util import CycleError, DagUtil
 
 
 class JobExecuteModel(BaseModel):
@@ -18,7 +20,7 @@ class JobExecuteModel(BaseModel):
     )
 
     job_uid: Optional[str] = Field(
-        default=None, max_length=64, description="任务UID，唯一标识"
+        default=None, max_length=128, description="任务执行UID，任务UID@运行ID"
     )
     job_executor: str = Field(
         default="default", max_length=64, description="任务执行器"
@@ -49,6 +51,15 @@ class JobExecuteModel(BaseModel):
     def validate_fields(self):
         self.get_invoke_target()
 
+class JobDispatchModel(JobExecuteModel):
+    """
+    定时任务派发模型
+    """
+
+    dispatch_token: Optional[int] = Field(
+        default=None, description="派发令牌, 每次派发递增, 算子层在完成回调中原样返回"
+    )
+
 class JobModel(JobExecuteModel):
     """
     定时任务模型
@@ -57,6 +68,9 @@ class JobModel(JobExecuteModel):
         alias_generator=SnakeCaseUtil.camel_to_snake, from_attributes=True
     )
     
+    job_uid: Optional[str] = Field(
+        default=None, max_length=64, description="任务UID，唯一标识"
+    )
     job_name: Optional[str] = Field(default=None, description="任务名称")
     job_parties: Optional[str] = Field(
         default=None, max_length=128, description="任务参与方"
@@ -66,6 +80,25 @@ class JobModel(JobExecuteModel):
         max_length=2560,
         description="任务依赖关系, 包含任务流内的任务id",
     )
+    max_retries: int = Field(default=0, ge=0, description="任务执行失败后的最大重试次数")
+    backoff: float = Field(
+        default=10.0, ge=0, description="首次重试前的等待时间(秒), 之后每次重试翻倍"
+    )
+    cacheable: bool = Field(default=False, description="是否复用相同输入的成功结果")
+    input_version: Optional[str] = Field(
+        default=None, max_length=64, description="输入数据版本, 输入数据变化时更新以使结果缓存失效"
+    )
+    timeout: Optional[float] = Field(
+        default=None, ge=0, description="任务执行超时时间(秒), 为空时使用全局默认值(默认不限制), 0为不限制"
+    )
+
+    def result_cache_key(self) -> str:
+        """结果缓存键: 调用目标、参数、参与方与输入数据版本的内容哈希"""
+        content = json.dumps(
+            [self.invoke_target, self.job_args, self.job_kwargs, self.job_parties, self.input_version],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(content.encode()).hexdigest()
 
 class JobSchedulerModel(JobModel):
     model_config = ConfigDict(
@@ -75,9 +108,37 @@ class JobSchedulerModel(JobModel):
         frozen=False,  # 是否允许修改实例属性
     )
 
+    job_uid: Optional[str] = Field(
+        default=None, max_length=128, description="任务执行UID，任务UID@运行ID"
+    )
     task_uid: Optional[str] = Field(
         default=None, max_length=64, description="任务所属任务流UID，唯一标识"
     )
+    run_id: Optional[str] = Field(
+        default=None, max_length=8, description="任务流运行ID, 为空表示升级前未区分运行的任务"
+    )
+    priority: int = Field(default=0, description="所属任务流优先级, 数值越大越优先调度")
+    attempts: int = Field(default=0, description="本次运行中已重试的次数")
+    plan_hash: Optional[str] = Field(default=None, description="所属执行计划哈希")
+    plan_index: Optional[int] = Field(default=None, description="任务在执行计划中的下标")
+    cache_key: Optional[str] = Field(default=None, description="结果缓存键, 为空表示不使用结果缓存")
+
+    @staticmethod
+    def scoped_uid(uid: str, run_id: Optional[str]) -> str:
+        """任务或任务流UID加上运行ID, 同一任务流的多次运行互不干扰"""
+        return f"{uid}@{run_id}" if run_id else uid
+
+    @property
+    def run_uid(self) -> str:
+        """任务流运行UID"""
+        return self.scoped_uid(self.task_uid, self.run_id)
+
+    @property
+    def base_job_uid(self) -> str:
+        """去掉运行ID的任务UID"""
+        if self.run_id and self.job_uid.endswith(f"@{self.run_id}"):
+            return self.job_uid[: -len(self.run_id) - 1]
+        return self.job_uid
 
 
 
@@ -93,10 +154,14 @@ class JobExecuteResponseModel(BaseModel):
     )
 
     job_uid: Optional[str] = Field(
-        default=None, max_length=64, description="任务UID，唯一标识"
+        default=None, max_length=128, description="任务执行UID，任务UID@运行ID"
     )
     success: bool = Field(default=False, description="是否成功")
     error_detail: Optional[str] = Field(default=None, description="错误详情")
+    cached: bool = Field(default=False, description="是否命中结果缓存而未实际执行")
+    dispatch_token: Optional[int] = Field(
+        default=None, description="事件所属派发的令牌, 算子层原样返回派发请求中的dispatch_token"
+    )
 
 
 class TaskModel(BaseModel):
@@ -155,22 +220,58 @@ class TaskModel(BaseModel):
     def get_cron_expression(self):
         return self.cron_expression
 
-    # todo: 添加环验证
     @field_validator("task_yaml")
     def validate_dependencies(cls, value: List[JobModel]):
-        task_uids = {job.job_uid for job in value if job.job_uid}
-        for job in value:
-            job_dependencies = json.loads(job.job_dependencies or "[]")
-            if job_dependencies:
-                for dep_uid in job_dependencies:
-                    if dep_uid not in task_uids:
-                        raise ValueError(f"任务{job.job_name}依赖的任务{dep_uid}不存在")
+        cls.topological_sort(value)
         return value
 
+    @staticmethod
+    def topological_sort(jobs: List[JobModel]) -> Tuple[List[int], List[int], List[List[int]]]:
+        """
+        校验任务依赖并拓扑排序, 时间复杂度与任务数和依赖边数成线性
+
+        :param jobs: 任务列表
+        :return: (拓扑序, 各任务的层级, 反向邻接表), 均以任务在列表中的下标表示
+        :raises ValueError: 依赖的任务不存在或存在循环依赖
+        """
+        index = {job.job_uid: position for position, job in enumerate(jobs) if job.job_uid}
+        dependents: List[List[int]] = [[] for _ in jobs]
+        for position, job in enumerate(jobs):
+            # 去重, 避免重复依赖导致计数器永远无法归零
+            for dep_uid in dict.fromkeys(json.loads(job.job_dependencies or "[]")):
+                if dep_uid not in index:
+                    raise ValueError(f"任务{job.job_name}依赖的任务{dep_uid}不存在")
+                dependents[index[dep_uid]].append(position)
+        try:
+            order, levels = DagUtil.topological_sort(dependents)
+        except CycleError as e:
+            cycle = " -> ".join(jobs[position].job_uid for position in e.cycle)
+            raise ValueError(f"任务流存在循环依赖: {cycle}")
+        return order, levels, dependents
+
     def validate_fields(self):
         self.get_cron_expression()
 
 
+class ExecutionPlanModel(BaseModel):
+    """
+    任务流编译后的执行计划, 以task_yaml内容哈希为键缓存, 与运行无关
+    """
+
+    plan_hash: str = Field(description="task_yaml内容的sha256")
+    job_uids: List[str] = Field(default=[], description="按拓扑序排列的任务UID")
+    in_degree: List[int] = Field(default=[], description="各任务的依赖数量, 与job_uids对齐")
+    levels: List[int] = Field(
+        default=[], description="各任务的拓扑层级, 同一层级的任务之间没有依赖"
+    )
+    dependents: List[List[int]] = Field(
+        default=[], description="各任务的下游任务在job_uids中的下标(反向邻接表)"
+    )
+    payloads: List[Dict[str, str]] = Field(
+        default=[], description="预先编码的任务参数哈希字段, 不含任务UID与运行相关字段"
+    )
+
+
 class TaskProgressModel(BaseModel):
     """
     定时任务流进度模型
@@ -183,10 +284,16 @@ class TaskProgressModel(BaseModel):
     task_uid: Optional[str] = Field(
         default=None, max_length=64, description="任务流UID，唯一标识"
     )
+    run_id: Optional[str] = Field(default=None, max_length=8, description="任务流运行ID")
     run_ststus: Optional[str] = Field(default="not started", description="任务执行状态")
     task_completed: Optional[int] = Field(default=0, description="任务完成数量")
     task_len: Optional[int] = Field(default=0, description="任务总数量")
-    task_jobs: Optional[List[str]] = Field(default=[], description="任务流中的任务uid")
+    task_jobs: Optional[List[str]] = Field(default=[], description="任务流中的任务执行uid")
+
+    @property
+    def run_uid(self) -> str:
+        """任务流运行UID"""
+        return JobSchedulerModel.scoped_uid(self.task_uid, self.run_id)
 
 
 class JobLogModel(JobModel):
@@ -206,6 +313,30 @@ class JobLogModel(JobModel):
     )
     exception_info: Optional[str] = Field(default=None, description="异常信息")
     create_time: Optional[datetime] = Field(default=None, description="创建时间")
+    # 重试、结果缓存与超时策略属于任务定义, 不写入日志表
+    max_retries: int = Field(default=0, exclude=True)
+    backoff: float = Field(default=10.0, exclude=True)
+    cacheable: bool = Field(default=False, exclude=True)
+    input_version: Optional[str] = Field(default=None, exclude=True)
+    timeout: Optional[float] = Field(default=None, exclude=True)
+
+
+class JobRunModel(BaseModel):
+    """
+    任务完成检查点表对应pydantic模型
+    """
+
+    model_config = ConfigDict(
+        alias_generator=SnakeCaseUtil.camel_to_snake, from_attributes=True
+    )
+
+    job_run_id: Optional[int] = Field(default=None, description="任务运行记录ID")
+    task_uid: Optional[str] = Field(default=None, description="任务流UID")
+    plan_hash: Optional[str] = Field(default=None, description="执行计划哈希")
+    job_index: Optional[int] = Field(default=None, description="任务在执行计划中的下标")
+    job_uid: Optional[str] = Field(default=None, description="任务UID")
+    run_id: Optional[str] = Field(default=None, description="检查点所属的运行ID")
+    create_time: Optional[datetime] = Field(default=None, description="完成时间")
 
 
 class TaskLogModel(BaseModel):
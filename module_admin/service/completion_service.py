@@ -0,0 +1,472 @@
+import asyncio
+import math
+import os
+import socket
+import time
+import zlib
+from typing import Awaitable, Callable, Dict, FrozenSet, Optional, Set, Tuple
+from redis.asyncio import Redis as asyncio_redis
+from redis.exceptions import ResponseError
+from config.database import AsyncSessionLocal
+from config.env import SchedulerConfig
+from module_admin.entity.vo.task_vo import JobExecuteResponseModel
+from module_admin.service.job_service import (
+    RedisJobStore,
+    RedisKeys,
+    TaskSchedulerService,
+)
+from utils.log_util import logger
+
+
+def get_worker_id() -> str:
+    """当前调度进程标识, 用作消费者名称与租约持有者(运行时获取, 兼容fork出的子进程)"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+# 仅当租约仍由自己持有时续期
+RENEW_LEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# 仅当租约仍由自己持有时释放
+RELEASE_LEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class CompletionStreamService:
+    """
+    任务完成事件队列
+    算子层回调只负责把事件追加到Redis Stream, 由消费组工作协程异步处理
+    """
+
+    @staticmethod
+    def shard_of(task_uid: Optional[str], shards: int = SchedulerConfig.scheduler_shards) -> int:
+        """任务流所属分片, 同一任务流的全部事件总是进入同一分片"""
+        return RedisJobStore.shard_of(task_uid, shards)
+
+    @classmethod
+    async def publish_completion(
+        cls, redis: asyncio_redis, job_completed: JobExecuteResponseModel
+    ) -> str:
+        """
+        按任务流分片追加任务完成事件
+
+        :param redis: Redis连接
+        :param job_completed: 任务完成事件
+        :return: 事件ID
+        """
+        job = await RedisJobStore(redis).get_job_fields(job_completed.job_uid, ["task_uid"])
+        task_uid = job.get("task_uid") if job else None
+        # 派发令牌由算子层从派发请求中原样带回, 不能在回调到达时读取任务当前的令牌,
+        # 否则超时后迟到的成功回调会被当作重试那次派发的结果
+        return await redis.xadd(
+            RedisKeys.COMPLETION_STREAM.format(shard=cls.shard_of(task_uid)),
+            {**cls.encode_event(job_completed), "task_uid": task_uid or ""},
+        )
+
+    @staticmethod
+    def encode_event(job_completed: JobExecuteResponseModel) -> Dict[str, str]:
+        return {
+            "job_uid": job_completed.job_uid or "",
+            "success": "1" if job_completed.success else "0",
+            "error_detail": job_completed.error_detail or "",
+            "cached": "1" if job_completed.cached else "0",
+            "dispatch": (
+                "" if job_completed.dispatch_token is None else str(job_completed.dispatch_token)
+            ),
+        }
+
+    @staticmethod
+    def decode_event(fields: Dict[str, str]) -> JobExecuteResponseModel:
+        return JobExecuteResponseModel(
+            job_uid=fields.get("job_uid"),
+            success=fields.get("success") == "1",
+            error_detail=fields.get("error_detail") or None,
+            cached=fields.get("cached") == "1",
+            dispatch_token=int(fields["dispatch"]) if fields.get("dispatch") else None,
+        )
+
+
+async def handle_completion_event(redis: asyncio_redis, event: JobExecuteResponseModel):
+    """
+    默认的完成事件处理: 每个事件使用独立的数据库会话, 不依赖请求作用域的会话;
+    槽位释放后只唤醒本进程持有分片中等待的运行
+    """
+    async with AsyncSessionLocal() as db:
+        task_scheduler = TaskSchedulerService(redis, db, completion_worker.owned_shards)
+        await task_scheduler.handle_job_completion(
+            event.job_uid, event.success, event.error_detail, event.cached, event.dispatch_token
+        )
+
+
+class CompletionConsumer:
+    """
+    任务完成事件消费者
+    通过消费组读取事件, 以有限并发处理, 处理成功后确认(XACK);
+    处理失败或进程重启遗留的事件在空闲超时后被重新认领(XAUTOCLAIM)并重试,
+    超过最大投递次数的事件转入死信流; 认领协程同时删除已确认的事件, 未处理的事件不会被截断
+    """
+
+    def __init__(
+        self,
+        stream: str,
+        group: str = SchedulerConfig.scheduler_completion_group,
+        concurrency: int = SchedulerConfig.scheduler_completion_concurrency,
+        claim_idle_ms: int = SchedulerConfig.scheduler_completion_claim_idle_ms,
+        max_deliveries: int = SchedulerConfig.scheduler_completion_max_deliveries,
+        handler: Optional[Callable[[asyncio_redis, JobExecuteResponseModel], Awaitable]] = None,
+    ):
+        """
+        :param stream: 事件流键名
+        :param group: 消费组名称
+        :param concurrency: 同时处理的最大事件数
+        :param claim_idle_ms: 待确认事件空闲多久后被重新认领(毫秒)
+        :param max_deliveries: 单个事件的最大投递次数
+        :param handler: 事件处理协程函数 handler(redis, event), 默认交给TaskSchedulerService
+        """
+        self.stream = stream
+        self.handler = handler or handle_completion_event
+        self.group = group
+        self.concurrency = concurrency
+        self.claim_idle_ms = claim_idle_ms
+        self.max_deliveries = max_deliveries
+        # XREADGROUP阻塞等待时间(毫秒)
+        self.block_ms = 5000
+        self.consumer = get_worker_id()
+        self.redis: Optional[asyncio_redis] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Set[asyncio.Task] = set()
+        self._pending_ids: Set[str] = set()
+        self._loops: Set[asyncio.Task] = set()
+        self._processed_total = 0
+        self._failed_total = 0
+        self._dead_total = 0
+
+    @property
+    def running(self) -> bool:
+        return any(not loop.done() for loop in self._loops)
+
+    async def start(self, redis: asyncio_redis):
+        """创建消费组并启动读取与认领协程"""
+        if self.running:
+            return
+        self.redis = redis
+        self.consumer = get_worker_id()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        try:
+            await redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            # 消费组已存在
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._loops = {
+            asyncio.create_task(self._read_loop()),
+            asyncio.create_task(self._claim_loop()),
+        }
+        logger.info(
+            f"任务完成事件消费者启动, stream={self.stream}, group={self.group}, "
+            f"consumer={self.consumer}, concurrency={self.concurrency}"
+        )
+
+    async def stop(self):
+        """停止读取新事件, 等待处理中的事件完成"""
+        for loop in self._loops:
+            loop.cancel()
+        await asyncio.gather(*self._loops, return_exceptions=True)
+        self._loops = set()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        logger.info(
+            f"任务完成事件消费者已关闭, stream={self.stream}, "
+            f"累计处理{self._processed_total}条"
+        )
+
+    async def _read_loop(self):
+        while True:
+            # 先占用并发槽位再读取, 保证处理中的事件数不超过concurrency;
+            # 一次读取的事件数等于当前空闲槽位数
+            await self._semaphore.acquire()
+            slots = 1
+            while not self._semaphore.locked():
+                await self._semaphore.acquire()
+                slots += 1
+            try:
+                response = await self.redis.xreadgroup(
+                    self.group,
+                    self.consumer,
+                    {self.stream: ">"},
+                    count=slots,
+                    block=self.block_ms,
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                response = None
+                logger.error(f"读取任务完成事件失败: {e}")
+                await asyncio.sleep(1)
+            for _, messages in response or []:
+                for message in messages:
+                    self._spawn(message)
+                    slots -= 1
+            for _ in range(slots):
+                self._semaphore.release()
+
+    async def _claim_loop(self):
+        interval = max(self.claim_idle_ms / 2000, 1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._claim_pending()
+                await self._trim_acked()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"认领待确认的任务完成事件失败: {e}")
+
+    async def _claim_pending(self):
+        """重新认领空闲超时的待确认事件, 超过最大投递次数的转入死信流"""
+        pending = await self.redis.xpending_range(
+            self.stream,
+            self.group,
+            min="-",
+            max="+",
+            count=100,
+            idle=self.claim_idle_ms,
+        )
+        for entry in pending:
+            if entry["times_delivered"] >= self.max_deliveries:
+                await self._dead_letter(entry["message_id"])
+
+        start_id = "0-0"
+        while True:
+            start_id, messages, _ = await self.redis.xautoclaim(
+                self.stream,
+                self.group,
+                self.consumer,
+                min_idle_time=self.claim_idle_ms,
+                start_id=start_id,
+                count=100,
+            )
+            for message in messages:
+                if message[0] in self._pending_ids:
+                    continue
+                await self._semaphore.acquire()
+                self._spawn(message)
+            if start_id == "0-0" or not messages:
+                break
+
+    async def _trim_acked(self):
+        """
+        删除已确认的事件: 早于最早待确认事件、且已投递给消费组的事件都已处理完成
+        """
+        summary = await self.redis.xpending(self.stream, self.group)
+        if summary["pending"]:
+            min_id = summary["min"]
+        else:
+            groups = await self.redis.xinfo_groups(self.stream)
+            min_id = next(
+                (group["last-delivered-id"] for group in groups if group["name"] == self.group),
+                None,
+            )
+        if min_id and min_id != "0-0":
+            await self.redis.xtrim(self.stream, minid=min_id, approximate=False)
+
+    async def _dead_letter(self, message_id: str):
+        messages = await self.redis.xrange(self.stream, min=message_id, max=message_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for _, fields in messages:
+                pipe.xadd(RedisKeys.COMPLETION_DEAD_STREAM, {**fields, "message_id": message_id})
+            pipe.xack(self.stream, self.group, message_id)
+            await pipe.execute()
+        self._dead_total += 1
+        logger.error(f"任务完成事件{message_id}超过最大投递次数, 已转入死信流")
+
+    def _spawn(self, message: Tuple[str, Dict[str, str]]):
+        """已占用并发槽位后调用, 处理结束时释放"""
+        self._pending_ids.add(message[0])
+        task = asyncio.create_task(self._handle(*message))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _handle(self, message_id: str, fields: Dict[str, str]):
+        try:
+            await self.handler(self.redis, CompletionStreamService.decode_event(fields))
+            await self.redis.xack(self.stream, self.group, message_id)
+            self._processed_total += 1
+        except Exception as e:
+            # 不确认, 空闲超时后由认领协程重新投递
+            self._failed_total += 1
+            logger.exception(f"处理任务完成事件{message_id}失败: {e}")
+        finally:
+            self._pending_ids.discard(message_id)
+            self._semaphore.release()
+
+    def metrics(self) -> dict:
+        """消费者运行指标"""
+        return {
+            "running": self.running,
+            "stream": self.stream,
+            "inflight": len(self._inflight),
+            "concurrency": self.concurrency,
+            "processed_total": self._processed_total,
+            "failed_total": self._failed_total,
+            "dead_total": self._dead_total,
+        }
+
+
+class ShardedCompletionWorker:
+    """
+    分片调度工作者
+    完成事件按task_uid分散到scheduler_shards个分片流, 每个分片由持有该分片租约的
+    唯一一个调度进程消费, 即任务流的所有权随分片租约归属于某一个进程;
+    各进程通过心跳感知存活进程数, 均分分片并在进程退出或租约过期后自动接管
+    """
+
+    def __init__(
+        self,
+        shards: int = SchedulerConfig.scheduler_shards,
+        lease_ms: int = SchedulerConfig.scheduler_shard_lease_ms,
+        handler: Optional[Callable[[asyncio_redis, JobExecuteResponseModel], Awaitable]] = None,
+        **consumer_options,
+    ):
+        """
+        :param shards: 分片数量
+        :param lease_ms: 分片租约时长(毫秒), 进程失联后最长在该时间后被接管
+        :param handler: 事件处理协程函数, 透传给每个分片的消费者
+        :param consumer_options: 透传给CompletionConsumer的其他参数
+        """
+        self.shards = shards
+        self.lease_ms = lease_ms
+        self.handler = handler
+        self.consumer_options = consumer_options
+        self.worker_id = get_worker_id()
+        self.redis: Optional[asyncio_redis] = None
+        self._consumers: Dict[int, CompletionConsumer] = {}
+        self._lease_task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._lease_task is not None and not self._lease_task.done()
+
+    @property
+    def owned_shards(self) -> FrozenSet[int]:
+        """当前持有租约的分片, 定时扫描与槽位唤醒只处理这些分片的运行"""
+        return frozenset(self._consumers)
+
+    async def start(self, redis: asyncio_redis):
+        """启动租约维护协程, 获取分片后启动对应的消费者"""
+        if self.running:
+            return
+        self.redis = redis
+        self.worker_id = get_worker_id()
+        self._renew_script = redis.register_script(RENEW_LEASE)
+        self._release_script = redis.register_script(RELEASE_LEASE)
+        await self._rebalance()
+        self._lease_task = asyncio.create_task(self._lease_loop())
+        logger.info(
+            f"分片调度工作者启动, worker={self.worker_id}, shards={self.shards}, "
+            f"owned={sorted(self._consumers)}"
+        )
+
+    async def stop(self):
+        """停止消费并释放全部分片租约, 其他进程可立即接管"""
+        if self._lease_task is not None:
+            self._lease_task.cancel()
+            await asyncio.gather(self._lease_task, return_exceptions=True)
+            self._lease_task = None
+        for shard in list(self._consumers):
+            await self._release(shard)
+        if self.redis is not None:
+            await self.redis.zrem(RedisKeys.SCHEDULER_WORKERS, self.worker_id)
+        logger.info(f"分片调度工作者已关闭, worker={self.worker_id}")
+
+    async def _lease_loop(self):
+        interval = self.lease_ms / 3000
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._rebalance()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"分片租约维护失败: {e}")
+
+    async def _rebalance(self):
+        """心跳、续约, 并按存活进程数均分分片"""
+        now = int(time.time() * 1000)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(RedisKeys.SCHEDULER_WORKERS, {self.worker_id: now})
+            pipe.zremrangebyscore(RedisKeys.SCHEDULER_WORKERS, "-inf", now - self.lease_ms)
+            pipe.zcard(RedisKeys.SCHEDULER_WORKERS)
+            _, _, alive = await pipe.execute()
+        target = math.ceil(self.shards / max(alive, 1))
+
+        # 续约已持有的分片, 续约失败说明租约已过期并被其他进程接管
+        for shard in list(self._consumers):
+            renewed = await self._renew_script(
+                keys=[RedisKeys.SHARD_LEASE.format(shard=shard)],
+                args=[self.worker_id, self.lease_ms],
+            )
+            if not renewed:
+                logger.warning(f"分片{shard}租约丢失, 停止消费")
+                await self._consumers.pop(shard).stop()
+
+        # 持有过多时让出分片
+        while len(self._consumers) > target:
+            await self._release(max(self._consumers))
+
+        # 持有不足时尝试获取空闲分片, 起始位置按进程标识错开以减少竞争
+        offset = zlib.crc32(self.worker_id.encode()) % self.shards
+        for index in range(self.shards):
+            if len(self._consumers) >= target:
+                break
+            shard = (offset + index) % self.shards
+            if shard in self._consumers:
+                continue
+            acquired = await self.redis.set(
+                RedisKeys.SHARD_LEASE.format(shard=shard),
+                self.worker_id,
+                nx=True,
+                px=self.lease_ms,
+            )
+            if acquired:
+                consumer = CompletionConsumer(
+                    RedisKeys.COMPLETION_STREAM.format(shard=shard),
+                    handler=self.handler,
+                    **self.consumer_options,
+                )
+                await consumer.start(self.redis)
+                self._consumers[shard] = consumer
+
+    async def _release(self, shard: int):
+        consumer = self._consumers.pop(shard)
+        await consumer.stop()
+        await self._release_script(
+            keys=[RedisKeys.SHARD_LEASE.format(shard=shard)], args=[self.worker_id]
+        )
+
+    async def task_owner(self, task_uid: str) -> Optional[str]:
+        """当前持有任务流所属分片租约的进程标识"""
+        shard = CompletionStreamService.shard_of(task_uid, self.shards)
+        return await self.redis.get(RedisKeys.SHARD_LEASE.format(shard=shard))
+
+    def metrics(self) -> dict:
+        """工作者运行指标"""
+        return {
+            "running": self.running,
+            "worker": self.worker_id,
+            "shards": self.shards,
+            "owned_shards": sorted(self._consumers),
+            "consumers": [consumer.metrics() for consumer in self._consumers.values()],
+        }
+
+
+# 全局分片调度工作者
+completion_worker = ShardedCompletionWorker()
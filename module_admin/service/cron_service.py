@@ -0,0 +1,440 @@
+import asyncio
+import heapq
+import itertools
+import re
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from apscheduler.triggers.cron import CronTrigger
+from redis.asyncio import Redis as asyncio_redis
+from config.database import AsyncSessionLocal
+from config.env import SchedulerConfig
+from exceptions.exception import ServiceException
+from module_admin.dao.task_dao import TaskDao
+from module_admin.entity.vo.task_vo import TaskModel
+from module_admin.service.job_service import RedisKeys, TaskSchedulerService
+from module_admin.service.leader_service import FENCED_HSET, LeaderElection
+from utils.common_util import SnakeCaseUtil
+from utils.log_util import logger
+
+
+# Quartz星期字段1-7对应周日到周六, 标准crontab中0和7均为周日;
+# APScheduler的数字星期从周一(0)开始, 统一转换为英文缩写避免歧义
+QUARTZ_WEEKDAYS = {"1": "sun", "2": "mon", "3": "tue", "4": "wed", "5": "thu", "6": "fri", "7": "sat"}
+CRONTAB_WEEKDAYS = {"0": "sun", "1": "mon", "2": "tue", "3": "wed", "4": "thu", "5": "fri", "6": "sat", "7": "sun"}
+ORDINALS = {"1": "1st", "2": "2nd", "3": "3rd", "4": "4th", "5": "5th"}
+
+
+def _convert_weekday(field: str, names: Dict[str, str]) -> str:
+    """
+    星期字段转换为英文缩写列表
+    范围与步长按原格式的数字顺序(周日在前)展开, 避免以周日开头的范围(如0-6、SUN-SAT)
+    在APScheduler(周一在前)中变为首大于尾的非法范围; 首大于尾的范围视为跨周
+
+    :param field: 星期字段
+    :param names: 数字 -> 英文缩写
+    :return: 逗号分隔的英文缩写, 字段为*时原样返回
+    :raises ValueError: 字段包含无法识别的星期或步长
+    """
+    numbers: Dict[str, int] = {}
+    for number, name in names.items():
+        numbers.setdefault(name, int(number))
+    low = min(numbers.values())
+
+    def parse(bound: str) -> int:
+        if bound in names:
+            return int(bound)
+        if bound in numbers:
+            return numbers[bound]
+        raise ValueError(f"星期字段不正确: {field}")
+
+    weekdays: List[str] = []
+    for part in field.split(","):
+        expression, _, step = part.partition("/")
+        if expression == "*" and not step:
+            return "*"
+        if step and (not step.isdigit() or step == "0"):
+            raise ValueError(f"星期字段步长不正确: {field}")
+        if expression == "*":
+            start, end = low, low + 6
+        elif "-" in expression:
+            start, end = (parse(bound) for bound in expression.split("-", 1))
+        else:
+            start = parse(expression)
+            end = low + 6 if step else start
+        if end < start:
+            end += 7
+        for number in range(start, end + 1, int(step or 1)):
+            name = names[str(low + (number - low) % 7)]
+            if name not in weekdays:
+                weekdays.append(name)
+    return ",".join(weekdays)
+
+
+@lru_cache(maxsize=4096)
+def build_cron_trigger(cron_expression: str) -> CronTrigger:
+    """
+    将cron表达式转换为APScheduler的CronTrigger
+    支持Quartz格式(秒 分 时 日 月 周 [年], 日/周可使用?、L、nL、n#m)与标准5段crontab格式
+    CronTrigger无状态, 相同表达式的任务流共用同一个实例
+
+    :param cron_expression: cron表达式
+    :return: CronTrigger
+    :raises ValueError: 表达式格式不正确或包含不支持的语法
+    """
+    fields = (cron_expression or "").split()
+    if len(fields) == 5:
+        second, (minute, hour, day, month, day_of_week), year = "0", fields, None
+        names = CRONTAB_WEEKDAYS
+    elif len(fields) in (6, 7):
+        second, minute, hour, day, month, day_of_week = fields[:6]
+        year = fields[6] if len(fields) == 7 else None
+        names = QUARTZ_WEEKDAYS
+    else:
+        raise ValueError(f"cron表达式字段数量不正确: {cron_expression}")
+
+    day = "*" if day == "?" else day.lower()
+    day_of_week = "*" if day_of_week == "?" else day_of_week.lower()
+    if day == "l":
+        day = "last"
+    elif "w" in day:
+        raise ValueError(f"不支持的cron语法W: {cron_expression}")
+
+    # 每月最后一个星期n(nL)与第m个星期n(n#m)转换为APScheduler日字段表达式
+    special = re.fullmatch(r"(\w+?)(l|#([1-5]))", day_of_week)
+    if special:
+        weekday = names.get(special.group(1), special.group(1))
+        ordinal = ORDINALS[special.group(3)] if special.group(3) else "last"
+        day, day_of_week = f"{ordinal} {weekday}", "*"
+    else:
+        day_of_week = _convert_weekday(day_of_week, names)
+
+    return CronTrigger(
+        year=year,
+        month=month,
+        day=day,
+        day_of_week=day_of_week,
+        hour=hour,
+        minute=minute,
+        second=second,
+    )
+
+
+async def start_scheduled_task(redis: asyncio_redis, task_uid: str):
+    """默认的定时触发处理: 使用独立的数据库会话启动任务流的一次运行"""
+    async with AsyncSessionLocal() as db:
+        scheduler = TaskSchedulerService(redis, db)
+        task = await scheduler.load_task(task_uid)
+        if not task or task.status != "0":
+            return
+        try:
+            await scheduler.start_task(task)
+            await db.commit()
+        except ServiceException as e:
+            logger.warning(f"定时任务流{task_uid}本次触发被跳过: {e.message}")
+
+
+class CronEntry:
+    """调度表中的一个定时任务流"""
+
+    def __init__(self, task_uid: str, trigger: CronTrigger, misfire_policy: str, version: int):
+        self.task_uid = task_uid
+        self.trigger = trigger
+        self.misfire_policy = misfire_policy
+        self.version = version
+        self.next_fire_time: Optional[datetime] = None
+        # 连续补偿执行的次数, 用于限制立即执行策略的补偿上限
+        self.catchup = 0
+
+
+class CronEngine:
+    """
+    定时触发引擎
+    所有定时任务流的下一次触发时间保存在一个最小堆中, 调度协程只休眠到堆顶的触发时间,
+    与定时任务流数量无关; 任务流变更时旧的堆元素通过版本号惰性删除。
+    错过触发时间(超过容忍时间)时按misfire_policy处理:
+    1立即执行(补偿每一次错过的触发, 有上限) 2执行一次 3放弃执行;
+    最近一次触发时间保存在Redis中, 重启后据此识别停机期间错过的触发;
+    多副本部署时引擎只在当选的主节点上运行, 触发前以任期令牌校验写入最近触发时间,
+    已失去主节点身份的进程不会再启动任务流
+    """
+
+    def __init__(
+        self,
+        misfire_grace: float = SchedulerConfig.scheduler_cron_misfire_grace,
+        max_catchup: int = SchedulerConfig.scheduler_cron_max_catchup,
+        concurrency: int = SchedulerConfig.scheduler_cron_concurrency,
+        handler: Optional[Callable[[asyncio_redis, str], Awaitable]] = None,
+    ):
+        """
+        :param misfire_grace: 触发延迟的容忍时间(秒), 超过视为错过触发
+        :param max_catchup: 立即执行策略下连续补偿执行的最大次数
+        :param concurrency: 同时启动任务流的最大数量
+        :param handler: 触发处理协程函数, 默认启动任务流的一次运行
+        """
+        self.misfire_grace = misfire_grace
+        self.max_catchup = max_catchup
+        self.concurrency = concurrency
+        self.handler = handler or start_scheduled_task
+        self.redis: Optional[asyncio_redis] = None
+        self.fencing_token: Optional[int] = None
+        self._entries: Dict[str, CronEntry] = {}
+        self._heap: List[Tuple[float, int, str, int]] = []
+        self._sequence = itertools.count()
+        self._versions = itertools.count(1)
+        self._wakeup = asyncio.Event()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._listener_task: Optional[asyncio.Task] = None
+        self._firing: Set[asyncio.Task] = set()
+        self._fired_total = 0
+        self._misfired_total = 0
+
+    @property
+    def running(self) -> bool:
+        return self._loop_task is not None and not self._loop_task.done()
+
+    async def start(self, redis: asyncio_redis, fencing_token: Optional[int] = None):
+        """
+        加载所有启用的定时任务流并启动调度协程与变更监听协程
+        :param fencing_token: 主节点任期令牌, 为空时不做校验(单副本部署)
+        """
+        if self.running:
+            return
+        self.redis = redis
+        self.fencing_token = fencing_token
+        self._fenced_hset = redis.register_script(FENCED_HSET)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        await self.reload()
+        self._loop_task = asyncio.create_task(self._run())
+        self._listener_task = asyncio.create_task(self._listen())
+        logger.info(
+            f"定时触发引擎启动, 定时任务流数量: {len(self._entries)}, token={fencing_token}"
+        )
+
+    async def stop(self):
+        """停止调度, 等待已触发的任务流启动完成"""
+        for task in (self._loop_task, self._listener_task):
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(
+            *(task for task in (self._loop_task, self._listener_task) if task is not None),
+            return_exceptions=True,
+        )
+        self._loop_task = self._listener_task = None
+        if self._firing:
+            await asyncio.gather(*self._firing, return_exceptions=True)
+        self._entries.clear()
+        self._heap.clear()
+        logger.info("定时触发引擎已关闭")
+
+    async def reload(self):
+        """从数据库全量加载启用的定时任务流, 并从Redis恢复最近一次触发时间"""
+        async with AsyncSessionLocal() as db:
+            tasks = await TaskDao.get_job_list_for_scheduler(db)
+        last_fires = await self.redis.hgetall(RedisKeys.CRON_LAST_FIRE)
+        self._entries.clear()
+        self._heap.clear()
+        for index, task in enumerate(tasks, 1):
+            task_model = TaskModel.model_construct(**SnakeCaseUtil.transform_result(task))
+            last_fire = last_fires.get(task_model.task_uid)
+            self.upsert(task_model, float(last_fire) if last_fire else None)
+            if index % 1000 == 0:
+                await asyncio.sleep(0)  # 大量任务流加载时让出事件循环
+
+    def upsert(self, task: TaskModel, last_fire: Optional[float] = None):
+        """
+        新增或更新定时任务流, 未启用或没有cron表达式的任务流从调度表移除
+        :param task: 任务流
+        :param last_fire: 最近一次触发时间戳, 用于识别错过的触发; 为空时从当前时间开始调度
+        """
+        self.remove(task.task_uid)
+        if task.status != "0" or not task.cron_expression:
+            return
+        try:
+            trigger = build_cron_trigger(task.cron_expression)
+        except ValueError as e:
+            logger.error(f"定时任务流{task.task_uid}的cron表达式无效: {e}")
+            return
+
+        entry = CronEntry(task.task_uid, trigger, task.misfire_policy, next(self._versions))
+        if last_fire is not None:
+            previous = datetime.fromtimestamp(last_fire, trigger.timezone)
+            next_fire_time = trigger.get_next_fire_time(previous, previous)
+        else:
+            next_fire_time = trigger.get_next_fire_time(None, datetime.now(trigger.timezone))
+        self._entries[task.task_uid] = entry
+        self._push(entry, next_fire_time)
+
+    def remove(self, task_uid: str):
+        """从调度表移除定时任务流, 堆中的旧元素在出堆时按版本号丢弃"""
+        self._entries.pop(task_uid, None)
+
+    def _push(self, entry: CronEntry, next_fire_time: Optional[datetime]):
+        entry.next_fire_time = next_fire_time
+        if next_fire_time is None:
+            # 触发器已不会再触发(如指定的年份已过)
+            self._entries.pop(entry.task_uid, None)
+            return
+        heapq.heappush(
+            self._heap,
+            (next_fire_time.timestamp(), next(self._sequence), entry.task_uid, entry.version),
+        )
+        # 频繁更新任务流会积累失效的堆元素, 超过有效元素数量一倍时重建堆
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [
+                item
+                for item in self._heap
+                if (current := self._entries.get(item[2])) and current.version == item[3]
+            ]
+            heapq.heapify(self._heap)
+        if self._heap[0][3] == entry.version:
+            self._wakeup.set()
+
+    async def _run(self):
+        """调度协程: 休眠到堆顶的触发时间或被新的更早触发唤醒"""
+        while True:
+            self._wakeup.clear()
+            timeout = self._heap[0][0] - time.time() if self._heap else None
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, task_uid, version = heapq.heappop(self._heap)
+            entry = self._entries.get(task_uid)
+            if entry is None or entry.version != version:
+                continue
+            try:
+                self._on_due(entry)
+            except Exception as e:
+                logger.error(f"定时任务流{task_uid}调度失败: {e}")
+                self._entries.pop(task_uid, None)
+
+    def _on_due(self, entry: CronEntry):
+        """到达触发时间, 按错过触发策略决定是否触发并计算下一次触发时间"""
+        fire_time = entry.next_fire_time
+        now = datetime.now(entry.trigger.timezone)
+        late = (now - fire_time).total_seconds() > self.misfire_grace
+        catch_up = entry.misfire_policy == "1" and entry.catchup < self.max_catchup
+        if late:
+            self._misfired_total += 1
+
+        # 按时触发总是执行; 错过触发时立即执行策略逐次补偿, 执行一次策略只补偿一次, 放弃执行策略不补偿
+        if not late or catch_up or entry.misfire_policy == "2":
+            self._fire(entry, fire_time)
+        else:
+            self._record(entry.task_uid, fire_time)
+
+        if catch_up:
+            # 立即执行: 下一次触发紧接本次计划时间, 错过的触发会依次到期
+            entry.catchup = entry.catchup + 1 if late else 0
+            next_fire_time = entry.trigger.get_next_fire_time(fire_time, fire_time)
+        else:
+            # 其他策略及补偿次数用尽时跳到当前时间之后的下一次触发
+            entry.catchup = 0
+            next_fire_time = entry.trigger.get_next_fire_time(
+                None, max(now, fire_time + timedelta(microseconds=1))
+            )
+        self._push(entry, next_fire_time)
+
+    def _fire(self, entry: CronEntry, fire_time: datetime):
+        self._fired_total += 1
+        task = asyncio.create_task(self._start(entry.task_uid, fire_time))
+        self._firing.add(task)
+        task.add_done_callback(self._firing.discard)
+
+    def _record(self, task_uid: str, fire_time: datetime):
+        """只记录已处理的触发时间, 不启动任务流"""
+        task = asyncio.create_task(self._mark_fired(task_uid, fire_time))
+        self._firing.add(task)
+        task.add_done_callback(self._firing.discard)
+
+    async def _mark_fired(self, task_uid: str, fire_time: datetime) -> bool:
+        """记录最近一次触发时间, 任期令牌已过期时拒绝写入并返回False"""
+        if self.fencing_token is None:
+            await self.redis.hset(RedisKeys.CRON_LAST_FIRE, task_uid, fire_time.timestamp())
+            return True
+        return bool(
+            await self._fenced_hset(
+                keys=[RedisKeys.SCHEDULER_LEADER_INFO, RedisKeys.CRON_LAST_FIRE],
+                args=[self.fencing_token, task_uid, fire_time.timestamp()],
+            )
+        )
+
+    async def _start(self, task_uid: str, fire_time: datetime):
+        async with self._semaphore:
+            try:
+                if not await self._mark_fired(task_uid, fire_time):
+                    logger.warning(
+                        f"主节点任期已过期(token={self.fencing_token}), 放弃触发定时任务流{task_uid}"
+                    )
+                    return
+                await self.handler(self.redis, task_uid)
+                logger.info(f"定时任务流{task_uid}已触发, 计划时间: {fire_time}")
+            except Exception as e:
+                logger.error(f"定时任务流{task_uid}触发失败: {e}")
+
+    async def _listen(self):
+        """监听任务流变更通知, 增量更新调度表"""
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(RedisKeys.CRON_RELOAD_CHANNEL)
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                try:
+                    await self._reload_task(message["data"])
+                except Exception as e:
+                    logger.error(f"定时任务流{message['data']}重新加载失败: {e}")
+        finally:
+            await pubsub.aclose()
+
+    async def _reload_task(self, task_uid: str):
+        async with AsyncSessionLocal() as db:
+            task = await TaskDao.get_task_detail_by_uid(db, task_uid=task_uid)
+        if task:
+            self.upsert(TaskModel.model_construct(**SnakeCaseUtil.transform_result(task)))
+        else:
+            self.remove(task_uid)
+            await self.redis.hdel(RedisKeys.CRON_LAST_FIRE, task_uid)
+
+    @staticmethod
+    async def notify_change(redis: asyncio_redis, task_uid: str):
+        """通知所有进程中的触发引擎重新加载指定任务流"""
+        await redis.publish(RedisKeys.CRON_RELOAD_CHANNEL, task_uid)
+
+    def metrics(self) -> dict:
+        """触发引擎运行指标"""
+        next_fire = min(
+            (entry.next_fire_time for entry in self._entries.values() if entry.next_fire_time),
+            default=None,
+        )
+        return {
+            "running": self.running,
+            "fencing_token": self.fencing_token,
+            "scheduled": len(self._entries),
+            "heap_size": len(self._heap),
+            "next_fire_time": next_fire.isoformat() if next_fire else None,
+            "fired_total": self._fired_total,
+            "misfired_total": self._misfired_total,
+        }
+
+
+# 全局定时触发引擎
+cron_engine = CronEngine()
+
+
+async def _on_cron_elected(redis: asyncio_redis, token: int):
+    await cron_engine.start(redis, fencing_token=token)
+
+
+async def _on_cron_revoked(redis: asyncio_redis):
+    await cron_engine.stop()
+
+
+# 定时触发主节点选举: 只有当选的进程运行定时触发引擎
+cron_leader = LeaderElection(on_elected=_on_cron_elected, on_revoked=_on_cron_revoked)
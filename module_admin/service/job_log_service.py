@@ -1,7 +1,15 @@
+import asyncio
+import time
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from typing import Awaitable, Callable, List, Optional
+from config.database import AsyncSessionLocal
+from config.env import SchedulerConfig
 from module_admin.entity.vo.common_vo import CrudResponseModel
 from module_admin.entity.vo.task_vo import JobLogModel
 from module_admin.dao.job_log_dao import JobLogDao
+from module_admin.dao.job_run_dao import JobRunDao
+from utils.log_util import logger
 
 
 class JobLogService:
@@ -26,4 +34,169 @@ class JobLogService:
             query_db.rollback()
             result = dict(is_success=False, message=str(e))
 
-        return CrudResponseModel(**result)
\ No newline at end of file
+        return CrudResponseModel(**result)
+
+class JobLogBuffer:
+    """
+    任务日志写后缓冲
+    调度流程只把日志放入内存队列, 后台协程按批量大小或时间间隔批量写入数据库,
+    调度决策不再等待审计日志的数据库I/O;
+    写入失败时按指数退避重试同一批日志, 重试期间新日志继续在队列中累积, 队列满后写入方等待,
+    内存占用不超过队列容量加一批; 只有关闭时仍无法写入的日志才会被丢弃;
+    写入函数可替换, 任务完成检查点记录也通过同样的缓冲批量写入
+    """
+
+    def __init__(
+        self,
+        batch_size: int = SchedulerConfig.scheduler_log_batch_size,
+        flush_interval: float = SchedulerConfig.scheduler_log_flush_interval,
+        max_queue: int = SchedulerConfig.scheduler_log_max_queue,
+        retry_backoff: float = SchedulerConfig.scheduler_log_retry_backoff,
+        retry_max_backoff: float = SchedulerConfig.scheduler_log_retry_max_backoff,
+        writer: Callable[[AsyncSession, List], Awaitable] = JobLogDao.add_job_logs_bulk_dao,
+        name: str = "任务日志",
+    ):
+        """
+        :param batch_size: 单次写入的最大日志条数
+        :param flush_interval: 最长攒批时间(秒)
+        :param max_queue: 队列容量上限, 队列已满时写入方等待(背压)
+        :param retry_backoff: 写入失败后的首次重试等待时间(秒), 之后每次翻倍
+        :param retry_max_backoff: 重试等待时间上限(秒)
+        :param writer: 批量写入函数
+        :param name: 缓冲名称, 用于日志输出
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.retry_backoff = retry_backoff
+        self.retry_max_backoff = retry_max_backoff
+        self.writer = writer
+        self.name = name
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._flush_count = 0
+        self._flushed_total = 0
+        self._retry_count = 0
+        self._dropped_total = 0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    async def start(self):
+        """启动后台写入协程"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._stopping = asyncio.Event()
+        self._worker = asyncio.create_task(self._run())
+        logger.info(
+            f"{self.name}写后缓冲启动, batch_size={self.batch_size}, "
+            f"flush_interval={self.flush_interval}s, max_queue={self.max_queue}"
+        )
+
+    async def stop(self):
+        """停止后台写入协程, 并写入队列中剩余的全部日志"""
+        if not self.running:
+            return
+        # 唤醒正在等待重试的写入协程, 之后写入失败的日志直接丢弃, 避免关闭被阻塞
+        self._stopping.set()
+        await self._queue.put(None)
+        await self._worker
+        logger.info(f"{self.name}写后缓冲已关闭, 累计写入{self._flushed_total}条")
+
+    async def put(self, logs: List[JobLogModel]):
+        """日志入队"""
+        for log in logs:
+            await self._queue.put(log)
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._collect()
+            if batch:
+                await self._flush(batch)
+
+    async def _collect(self):
+        """攒批: 凑满batch_size或等待超过flush_interval即返回"""
+        loop = asyncio.get_running_loop()
+        batch = []
+        item = await self._queue.get()
+        deadline = loop.time() + self.flush_interval
+        while item is not None:
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                return batch, False
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                return batch, False
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                return batch, False
+        # 收到停止信号, 剩余日志在退出前全部写入
+        while not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch, True
+
+    async def _flush(self, batch: List[JobLogModel]):
+        start = time.perf_counter()
+        for offset in range(0, len(batch), self.batch_size):
+            await self._write(batch[offset : offset + self.batch_size])
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._flush_count += 1
+        self._last_flush_ms = elapsed_ms
+        self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+        self._total_flush_ms += elapsed_ms
+
+    async def _write(self, chunk: List[JobLogModel]):
+        """写入一批日志, 失败时按指数退避重试直到成功或开始关闭"""
+        delay = self.retry_backoff
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self.writer(db, chunk)
+                    await db.commit()
+                self._flushed_total += len(chunk)
+                return
+            except Exception as e:
+                if self._stopping.is_set():
+                    self._dropped_total += len(chunk)
+                    logger.error(f"{self.name}批量写入失败, 关闭中丢弃{len(chunk)}条: {e}")
+                    return
+                self._retry_count += 1
+                logger.warning(f"{self.name}批量写入失败, {delay:g}秒后重试{len(chunk)}条: {e}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, self.retry_max_backoff)
+
+    def metrics(self) -> dict:
+        """缓冲区运行指标"""
+        return {
+            "running": self.running,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queue": self.max_queue,
+            "flush_count": self._flush_count,
+            "flushed_total": self._flushed_total,
+            "retry_count": self._retry_count,
+            "dropped_total": self._dropped_total,
+            "last_flush_ms": round(self._last_flush_ms, 3),
+            "max_flush_ms": round(self._max_flush_ms, 3),
+            "avg_flush_ms": (
+                round(self._total_flush_ms / self._flush_count, 3)
+                if self._flush_count
+                else 0.0
+            ),
+        }
+
+
+# 全局任务日志缓冲
+job_log_buffer = JobLogBuffer()
+# 全局任务完成检查点缓冲
+job_run_buffer = JobLogBuffer(writer=JobRunDao.add_job_runs_bulk_dao, name="任务完成检查点")
@@ -1,26 +1,41 @@
+import hashlib
 import json
+import time
+import uuid
+import zlib
+from collections import OrderedDict
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # from module_admin.dao.task_dao import JobDao
 from module_admin.entity.vo.task_vo import (
+    JobDispatchModel,
     JobExecuteModel,
+    JobModel,
     TaskModel,
     JobExecuteResponseModel,
     TaskProgressModel,
     JobSchedulerModel,
     JobLogModel,
+    JobRunModel,
+    ExecutionPlanModel,
 )
+from pydantic import BaseModel
 from redis.asyncio import Redis as asyncio_redis
+from redis.client import NEVER_DECODE
+from redis.exceptions import ResponseError
 from module_admin.dao.task_dao import TaskDao
 from module_admin.dao.job_log_dao import JobLogDao
-import httpx
+from module_admin.dao.job_run_dao import JobRunDao
+from module_admin.service.job_log_service import job_log_buffer, job_run_buffer
 import asyncio
-from typing import List, Optional, Dict
+from typing import AbstractSet, Any, List, Optional, Dict, Set, Tuple
 from datetime import datetime
 from utils.log_util import logger
-import aiohttp
-from config.env import OperatorConfig
+from module_admin.service.transport_service import TransportError, create_transport
+from config.env import OperatorConfig, SchedulerConfig
+from exceptions.exception import ServiceException
+from utils.common_util import SnakeCaseUtil
 
 
 # 定义常量管理Redis键名
@@ -28,8 +43,349 @@ class RedisKeys:
     JOB_PARAM = "job_param:{job_uid}"
     DEP_COUNT = "dep_count:{job_uid}"
     DEPS = "deps:{job_uid}"
-    TASK_PROGRESS = "task_progress:{task_uid}"
-    READY_JOBS = "ready_job"
+    # 编译后的执行计划, 以task_yaml内容哈希为键
+    TASK_PLAN = "task_plan:{plan_hash}"
+    # 一次运行的任务完成检查点(位图, 第i位对应执行计划中下标为i的任务), 用于失败或停止后断点恢复
+    TASK_CHECKPOINT = "task_checkpoint:{task_uid}:{plan_hash}:{run_id}"
+    # 任务流最近一次启动的运行ID, 断点恢复从该运行的检查点继续
+    TASK_CHECKPOINT_RUN = "task_checkpoint_run:{task_uid}"
+    # 任务结果缓存与其最近使用时间(有序集合, 成员为缓存键, 分值为最近使用时间戳毫秒)
+    JOB_RESULT = "job_result:{cache_key}"
+    JOB_RESULT_LRU = "job_result_lru"
+    # 任务流的每次运行使用独立的运行UID(任务流UID@运行ID), 进度与就绪队列按运行隔离;
+    # 升级前未区分运行的数据, 其运行UID即任务流UID
+    TASK_PROGRESS = "task_progress:{run_uid}"
+    # 每次运行一个就绪队列(有序集合, 分值越小越先被调度),
+    # READY_TASKS为有就绪任务的运行索引, 分值为该运行就绪队列中的最小分值
+    READY_JOBS = "ready_job:{run_uid}"
+    READY_TASKS = "ready_tasks"
+    # 任务流的活跃运行集合、禁止并发时的运行锁与排队等待的启动请求
+    TASK_RUNS = "task_runs:{task_uid}"
+    TASK_LOCK = "task_lock:{task_uid}"
+    TASK_PENDING_RUNS = "task_pending_runs:{task_uid}"
+    # 并发槽位: 执行器/参与方各一个有序集合, 成员为占用槽位的任务uid, 分值为占用时间;
+    # SLOTS_HELD记录任务占用的槽位键, 用于释放; 槽位键加":waiting:{shard}"后缀为因该槽位已满而等待的、
+    # 属于该分片的运行UID集合, 槽位释放时只唤醒处理进程持有分片中的这些运行
+    SLOTS_PREFIX = "job_slots:"
+    EXECUTOR_SLOTS = SLOTS_PREFIX + "executor:{name}"
+    PARTY_SLOTS = SLOTS_PREFIX + "party:{name}"
+    SLOTS_HELD = SLOTS_PREFIX + "held:{job_uid}"
+    # 等待重试的任务(有序集合, 分值为重试时间戳毫秒), 由调度定时器到期后放回就绪队列
+    DELAYED_JOBS = "delayed_job"
+    # 已下发等待完成回调的任务(有序集合, 分值为超时时间戳毫秒), 按任务流分片,
+    # 由持有该分片的进程的调度定时器扫描超时任务
+    DISPATCHED_JOBS = "job_dispatched:{shard}"
+    # 升级前的全局就绪队列, 仅用于兼容
+    LEGACY_READY_JOBS = "ready_job"
+    # 定时任务流最近一次触发时间(哈希, 任务流UID -> 时间戳)与变更通知频道
+    CRON_LAST_FIRE = "cron:last_fire"
+    CRON_RELOAD_CHANNEL = "cron:reload"
+    COMPLETION_STREAM = "job_completed_stream:{shard}"
+    COMPLETION_DEAD_STREAM = "job_completed_stream:dead"
+    SHARD_LEASE = "scheduler:shard_lease:{shard}"
+    SCHEDULER_WORKERS = "scheduler:workers"
+    # 定时触发主节点租约、单调递增的任期令牌(fencing token)与当前主节点信息(哈希)
+    SCHEDULER_LEADER = "scheduler:leader"
+    SCHEDULER_LEADER_TOKEN = "scheduler:leader:token"
+    SCHEDULER_LEADER_INFO = "scheduler:leader:info"
+
+
+# 服务端Lua脚本, 保证多步操作的原子性并减少往返次数
+class RedisScripts:
+    # 任务完成后的依赖扇出:
+    # 递减所有下游任务的依赖计数器, 将归零的任务按调度分值加入任务流就绪队列并返回;
+    # 任务参数中的completed字段保证同一任务只扇出一次, 重复投递的完成事件不会重复递减;
+    # 任务参数仍是旧版JSON字符串时脚本报错而不是跳过检查, 读取时转换为哈希后重新投递的事件再处理
+    # KEYS[1]: 完成任务的反向依赖列表 KEYS[2]: 任务流就绪队列 KEYS[3]: 就绪任务流索引
+    # KEYS[4]: 完成任务的任务参数
+    # ARGV[1]: 依赖计数器键名前缀 ARGV[2]: 就绪队列过期时间(秒) ARGV[3]: 调度分值
+    # ARGV[4]: 任务流uid
+    COMPLETE_JOB = """
+if redis.call('EXISTS', KEYS[4]) == 0 or redis.call('HSETNX', KEYS[4], 'completed', '1') == 0 then
+    return {}
+end
+local dependents
+local key_type = redis.call('TYPE', KEYS[1]).ok
+if key_type == 'set' then
+    dependents = redis.call('SMEMBERS', KEYS[1])
+elseif key_type == 'string' then
+    dependents = cjson.decode(redis.call('GET', KEYS[1]))
+else
+    return {}
+end
+local ready = {}
+for _, job_uid in ipairs(dependents) do
+    if redis.call('DECR', ARGV[1] .. job_uid) == 0 then
+        redis.call('ZADD', KEYS[2], ARGV[3], job_uid)
+        table.insert(ready, job_uid)
+    end
+end
+if #ready > 0 then
+    redis.call('EXPIRE', KEYS[2], ARGV[2])
+    redis.call('ZADD', KEYS[3], 'LT', ARGV[3], ARGV[4])
+end
+return ready
+"""
+
+    # 按分值顺序从任务流就绪队列取出一批任务, 并同步维护就绪任务流索引
+    # 配置了并发限制时, 只取出执行器与所有参与方均有空闲槽位的任务并占用槽位,
+    # 其余任务保留在队列中且分值不变, 运行登记为等待已满的槽位, 待槽位释放后再调度
+    # KEYS[1]: 任务流就绪队列 KEYS[2]: 就绪任务流索引
+    # ARGV[1]: 最多取出数量 ARGV[2]: 任务流uid ARGV[3]: 任务参数键名前缀
+    # ARGV[4]: 槽位键名前缀 ARGV[5]: 并发限制(JSON, 为空表示不限制)
+    # ARGV[6]: 当前时间(毫秒) ARGV[7]: 槽位过期时间(毫秒) ARGV[8]: 任务流所属分片
+    POP_READY_JOBS = """
+local count = tonumber(ARGV[1])
+local job_uids = {}
+if ARGV[5] == '' then
+    local popped = redis.call('ZPOPMIN', KEYS[1], count)
+    for i = 1, #popped, 2 do
+        table.insert(job_uids, popped[i])
+    end
+else
+    local limits = cjson.decode(ARGV[5])
+    local now = tonumber(ARGV[6])
+    local ttl = tonumber(ARGV[7])
+    local function decode(value)
+        if not value then
+            return nil
+        end
+        local ok, decoded = pcall(cjson.decode, value)
+        if ok and type(decoded) == 'string' then
+            return decoded
+        end
+        return nil
+    end
+    local candidates = redis.call('ZRANGE', KEYS[1], 0, limits.scan - 1)
+    for _, job_uid in ipairs(candidates) do
+        if #job_uids >= count then
+            break
+        end
+        local slots = {}
+        local fields = redis.pcall('HMGET', ARGV[3] .. job_uid, 'job_executor', 'job_parties')
+        if not fields.err then
+            local executor = decode(fields[1])
+            if executor and limits.executor[executor] then
+                table.insert(slots, {ARGV[4] .. 'executor:' .. executor, limits.executor[executor]})
+            end
+            local parties = decode(fields[2])
+            local ok, party_list = pcall(cjson.decode, parties or '[]')
+            if ok and type(party_list) == 'table' then
+                for _, party in ipairs(party_list) do
+                    local limit = limits.party[party] or limits.party_default
+                    if limit and limit > 0 then
+                        table.insert(slots, {ARGV[4] .. 'party:' .. party, limit})
+                    end
+                end
+            end
+        end
+        local admitted = true
+        for _, slot in ipairs(slots) do
+            redis.call('ZREMRANGEBYSCORE', slot[1], '-inf', now - ttl)
+            if not redis.call('ZSCORE', slot[1], job_uid)
+                and redis.call('ZCARD', slot[1]) >= slot[2] then
+                admitted = false
+                local waiting = slot[1] .. ':waiting:' .. ARGV[8]
+                redis.call('SADD', waiting, ARGV[2])
+                redis.call('PEXPIRE', waiting, ttl)
+                break
+            end
+        end
+        if admitted then
+            local held = ARGV[4] .. 'held:' .. job_uid
+            for _, slot in ipairs(slots) do
+                redis.call('ZADD', slot[1], now, job_uid)
+                redis.call('SADD', held, slot[1])
+            end
+            if #slots > 0 then
+                redis.call('PEXPIRE', held, ttl)
+            end
+            redis.call('ZREM', KEYS[1], job_uid)
+            table.insert(job_uids, job_uid)
+        end
+    end
+end
+local head = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+if #head == 0 then
+    redis.call('ZREM', KEYS[2], ARGV[2])
+else
+    redis.call('ZADD', KEYS[2], head[2], ARGV[2])
+end
+return job_uids
+"""
+
+    # 释放任务流运行锁, 仅当锁仍由该运行持有时删除
+    # KEYS[1]: 运行锁 ARGV[1]: 运行UID
+    RELEASE_TASK_LOCK = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+    # 运行锁空闲时取出一个排队的启动请求
+    # KEYS[1]: 运行锁 KEYS[2]: 排队的启动请求列表
+    # 返回1表示应启动一次新的运行
+    POP_PENDING_RUN = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+if redis.call('LPOP', KEYS[2]) then
+    return 1
+end
+return 0
+"""
+
+    # 释放任务占用的全部并发槽位, 并取出指定分片中等待这些槽位的运行
+    # KEYS[1]: 任务占用的槽位键集合 ARGV[1]: 任务uid ARGV[2...]: 唤醒等待运行的分片, 为空时不唤醒
+    # 返回等待被释放槽位的运行UID列表(可能重复)
+    RELEASE_SLOTS = """
+local slots = redis.call('SMEMBERS', KEYS[1])
+local waiting = {}
+for _, slot in ipairs(slots) do
+    redis.call('ZREM', slot, ARGV[1])
+    for i = 2, #ARGV do
+        local waiting_key = slot .. ':waiting:' .. ARGV[i]
+        for _, run_uid in ipairs(redis.call('SMEMBERS', waiting_key)) do
+            table.insert(waiting, run_uid)
+        end
+        redis.call('DEL', waiting_key)
+    end
+end
+redis.call('DEL', KEYS[1])
+return waiting
+"""
+
+    # 原子地增加任务流完成计数, 并对数据库进度写入做防抖:
+    # 距上次写入超过最小间隔或进度变化超过阈值时才返回需要写库;
+    # 任务参数中的counted字段保证同一任务只计数一次, 重复时只返回当前计数;
+    # 进度或任务参数仍是旧版JSON字符串时报WRONGTYPE错误, 由调用方转换为哈希后重试
+    # KEYS[1]: 任务流进度哈希 KEYS[2]: 完成任务的任务参数
+    # ARGV[1]: 当前时间(毫秒) ARGV[2]: 最小写库间隔(毫秒) ARGV[3]: 最小进度变化
+    # 返回 {完成数量, 任务总数, 是否写库(0/1)}, 进度不存在时返回空
+    INCR_PROGRESS = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return nil
+end
+local task_len = tonumber(redis.call('HGET', KEYS[1], 'task_len'))
+if redis.call('EXISTS', KEYS[2]) == 0 or redis.call('HSETNX', KEYS[2], 'counted', '1') == 0 then
+    return {tonumber(redis.call('HGET', KEYS[1], 'task_completed') or '0'), task_len, 0}
+end
+local completed = redis.call('HINCRBY', KEYS[1], 'task_completed', 1)
+local db_progress = tonumber(redis.call('HGET', KEYS[1], 'db_progress') or '0')
+local db_time = tonumber(redis.call('HGET', KEYS[1], 'db_time') or '0')
+local now = tonumber(ARGV[1])
+local flush = 0
+if task_len and task_len > 0 and (
+    now - db_time >= tonumber(ARGV[2])
+    or completed / task_len - db_progress >= tonumber(ARGV[3])
+) then
+    flush = 1
+    redis.call('HSET', KEYS[1], 'db_progress', tostring(completed / task_len), 'db_time', ARGV[1])
+end
+return {completed, task_len, flush}
+"""
+
+    # 认领一次派发的执行结果: 事件的派发令牌必须是任务当前的派发令牌, 同一次派发只接受一种结果;
+    # 相同结果的重复事件可再次认领, 以补完中途失败的处理步骤
+    # KEYS[1]: 任务参数 ARGV[1]: 派发令牌 ARGV[2]: 结果(1成功 0失败)
+    # 返回1表示应处理该事件, 0表示事件属于已结束的派发或与已认领的结果冲突
+    CLAIM_OUTCOME = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local current = redis.call('HGET', KEYS[1], 'dispatch')
+if (tonumber(current) or 0) ~= tonumber(ARGV[1]) then
+    return 0
+end
+if redis.call('HGET', KEYS[1], 'finished') == ARGV[1]
+    and redis.call('HGET', KEYS[1], 'succeeded') ~= ARGV[2] then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'finished', ARGV[1], 'succeeded', ARGV[2])
+return 1
+"""
+
+    # 安排失败任务的延迟重试, 同一次派发只安排一次
+    # KEYS[1]: 任务参数 KEYS[2]: 等待重试队列
+    # ARGV[1]: 派发令牌 ARGV[2]: 重试时间戳(毫秒) ARGV[3]: 任务uid
+    # 返回已重试的次数(含本次)
+    SCHEDULE_RETRY = """
+if redis.call('HGET', KEYS[1], 'retry_token') ~= ARGV[1] then
+    redis.call('HSET', KEYS[1], 'retry_token', ARGV[1])
+    redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+    redis.call('ZADD', KEYS[2], ARGV[2], ARGV[3])
+end
+return tonumber(redis.call('HGET', KEYS[1], 'attempts'))
+"""
+
+    # 将升级前整体JSON字符串格式的键原地转换为哈希(每个字段单独JSON序列化), 保留过期时间;
+    # 仅当键仍是读取到的字符串时转换, 并发转换只生效一次
+    # KEYS[1]: 键 ARGV[1]: 读取到的JSON字符串 ARGV[2...]: 字段名与已编码的字段值交替
+    MIGRATE_LEGACY_HASH = """
+if redis.call('TYPE', KEYS[1]).ok ~= 'string' or redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+local ttl = redis.call('PTTL', KEYS[1])
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+if ttl > 0 then
+    redis.call('PEXPIRE', KEYS[1], ttl)
+end
+return 1
+"""
+
+    # 取出到期的等待重试任务
+    # KEYS[1]: 等待重试队列 ARGV[1]: 当前时间戳(毫秒) ARGV[2]: 最大数量
+    POP_DUE_JOBS = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #due > 0 then
+    redis.call('ZREM', KEYS[1], unpack(due))
+end
+return due
+"""
+
+    # 取出超时的已下发任务, 超时时间顺延到重新检查的时间而不是移除:
+    # 超时记录在完成事件处理时才移除, 失败事件发布前进程退出的任务由之后的扫描重新取出
+    # KEYS[1]: 已下发任务 ARGV[1]: 当前时间戳(毫秒) ARGV[2]: 最大数量 ARGV[3]: 重新检查的时间戳(毫秒)
+    LEASE_DUE_JOBS = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, job_uid in ipairs(due) do
+    redis.call('ZADD', KEYS[1], ARGV[3], job_uid)
+end
+return due
+"""
+
+
+    # 批量查询结果缓存, 命中的条目刷新最近使用时间
+    # KEYS[1]: 最近使用时间 ARGV[1]: 结果缓存键前缀 ARGV[2]: 当前时间戳(毫秒) ARGV[3...]: 缓存键
+    LOOKUP_RESULTS = """
+local hits = {}
+for i = 3, #ARGV do
+    if redis.call('EXISTS', ARGV[1] .. ARGV[i]) == 1 then
+        redis.call('ZADD', KEYS[1], ARGV[2], ARGV[i])
+        hits[#hits + 1] = ARGV[i]
+    end
+end
+return hits
+"""
+
+    # 写入结果缓存, 清理已过期的条目并按最近使用时间淘汰超出容量的条目
+    # KEYS[1]: 最近使用时间 KEYS[2]: 结果缓存
+    # ARGV[1]: 缓存键 ARGV[2]: 缓存值 ARGV[3]: 缓存时间(秒) ARGV[4]: 当前时间戳(毫秒)
+    # ARGV[5]: 最大条目数 ARGV[6]: 结果缓存键前缀
+    STORE_RESULT = """
+redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3])
+redis.call('ZADD', KEYS[1], ARGV[4], ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', tonumber(ARGV[4]) - tonumber(ARGV[3]) * 1000)
+local overflow = redis.call('ZCARD', KEYS[1]) - tonumber(ARGV[5])
+if overflow > 0 then
+    local evicted = redis.call('ZPOPMIN', KEYS[1], overflow)
+    for i = 1, #evicted, 2 do
+        redis.call('DEL', ARGV[6] .. evicted[i])
+    end
+end
+"""
 
 
 class JobSchedulerService:
@@ -51,21 +407,32 @@ class JobSchedulerService:
         self,
         # base_url: str = "http://127.0.0.1:8088/dev-api",
         base_url: str = f"http://{OperatorConfig.operator_host}:{OperatorConfig.operator_port}",
-        timeout: float = 30.0,
-        max_retries: int = 3,
+        timeout: float = OperatorConfig.operator_timeout,
+        max_retries: int = OperatorConfig.operator_max_retries,
+        batch_max_jobs: int = OperatorConfig.operator_batch_max_jobs,
+        batch_max_bytes: int = OperatorConfig.operator_batch_max_bytes,
+        batch_concurrency: int = OperatorConfig.operator_batch_concurrency,
     ):
         """
         初始化异步任务客户端
         :param base_url: API服务地址
         :param timeout: 单次请求超时时间(秒)
         :param max_retries: 最大重试次数
+        :param batch_max_jobs: 每个派发请求的最大任务数
+        :param batch_max_bytes: 每个派发请求的最大请求体字节数
+        :param batch_concurrency: 同时发送的派发请求数
         """
         # 避免重复初始化
         if not self._initialized:
             self.base_url = base_url
             self.timeout = timeout
             self.max_retries = max_retries
-            # 不在初始化时创建客户端，而是在需要时延迟创建
+            self.batch_max_jobs = batch_max_jobs
+            self.batch_max_bytes = batch_max_bytes
+            self.batch_concurrency = batch_concurrency
+            self.transport = create_transport(
+                OperatorConfig.operator_transport, base_url, timeout
+            )
             self._initialized = True
 
             logger.info(f"初始化异步任务客户端完成, base_url={self.base_url}")
@@ -76,6 +443,15 @@ class JobSchedulerService:
     async def __aexit__(self, exc_type, exc, tb):
         return
 
+    async def start(self):
+        """创建派发传输的连接池等资源, 由FastAPI lifespan调用"""
+        await self.transport.start()
+
+    async def close(self):
+        """关闭连接池"""
+        await self.transport.close()
+        logger.info("关闭算子层连接池成功")
+
     async def _send_request(
         self, method: str, endpoint: str, params: Dict = None, json: List[Dict] = None
     ) -> List[JobExecuteResponseModel]:
@@ -83,56 +459,90 @@ class JobSchedulerService:
         logger.info(
             f"Sending request to {url} with \n params: {params} \n json: {json}"
         )
-        headers = {"Content-Type": "application/json"}
-
-        # 使用上下文管理器确保客户端会话正确关闭
-        async with aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=self.timeout),
-            connector=aiohttp.TCPConnector(limit=100),
-        ) as client:
-            """核心请求方法（含重试逻辑）"""
-            for attempt in range(self.max_retries):
-                try:
-                    # 使用 aiohttp 发送请求
-                    async with client.request(
-                        method=method,
-                        url=url,
-                        params=params,
-                        json=json,
-                        headers=headers,
-                    ) as response:
-                        # 检查响应状态
-                        response.raise_for_status()
-                        # 解析响应数据
-                        data = await response.json()
-                        return [
-                            JobExecuteResponseModel(**item) for item in data["data"]
-                        ]
-                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-                    logger.error(
-                        f"请求失败(尝试 {attempt + 1}/{self.max_retries}): {str(e)}"
-                    )
-                    logger.error(f"请求详情: method={method}, url={url}")
-                    logger.error(f"请求参数: params={params}, json={json}")
-                    if attempt == self.max_retries - 1:
-                        raise RuntimeError(f"API请求失败: {str(e)}") from e
-                    await asyncio.sleep(2**attempt)
+
+        # 核心请求方法（含重试逻辑）
+        for attempt in range(self.max_retries):
+            try:
+                data = await self.transport.request(
+                    method=method, endpoint=endpoint, params=params, json=json
+                )
+                return [JobExecuteResponseModel(**item) for item in data["data"]]
+            except TransportError as e:
+                logger.error(
+                    f"请求失败(尝试 {attempt + 1}/{self.max_retries}): {str(e)}"
+                )
+                logger.error(f"请求详情: method={method}, url={url}")
+                logger.error(f"请求参数: params={params}, json={json}")
+                if attempt == self.max_retries - 1:
+                    raise RuntimeError(f"API请求失败: {str(e)}") from e
+                await asyncio.sleep(2**attempt)
+
+    @staticmethod
+    def split_batches(
+        payloads: List[Dict], max_jobs: int, max_bytes: int
+    ) -> List[List[Dict]]:
+        """
+        按任务数和序列化后的字节数切分派发请求, 单个任务超过字节上限时单独成批
+        :param payloads: 任务请求体列表
+        :param max_jobs: 每批最大任务数
+        :param max_bytes: 每批最大字节数
+        :return: 批次列表
+        """
+        batches: List[List[Dict]] = []
+        batch: List[Dict] = []
+        batch_bytes = 2  # JSON数组的方括号
+        for payload in payloads:
+            size = len(json.dumps(payload, ensure_ascii=False).encode()) + 1
+            if batch and (len(batch) >= max_jobs or batch_bytes + size > max_bytes):
+                batches.append(batch)
+                batch, batch_bytes = [], 2
+            batch.append(payload)
+            batch_bytes += size
+        if batch:
+            batches.append(batch)
+        return batches
 
     async def add_jobs(
         self, job_info: List[JobExecuteModel]
-    ) -> List[JobExecuteResponseModel]:
+    ) -> Dict[str, JobExecuteResponseModel]:
         """
         批量添加任务（对应/add_job接口）
-        :param tasks: 任务参数列表
-        :return: 任务执行结果列表
+        按任务数和请求体大小分批, 各批次通过共享连接池并发发送
+        :param job_info: 任务参数列表
+        :return: 任务uid -> 提交结果, 请求失败、响应无法解析或响应中缺失的任务视为提交失败
         """
-        response = await self._send_request(
-            method="POST",
-            endpoint="/operator/add_job",
-            json=[task.model_dump() for task in job_info],
-        )
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
 
-        return all([item.success for item in response])
+        async def send(batch: List[Dict]) -> List[JobExecuteResponseModel]:
+            async with semaphore:
+                try:
+                    response = await self._send_request(
+                        method="POST", endpoint="/operator/add_job", json=batch
+                    )
+                except Exception as e:
+                    # 任一批次的异常只影响本批次的任务, 不中断其他批次
+                    return [
+                        JobExecuteResponseModel(
+                            job_uid=item["job_uid"], success=False, error_detail=str(e)
+                        )
+                        for item in batch
+                    ]
+            results = {item.job_uid: item for item in response}
+            return [
+                results.get(item["job_uid"])
+                or JobExecuteResponseModel(
+                    job_uid=item["job_uid"],
+                    success=False,
+                    error_detail="算子层未返回该任务的提交结果",
+                )
+                for item in batch
+            ]
+
+        batches = self.split_batches(
+            [job.model_dump() for job in job_info], self.batch_max_jobs, self.batch_max_bytes
+        )
+        responses = await asyncio.gather(*(send(batch) for batch in batches))
+        return {item.job_uid: item for response in responses for item in response}
 
     async def stop_jobs(self, job_uids: List[str]) -> List[JobExecuteResponseModel]:
         """
@@ -144,12 +554,7 @@ class JobSchedulerService:
             method="GET", endpoint="/operator/stop_job", params={"job_uids": job_uids}
         )
 
-        assert response.status_code == 200, "添加失败"
-        return True
-
-    # async def close(self):
-    #     """关闭连接池"""
-    #     await self.client.close()
+        return all([item.success for item in response])
 
 
 class RedisJobStore:
@@ -157,90 +562,740 @@ class RedisJobStore:
 
     def __init__(self, redis: asyncio_redis):
         self.redis = redis
-
-    async def store_job(self, job: JobSchedulerModel):
-        """存储任务参数"""
-        key = RedisKeys.JOB_PARAM.format(job_uid=job.job_uid)
-        await self.redis.set(key, json.dumps(job.model_dump()))
-        await self.redis.expire(key, 86400)
+        self._complete_job_script = redis.register_script(RedisScripts.COMPLETE_JOB)
+        self._incr_progress_script = redis.register_script(RedisScripts.INCR_PROGRESS)
+        self._pop_ready_jobs_script = redis.register_script(RedisScripts.POP_READY_JOBS)
+        self._release_slots_script = redis.register_script(RedisScripts.RELEASE_SLOTS)
+        self._release_task_lock_script = redis.register_script(RedisScripts.RELEASE_TASK_LOCK)
+        self._pop_pending_run_script = redis.register_script(RedisScripts.POP_PENDING_RUN)
+        self._pop_due_jobs_script = redis.register_script(RedisScripts.POP_DUE_JOBS)
+        self._lease_due_jobs_script = redis.register_script(RedisScripts.LEASE_DUE_JOBS)
+        self._claim_outcome_script = redis.register_script(RedisScripts.CLAIM_OUTCOME)
+        self._schedule_retry_script = redis.register_script(RedisScripts.SCHEDULE_RETRY)
+        self._lookup_results_script = redis.register_script(RedisScripts.LOOKUP_RESULTS)
+        self._migrate_legacy_hash_script = redis.register_script(RedisScripts.MIGRATE_LEGACY_HASH)
+        self._store_result_script = redis.register_script(RedisScripts.STORE_RESULT)
+
+    @staticmethod
+    def _encode_model(model: BaseModel) -> Dict[str, str]:
+        """模型按字段编码为哈希, 每个字段单独JSON序列化以保留None和数值类型"""
+        return {field: json.dumps(value) for field, value in model.model_dump().items()}
+
+    @staticmethod
+    def shard_of(task_uid: Optional[str], shards: int = SchedulerConfig.scheduler_shards) -> int:
+        """任务流所属分片, 同一任务流的完成事件、超时记录与槽位等待登记总是落在同一分片"""
+        return zlib.crc32((task_uid or "").encode()) % shards
+
+    @classmethod
+    def run_shard(cls, run_uid: str) -> int:
+        """运行所属分片, 即其任务流所属分片"""
+        return cls.shard_of(run_uid.rpartition("@")[0] or run_uid)
+
+    @staticmethod
+    def resolve_shards(shards: Optional[AbstractSet[int]]) -> AbstractSet[int]:
+        """未指定分片时表示全部分片"""
+        return range(SchedulerConfig.scheduler_shards) if shards is None else shards
+
+    @staticmethod
+    def _decode_fields(fields: List[str], values: List[Optional[str]]) -> Dict:
+        return {
+            field: json.loads(value)
+            for field, value in zip(fields, values)
+            if value is not None
+        }
+
+    async def _migrate_legacy_hash(self, key: str, data: str) -> Dict:
+        """
+        升级前整体JSON字符串格式的键在首次读取时转换为哈希,
+        之后的读写与Lua脚本(完成标记、计数标记、派发令牌)都按哈希处理
+        :param data: 读取到的JSON字符串
+        :return: 解析后的字段
+        """
+        fields = json.loads(data)
+        if fields:
+            await self._migrate_legacy_hash_script(
+                keys=[key],
+                args=[
+                    data,
+                    *[item for field, value in fields.items() for item in (field, json.dumps(value))],
+                ],
+            )
+        return fields
 
     async def get_job(self, job_uid: str) -> JobSchedulerModel:
         """获取任务参数"""
-        data = await self.redis.get(RedisKeys.JOB_PARAM.format(job_uid=job_uid))
-        return JobSchedulerModel(**json.loads(data)) if data else None
+        key = RedisKeys.JOB_PARAM.format(job_uid=job_uid)
+        try:
+            data = await self.redis.hgetall(key)
+        except ResponseError:
+            # 兼容旧版整体JSON字符串格式
+            data = await self.redis.get(key)
+            return JobSchedulerModel(**await self._migrate_legacy_hash(key, data)) if data else None
+        if not data:
+            return None
+        return JobSchedulerModel(**self._decode_fields(list(data), list(data.values())))
+
+    async def get_jobs(self, job_uids: List[str]) -> List[JobSchedulerModel]:
+        """
+        通过一次pipeline批量获取任务参数
+        :param job_uids: 任务uid列表
+        :return: 任务参数列表, 已不存在的任务被忽略
+        """
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for job_uid in job_uids:
+                pipe.hgetall(RedisKeys.JOB_PARAM.format(job_uid=job_uid))
+            results = await pipe.execute(raise_on_error=False)
+
+        jobs = []
+        for job_uid, data in zip(job_uids, results):
+            if isinstance(data, ResponseError):
+                # 旧版JSON字符串格式的键单独读取
+                job = await self.get_job(job_uid)
+            elif data:
+                job = JobSchedulerModel(
+                    **self._decode_fields(list(data), list(data.values()))
+                )
+            else:
+                job = None
+            if job:
+                jobs.append(job)
+        return jobs
+
+    async def get_job_fields(self, job_uid: str, fields: List[str]) -> Optional[Dict]:
+        """
+        只读取任务参数中的指定字段(HMGET), 避免下载和校验完整的job_kwargs
+        :param job_uid: 任务uid
+        :param fields: 字段名列表
+        :return: 字段名 -> 字段值, 任务不存在时返回None
+        """
+        key = RedisKeys.JOB_PARAM.format(job_uid=job_uid)
+        try:
+            values = await self.redis.hmget(key, fields)
+        except ResponseError:
+            data = await self.redis.get(key)
+            if not data:
+                return None
+            job = await self._migrate_legacy_hash(key, data)
+            return {field: job.get(field) for field in fields}
+        if all(value is None for value in values):
+            return None
+        return self._decode_fields(fields, values)
+
+    @staticmethod
+    def ready_score(priority: int = 0, now_ms: Optional[int] = None) -> int:
+        """
+        就绪队列调度分值: 入队时间(毫秒) - 优先级 * 老化时间
+        高优先级任务相当于提前入队, 低优先级任务等待足够久后分值会小于
+        后入队的高优先级任务, 从而不会被无限期饿死
+        :param priority: 任务流优先级, 数值越大越优先
+        :param now_ms: 入队时间(毫秒), 默认为当前时间
+        """
+        if now_ms is None:
+            now_ms = int(time.time() * 1000)
+        return now_ms - priority * SchedulerConfig.scheduler_priority_aging_ms
+
+    @staticmethod
+    def slot_limits(scan: int) -> str:
+        """
+        并发限制参数, 未配置任何限制时返回空字符串
+        :param scan: 单次最多检查的就绪任务数量
+        """
+        if not (
+            SchedulerConfig.scheduler_executor_limits
+            or SchedulerConfig.scheduler_party_limits
+            or SchedulerConfig.scheduler_party_default_limit > 0
+        ):
+            return ""
+        return json.dumps(
+            {
+                "scan": scan,
+                "executor": SchedulerConfig.scheduler_executor_limits,
+                "party": SchedulerConfig.scheduler_party_limits,
+                "party_default": SchedulerConfig.scheduler_party_default_limit,
+            }
+        )
+
+    async def pop_ready_jobs(self, run_uid: str, count: int) -> List[str]:
+        """
+        按优先级顺序从运行的就绪队列取出最多count个任务
+        配置了并发限制时只取出获得槽位的任务, 未获得槽位的任务留在队列中
+        """
+        return await self._pop_ready_jobs_script(
+            keys=[RedisKeys.READY_JOBS.format(run_uid=run_uid), RedisKeys.READY_TASKS],
+            args=[
+                count,
+                run_uid,
+                RedisKeys.JOB_PARAM.format(job_uid=""),
+                RedisKeys.SLOTS_PREFIX,
+                self.slot_limits(count),
+                int(time.time() * 1000),
+                SchedulerConfig.scheduler_slot_ttl_ms,
+                self.run_shard(run_uid),
+            ],
+        )
 
-    async def add_to_ready_queue(self, job_uid: str):
-        """加入就绪队列"""
-        await self.redis.sadd(RedisKeys.READY_JOBS, job_uid)
-        await self.redis.expire(RedisKeys.READY_JOBS, 3600)
+    async def release_slots(
+        self, job_uids: List[str], wake_shards: AbstractSet[int] = frozenset()
+    ) -> Set[str]:
+        """
+        释放任务占用的并发槽位, 一次往返
+        :param wake_shards: 唤醒这些分片中等待被释放槽位的运行, 其他分片的运行由持有该分片的进程调度
+        :return: 因被释放的槽位已满而等待的运行UID, 取出后不再登记, 仍无法调度的运行再次登记
+        """
+        if not job_uids:
+            return set()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for job_uid in job_uids:
+                await self._release_slots_script(
+                    keys=[RedisKeys.SLOTS_HELD.format(job_uid=job_uid)],
+                    args=[job_uid, *wake_shards],
+                    client=pipe,
+                )
+            return {run_uid for waiting in await pipe.execute() for run_uid in waiting}
+
+    async def requeue_jobs(self, jobs: List[JobSchedulerModel]):
+        """
+        到期的等待重试任务释放并发槽位、移除超时记录后重新加入所属运行的就绪队列, 等待下一次派发
+        :param jobs: 任务参数列表
+        """
+        if not jobs:
+            return
+        await self.release_slots([job.job_uid for job in jobs])
+        now_ms = int(time.time() * 1000)
+        ready_queues: Dict[str, Dict[str, int]] = {}
+        for job in jobs:
+            ready_queues.setdefault(job.run_uid, {})[job.job_uid] = self.ready_score(
+                job.priority, now_ms
+            )
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for job in jobs:
+                pipe.zrem(
+                    RedisKeys.DISPATCHED_JOBS.format(shard=self.shard_of(job.task_uid)), job.job_uid
+                )
+            for run_uid, scores in ready_queues.items():
+                ready_key = RedisKeys.READY_JOBS.format(run_uid=run_uid)
+                pipe.zadd(ready_key, scores)
+                pipe.expire(ready_key, 86400)
+                pipe.zadd(RedisKeys.READY_TASKS, {run_uid: min(scores.values())}, lt=True)
+            await pipe.execute()
+
+    async def schedule_retry(self, job_uid: str, delay: float, dispatch_token: int) -> int:
+        """
+        失败的任务在等待时间后重试, 重试次数记录在任务参数中; 同一次派发的失败只安排一次重试
+        :param job_uid: 任务uid
+        :param delay: 等待时间(秒)
+        :param dispatch_token: 失败的派发令牌
+        :return: 本次运行中已重试的次数(含本次)
+        """
+        return await self._schedule_retry_script(
+            keys=[RedisKeys.JOB_PARAM.format(job_uid=job_uid), RedisKeys.DELAYED_JOBS],
+            args=[dispatch_token, int((time.time() + delay) * 1000), job_uid],
+        )
 
-    async def pop_ready_job(self) -> Optional[str]:
-        """取出一个就绪任务"""
-        return await self.redis.spop(RedisKeys.READY_JOBS)
+    async def requeue_due_jobs(self, count: int = 1000) -> int:
+        """
+        将到期的等待重试任务放回所属运行的就绪队列
+        :param count: 单次处理的最大数量
+        :return: 放回的任务数量
+        """
+        job_uids = await self._pop_due_jobs_script(
+            keys=[RedisKeys.DELAYED_JOBS], args=[int(time.time() * 1000), count]
+        )
+        if not job_uids:
+            return 0
+        # 所属运行已结束的任务参数已被清理, 直接丢弃
+        jobs = await self.get_jobs(job_uids)
+        await self.requeue_jobs(jobs)
+        return len(jobs)
+
+    async def track_dispatched(
+        self, jobs: List[JobSchedulerModel], deadlines: Dict[str, int]
+    ) -> Dict[str, int]:
+        """
+        下发前递增任务的派发令牌并按任务流分片记录超时时间, 一次往返
+        派发令牌随派发请求下发, 算子层在完成回调中原样返回, 用于识别属于已结束派发的迟到事件
+        :param jobs: 下发的任务列表
+        :param deadlines: 任务uid -> 超时时间戳(毫秒), 不限制超时的任务不记录
+        :return: 任务uid -> 本次派发的令牌
+        """
+        if not jobs:
+            return {}
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for job in jobs:
+                pipe.hincrby(RedisKeys.JOB_PARAM.format(job_uid=job.job_uid), "dispatch", 1)
+            for job in jobs:
+                if job.job_uid in deadlines:
+                    pipe.zadd(
+                        RedisKeys.DISPATCHED_JOBS.format(shard=self.shard_of(job.task_uid)),
+                        {job.job_uid: deadlines[job.job_uid]},
+                    )
+            results = await pipe.execute(raise_on_error=False)
+        return {
+            job.job_uid: token
+            for job, token in zip(jobs, results)
+            if not isinstance(token, ResponseError)
+        }
+
+    async def claim_outcome(self, job_uid: str, dispatch_token: int, success: bool) -> bool:
+        """
+        认领一次派发的执行结果
+        :return: 是否应处理该完成事件, 事件属于已结束的派发或与已认领的结果冲突时为False
+        """
+        return bool(
+            await self._claim_outcome_script(
+                keys=[RedisKeys.JOB_PARAM.format(job_uid=job_uid)],
+                args=[dispatch_token, 1 if success else 0],
+            )
+        )
+
+    async def untrack_dispatched(self, job_uid: str, shard: int):
+        """收到完成事件后移除超时记录"""
+        await self.redis.zrem(RedisKeys.DISPATCHED_JOBS.format(shard=shard), job_uid)
 
-    async def get_all_ready_jobs(self) -> List[str]:
-        """获取所有就绪任务"""
+    async def lease_timed_out_jobs(
+        self, recheck: float, shards: Optional[AbstractSet[int]] = None, count: int = 1000
+    ) -> Dict[str, int]:
+        """
+        取出已超时仍未收到完成回调的任务, 超时时间原子地顺延recheck秒, 多个进程同时扫描不会重复取出;
+        超时记录在完成事件处理时移除, 未被处理的任务在recheck秒后再次取出
+        :param recheck: 重新检查的间隔(秒)
+        :param shards: 只扫描这些分片的任务, 为空时扫描全部分片
+        :param count: 每个分片单次处理的最大数量
+        :return: 任务uid -> 所属分片
+        """
+        now_ms = int(time.time() * 1000)
+        job_uids = {}
+        for shard in self.resolve_shards(shards):
+            for job_uid in await self._lease_due_jobs_script(
+                keys=[RedisKeys.DISPATCHED_JOBS.format(shard=shard)],
+                args=[now_ms, count, now_ms + int(recheck * 1000)],
+            ):
+                job_uids[job_uid] = shard
+        return job_uids
+
+    async def get_slot_usage(self) -> Dict[str, Dict[str, int]]:
+        """已配置并发限制的执行器与参与方当前占用的槽位数"""
+        executors = list(SchedulerConfig.scheduler_executor_limits)
+        parties = list(SchedulerConfig.scheduler_party_limits)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for name in executors:
+                pipe.zcard(RedisKeys.EXECUTOR_SLOTS.format(name=name))
+            for name in parties:
+                pipe.zcard(RedisKeys.PARTY_SLOTS.format(name=name))
+            counts = await pipe.execute()
+        return {
+            "executor": dict(zip(executors, counts[: len(executors)])),
+            "party": dict(zip(parties, counts[len(executors) :])),
+        }
+
+    async def get_ready_jobs(self, run_uid: str, batch_size: int = 1000) -> List[str]:
+        """获取运行的所有就绪任务, 每次往返取出一批"""
         job_uids = []
 
         while True:
-            job_uid = await self.pop_ready_job()
-            if not job_uid:
+            batch = await self.pop_ready_jobs(run_uid, batch_size)
+            job_uids.extend(batch)
+            if len(batch) < batch_size:
                 break
-            job_uids.append(job_uid)
 
         return job_uids
 
-    async def init_dep_count(self, job_uid: str, count: int):
-        """初始化依赖计数器"""
-        key = RedisKeys.DEP_COUNT.format(job_uid=job_uid)
-        await self.redis.set(key, count)
-        await self.redis.expire(key, 86400)
-
-    async def decrement_dep_count(self, job_uid: str) -> int:
-        """减少依赖计数器并返回新值"""
-        return await self.redis.decr(RedisKeys.DEP_COUNT.format(job_uid=job_uid))
-
-    async def add_dependent(self, dep_job_uid: str, job_uid: str):
-        """添加反向依赖关系"""
-        dep_key = RedisKeys.DEPS.format(job_uid=dep_job_uid)
-        dependents = await self.get_dependents(dep_job_uid)
-        if job_uid not in dependents:
-            dependents.append(job_uid)
-            await self.redis.set(dep_key, json.dumps(dependents))
-            # 设置依赖关系数据存活时间为24小时（确保异常情况下自动清理）
-            await self.redis.expire(dep_key, 86400)
-
-    async def get_dependents(self, job_uid: str) -> List[str]:
-        """获取所有依赖此任务的任务列表"""
-        data = await self.redis.get(RedisKeys.DEPS.format(job_uid=job_uid))
-        return json.loads(data) if data else []
+    async def order_ready_runs(self, run_uids: AbstractSet[str]) -> List[str]:
+        """
+        按就绪运行索引中的分值(全局优先级与老化顺序)排列运行, 没有就绪任务的运行被忽略
+        """
+        run_uids = list(run_uids)
+        if not run_uids:
+            return []
+        scores = await self.redis.zmscore(RedisKeys.READY_TASKS, run_uids)
+        return [
+            run_uid
+            for score, run_uid in sorted(
+                (score, run_uid) for run_uid, score in zip(run_uids, scores) if score is not None
+            )
+        ]
+
+    async def get_ready_tasks(self) -> List[str]:
+        """按最优先就绪任务的分值顺序获取有就绪任务的运行UID"""
+        return await self.redis.zrange(RedisKeys.READY_TASKS, 0, -1)
+
+    async def get_all_ready_jobs(
+        self, batch_size: int = 1000, shards: Optional[AbstractSet[int]] = None
+    ) -> List[str]:
+        """
+        获取所有运行的就绪任务, 运行之间按优先级顺序排列
+        同时取出升级前全局就绪队列中遗留的任务(没有分片信息, SPOP保证只被一个进程取出)
+        :param shards: 只获取属于这些分片的运行, 为空时获取全部分片
+        """
+        shards = self.resolve_shards(shards)
+        job_uids = []
+
+        while True:
+            legacy = await self.redis.spop(RedisKeys.LEGACY_READY_JOBS, batch_size) or []
+            job_uids.extend(legacy)
+            if len(legacy) < batch_size:
+                break
+
+        for run_uid in await self.get_ready_tasks():
+            if self.run_shard(run_uid) in shards:
+                job_uids.extend(await self.get_ready_jobs(run_uid, batch_size))
+
+        return job_uids
+
+    async def register_plan(
+        self,
+        plan: ExecutionPlanModel,
+        task_uid: str,
+        run_id: str,
+        priority: int = 0,
+        completed: AbstractSet[int] = frozenset(),
+    ):
+        """
+        按执行计划注册一次运行的任务, 只需拼接运行相关字段, 不再解析任务参数与依赖关系
+        :param plan: 执行计划
+        :param task_uid: 任务流UID
+        :param run_id: 运行ID
+        :param priority: 任务流优先级
+        :param completed: 已完成任务在执行计划中的下标, 断点恢复时只注册未完成的子图
+        """
+        job_uids = [JobSchedulerModel.scoped_uid(job_uid, run_id) for job_uid in plan.job_uids]
+        pending = [index for index in range(len(job_uids)) if index not in completed]
+        run_fields = {
+            "task_uid": json.dumps(task_uid),
+            "run_id": json.dumps(run_id),
+            "priority": json.dumps(priority),
+            "plan_hash": json.dumps(plan.plan_hash),
+        }
+        payloads = {
+            job_uids[index]: {
+                **plan.payloads[index],
+                **run_fields,
+                "job_uid": json.dumps(job_uids[index]),
+                "plan_index": json.dumps(index),
+            }
+            for index in pending
+        }
+        # 已完成的上游任务不再计入依赖数量
+        in_degree = list(plan.in_degree)
+        for index in completed:
+            for target in plan.dependents[index]:
+                in_degree[target] -= 1
+        dep_counts = {job_uids[index]: in_degree[index] for index in pending if in_degree[index]}
+        dependents = {
+            job_uids[index]: [
+                job_uids[target] for target in plan.dependents[index] if target not in completed
+            ]
+            for index in pending
+            if plan.dependents[index]
+        }
+        score = self.ready_score(priority)
+        ready = {job_uids[index]: score for index in pending if not in_degree[index]}
+        run_uid = JobSchedulerModel.scoped_uid(task_uid, run_id)
+        await self._write_jobs(payloads, dep_counts, dependents, {run_uid: ready} if ready else {})
+
+    async def _write_jobs(
+        self,
+        payloads: Dict[str, Dict[str, str]],
+        dep_counts: Dict[str, int],
+        dependents: Dict[str, List[str]],
+        ready_queues: Dict[str, Dict[str, int]],
+    ):
+        """
+        在一次MULTI/EXEC事务中写入任务参数、依赖计数器、反向依赖列表和就绪队列
+        :param payloads: 任务uid -> 已编码的任务参数哈希字段
+        :param ready_queues: 运行UID -> {就绪任务uid: 调度分值}
+        """
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for job_uid, mapping in payloads.items():
+                job_key = RedisKeys.JOB_PARAM.format(job_uid=job_uid)
+                pipe.delete(job_key)
+                pipe.hset(job_key, mapping=mapping)
+                pipe.expire(job_key, 86400)
+            for job_uid, count in dep_counts.items():
+                pipe.set(RedisKeys.DEP_COUNT.format(job_uid=job_uid), count, ex=86400)
+            for job_uid, job_uids in dependents.items():
+                dep_key = RedisKeys.DEPS.format(job_uid=job_uid)
+                pipe.delete(dep_key)
+                pipe.sadd(dep_key, *job_uids)
+                pipe.expire(dep_key, 86400)
+            # 写入各运行的就绪队列, 并登记到就绪运行索引
+            for run_uid, scores in ready_queues.items():
+                # 丢弃同一运行UID遗留的就绪任务(升级前的数据重新执行时)
+                ready_key = RedisKeys.READY_JOBS.format(run_uid=run_uid)
+                pipe.delete(ready_key)
+                pipe.zadd(ready_key, scores)
+                pipe.expire(ready_key, 86400)
+                pipe.zadd(RedisKeys.READY_TASKS, {run_uid: min(scores.values())}, lt=True)
+            await pipe.execute()
+
+    async def complete_job(self, run_uid: str, job_uid: str, priority: int = 0) -> List[str]:
+        """
+        原子地完成依赖扇出, 一次往返
+        :param run_uid: 所属运行UID, 下游任务与其属于同一运行
+        :param job_uid: 已完成的任务uid
+        :param priority: 所属任务流优先级
+        :return: 依赖计数归零、新加入就绪队列的任务uid列表
+        """
+        return await self._complete_job_script(
+            keys=[
+                RedisKeys.DEPS.format(job_uid=job_uid),
+                RedisKeys.READY_JOBS.format(run_uid=run_uid),
+                RedisKeys.READY_TASKS,
+                RedisKeys.JOB_PARAM.format(job_uid=job_uid),
+            ],
+            args=[
+                RedisKeys.DEP_COUNT.format(job_uid=""),
+                86400,
+                self.ready_score(priority),
+                run_uid,
+            ],
+        )
+
+    async def get_plan(self, plan_hash: str) -> Optional[ExecutionPlanModel]:
+        """读取缓存的执行计划"""
+        data = await self.redis.get(RedisKeys.TASK_PLAN.format(plan_hash=plan_hash))
+        return ExecutionPlanModel.model_validate_json(data) if data else None
+
+    async def save_plan(self, plan: ExecutionPlanModel, ttl: int):
+        """缓存执行计划, 内容哈希相同的任务流共用"""
+        await self.redis.set(
+            RedisKeys.TASK_PLAN.format(plan_hash=plan.plan_hash), plan.model_dump_json(), ex=ttl
+        )
+
+    async def mark_checkpoint(
+        self, task_uid: str, plan_hash: str, run_id: str, plan_index: int, ttl: int
+    ):
+        """在运行的检查点位图中标记任务已完成"""
+        key = RedisKeys.TASK_CHECKPOINT.format(task_uid=task_uid, plan_hash=plan_hash, run_id=run_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.setbit(key, plan_index, 1)
+            pipe.expire(key, ttl)
+            pipe.expire(RedisKeys.TASK_CHECKPOINT_RUN.format(task_uid=task_uid), ttl)
+            await pipe.execute()
+
+    async def get_checkpoint(
+        self, task_uid: str, plan_hash: str, run_id: str, size: int
+    ) -> Optional[Set[int]]:
+        """
+        读取运行的检查点位图
+        :param size: 执行计划中的任务数量
+        :return: 已完成任务的下标集合, 检查点不存在时返回None
+        """
+        key = RedisKeys.TASK_CHECKPOINT.format(task_uid=task_uid, plan_hash=plan_hash, run_id=run_id)
+        # 位图不是合法的UTF-8字符串, 一次GET读取原始字节后在本地解码, 第i位为第i//8个字节的从高到低第i%8位
+        bitmap = await self.redis.execute_command("GET", key, **{NEVER_DECODE: True})
+        if bitmap is None:
+            return None
+        return {
+            index
+            for index in range(min(size, len(bitmap) * 8))
+            if bitmap[index >> 3] >> (7 - (index & 7)) & 1
+        }
+
+    async def save_checkpoint(
+        self, task_uid: str, plan_hash: str, run_id: str, completed: AbstractSet[int], ttl: int
+    ):
+        """重建运行的检查点位图, 并记为任务流最近一次启动的运行"""
+        key = RedisKeys.TASK_CHECKPOINT.format(task_uid=task_uid, plan_hash=plan_hash, run_id=run_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            for index in completed:
+                pipe.setbit(key, index, 1)
+            pipe.expire(key, ttl)
+            pipe.set(RedisKeys.TASK_CHECKPOINT_RUN.format(task_uid=task_uid), run_id, ex=ttl)
+            await pipe.execute()
+
+    async def get_checkpoint_run(self, task_uid: str) -> Optional[str]:
+        """读取任务流最近一次启动的运行ID"""
+        return await self.redis.get(RedisKeys.TASK_CHECKPOINT_RUN.format(task_uid=task_uid))
+
+    async def lookup_results(self, cache_keys: List[str]) -> Set[str]:
+        """
+        批量查询结果缓存, 一次往返
+        :return: 命中的缓存键集合
+        """
+        if not cache_keys:
+            return set()
+        return set(
+            await self._lookup_results_script(
+                keys=[RedisKeys.JOB_RESULT_LRU],
+                args=[
+                    RedisKeys.JOB_RESULT.format(cache_key=""),
+                    int(time.time() * 1000),
+                    *cache_keys,
+                ],
+            )
+        )
+
+    async def store_result(self, cache_key: str, result: Dict, ttl: int, maxsize: int):
+        """
+        写入成功任务的结果缓存
+        :param cache_key: 缓存键
+        :param result: 缓存内容(产生该结果的任务等信息)
+        :param ttl: 缓存时间(秒)
+        :param maxsize: 最大条目数
+        """
+        await self._store_result_script(
+            keys=[RedisKeys.JOB_RESULT_LRU, RedisKeys.JOB_RESULT.format(cache_key=cache_key)],
+            args=[
+                cache_key,
+                json.dumps(result),
+                ttl,
+                int(time.time() * 1000),
+                maxsize,
+                RedisKeys.JOB_RESULT.format(cache_key=""),
+            ],
+        )
 
     async def save_task_progress(self, progress: TaskProgressModel):
-        """保存任务进度"""
-        key = RedisKeys.TASK_PROGRESS.format(task_uid=progress.task_uid)
-        await self.redis.set(key, json.dumps(progress.model_dump()))
-        await self.redis.expire(key, 86400)
-
-    async def get_task_progress(self, task_uid: str) -> TaskProgressModel:
-        """获取任务进度"""
-        data = await self.redis.get(RedisKeys.TASK_PROGRESS.format(task_uid=task_uid))
-        return TaskProgressModel(**json.loads(data)) if data else None
-
-    async def cleanup_task(self, task_uid: str):
-        """清理任务相关数据"""
-        progress = await self.get_task_progress(task_uid)
+        """保存运行进度, 并登记为任务流的活跃运行"""
+        key = RedisKeys.TASK_PROGRESS.format(run_uid=progress.run_uid)
+        runs_key = RedisKeys.TASK_RUNS.format(task_uid=progress.task_uid)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.hset(key, mapping=self._encode_model(progress))
+            pipe.expire(key, 86400)
+            pipe.sadd(runs_key, progress.run_uid)
+            pipe.expire(runs_key, 86400)
+            await pipe.execute()
+
+    async def get_task_runs(self, task_uid: str) -> List[str]:
+        """
+        获取任务流的活跃运行UID
+        包含升级前未区分运行、以任务流UID为运行UID的进度
+        """
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.smembers(RedisKeys.TASK_RUNS.format(task_uid=task_uid))
+            pipe.exists(RedisKeys.TASK_PROGRESS.format(run_uid=task_uid))
+            run_uids, legacy = await pipe.execute()
+        run_uids = sorted(run_uids)
+        if legacy:
+            run_uids.append(task_uid)
+        return run_uids
+
+    async def acquire_task_lock(self, task_uid: str, run_uid: str) -> bool:
+        """获取禁止并发任务流的运行锁"""
+        return bool(
+            await self.redis.set(
+                RedisKeys.TASK_LOCK.format(task_uid=task_uid), run_uid, nx=True, ex=86400
+            )
+        )
+
+    async def release_task_lock(self, task_uid: str, run_uid: str):
+        """释放运行锁, 仅当锁仍由该运行持有时删除"""
+        await self._release_task_lock_script(
+            keys=[RedisKeys.TASK_LOCK.format(task_uid=task_uid)], args=[run_uid]
+        )
+
+    async def queue_pending_run(self, task_uid: str, max_pending: int) -> bool:
+        """
+        运行锁被占用时登记一次排队的启动请求
+        :return: 排队请求已达上限时返回False
+        """
+        key = RedisKeys.TASK_PENDING_RUNS.format(task_uid=task_uid)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(key, int(time.time() * 1000))
+            pipe.ltrim(key, 0, max_pending - 1)
+            pipe.expire(key, 86400)
+            length, _, _ = await pipe.execute()
+        return length <= max_pending
+
+    async def pop_pending_run(self, task_uid: str) -> bool:
+        """运行锁空闲时取出一个排队的启动请求, 返回是否需要启动新的运行"""
+        return bool(
+            await self._pop_pending_run_script(
+                keys=[
+                    RedisKeys.TASK_LOCK.format(task_uid=task_uid),
+                    RedisKeys.TASK_PENDING_RUNS.format(task_uid=task_uid),
+                ]
+            )
+        )
+
+    async def clear_pending_runs(self, task_uid: str):
+        """丢弃排队的启动请求"""
+        await self.redis.delete(RedisKeys.TASK_PENDING_RUNS.format(task_uid=task_uid))
+
+    async def get_task_progress(self, run_uid: str) -> TaskProgressModel:
+        """获取运行进度"""
+        key = RedisKeys.TASK_PROGRESS.format(run_uid=run_uid)
+        try:
+            data = await self.redis.hgetall(key)
+        except ResponseError:
+            # 兼容旧版整体JSON字符串格式
+            data = await self.redis.get(key)
+            return TaskProgressModel(**await self._migrate_legacy_hash(key, data)) if data else None
+        if not data:
+            return None
+        return TaskProgressModel(**self._decode_fields(list(data), list(data.values())))
+
+    async def increment_task_progress(
+        self, run_uid: str, job_uid: str, flush_interval: float, flush_delta: float
+    ) -> Optional[Tuple[int, int, bool]]:
+        """
+        原子地增加任务流完成计数, 同一任务只计数一次
+        :param run_uid: 运行UID
+        :param job_uid: 完成的任务uid
+        :param flush_interval: 数据库进度最小写入间隔(秒)
+        :param flush_delta: 触发数据库写入的最小进度变化
+        :return: (完成数量, 任务总数, 是否需要写库), 进度不存在时返回None
+        """
+        keys = [
+            RedisKeys.TASK_PROGRESS.format(run_uid=run_uid),
+            RedisKeys.JOB_PARAM.format(job_uid=job_uid),
+        ]
+        args = [int(time.time() * 1000), int(flush_interval * 1000), flush_delta]
+        try:
+            result = await self._incr_progress_script(keys=keys, args=args)
+        except ResponseError as e:
+            if "WRONGTYPE" not in str(e):
+                raise
+            # 升级前仍在执行的运行, 进度或任务参数为整体JSON字符串, 转换为哈希后重试
+            await self.get_task_progress(run_uid)
+            await self.get_job_fields(job_uid, ["job_uid"])
+            result = await self._incr_progress_script(keys=keys, args=args)
+        if not result:
+            return None
+        completed, task_len, flush = result
+        return int(completed), int(task_len), bool(flush)
+
+    async def cleanup_run(self, run_uid: str):
+        """
+        清理一次运行的相关数据, 所有删除在一次事务中完成
+        同时注销活跃运行并释放该运行持有的运行锁
+        """
+        progress = await self.get_task_progress(run_uid)
         if not progress:
             return
 
-        # 删除所有关联的job数据
+        keys = [RedisKeys.TASK_PROGRESS.format(run_uid=run_uid)]
+        keys.append(RedisKeys.READY_JOBS.format(run_uid=run_uid))
         for job_uid in progress.task_jobs:
-            await self.redis.delete(RedisKeys.JOB_PARAM.format(job_uid=job_uid))
-            await self.redis.delete(RedisKeys.DEP_COUNT.format(job_uid=job_uid))
-            await self.redis.delete(RedisKeys.DEPS.format(job_uid=job_uid))
-            await self.redis.srem(RedisKeys.READY_JOBS, job_uid)  # 新增：从就绪队列移除
-
-        # 删除任务进度
-        await self.redis.delete(RedisKeys.TASK_PROGRESS.format(task_uid=task_uid))
+            keys.append(RedisKeys.JOB_PARAM.format(job_uid=job_uid))
+            keys.append(RedisKeys.DEP_COUNT.format(job_uid=job_uid))
+            keys.append(RedisKeys.DEPS.format(job_uid=job_uid))
+        async with self.redis.pipeline(transaction=True) as pipe:
+            # 释放仍在运行(如任务流失败或被停止时)的任务占用的并发槽位
+            for job_uid in progress.task_jobs:
+                await self._release_slots_script(
+                    keys=[RedisKeys.SLOTS_HELD.format(job_uid=job_uid)],
+                    args=[job_uid],
+                    client=pipe,
+                )
+            pipe.delete(*keys)
+            if progress.task_jobs:
+                pipe.zrem(RedisKeys.DELAYED_JOBS, *progress.task_jobs)
+                pipe.zrem(
+                    RedisKeys.DISPATCHED_JOBS.format(shard=self.shard_of(progress.task_uid)),
+                    *progress.task_jobs,
+                )
+            pipe.zrem(RedisKeys.READY_TASKS, run_uid)
+            pipe.srem(RedisKeys.TASK_RUNS.format(task_uid=progress.task_uid), run_uid)
+            await self._release_task_lock_script(
+                keys=[RedisKeys.TASK_LOCK.format(task_uid=progress.task_uid)],
+                args=[run_uid],
+                client=pipe,
+            )
+            await pipe.execute()
 
 
 class DependencyManager:
@@ -249,24 +1304,141 @@ class DependencyManager:
     def __init__(self, redis_store: RedisJobStore):
         self.redis = redis_store
 
-    async def register_dependencies(self, job: JobSchedulerModel):
-        """注册任务依赖"""
-        dependencies = json.loads(job.job_dependencies)
-        if not dependencies:
-            await self.redis.add_to_ready_queue(job.job_uid)
-            return
+    async def register_plan(
+        self,
+        plan: ExecutionPlanModel,
+        task_uid: str,
+        run_id: str,
+        priority: int = 0,
+        completed: AbstractSet[int] = frozenset(),
+    ):
+        """按编译好的执行计划注册一次运行的任务依赖, 跳过已完成的任务"""
+        await self.redis.register_plan(plan, task_uid, run_id, priority, completed)
 
-        await self.redis.init_dep_count(job.job_uid, len(dependencies))
-        for dep_job_uid in dependencies:
-            await self.redis.add_dependent(dep_job_uid, job.job_uid)
+    async def handle_completion(
+        self, run_uid: str, completed_job_uid: str, priority: int = 0
+    ) -> List[str]:
+        """
+        处理任务完成后的依赖更新
+        :return: 新进入就绪队列的任务uid列表
+        """
+        return await self.redis.complete_job(run_uid, completed_job_uid, priority)
 
-    async def handle_completion(self, completed_job_uid: str):
-        """处理任务完成后的依赖更新"""
-        dependents = await self.redis.get_dependents(completed_job_uid)
-        for job_uid in dependents:
-            remaining = await self.redis.decrement_dep_count(job_uid)
-            if remaining == 0:
-                await self.redis.add_to_ready_queue(job_uid)
+
+class ExecutionPlanCache:
+    """
+    执行计划缓存
+    task_yaml的校验、依赖解析与任务参数编码只在首次遇到某个内容哈希时进行一次,
+    编译结果(拓扑序、依赖数量、反向邻接表、预编码的任务参数)先查进程内LRU, 再查Redis;
+    内容哈希变化即对应新的计划, 无需主动失效
+    """
+
+    def __init__(
+        self,
+        maxsize: int = SchedulerConfig.scheduler_plan_cache_size,
+        ttl: int = SchedulerConfig.scheduler_plan_cache_ttl,
+    ):
+        """
+        :param maxsize: 进程内缓存的执行计划数量上限
+        :param ttl: Redis中执行计划的缓存时间(秒)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._plans: "OrderedDict[str, ExecutionPlanModel]" = OrderedDict()
+        self._local_hits = 0
+        self._redis_hits = 0
+        self._compiled = 0
+
+    @staticmethod
+    def plan_hash(task_yaml: List[Any]) -> str:
+        """
+        task_yaml的内容哈希, 直接对传入的结构计算, 不做校验与补全
+        JobModel列表按model_dump计算, 包含补全的默认字段, 与相同内容的原始字典哈希不同,
+        只会各自编译一份等价的执行计划; 调度入口统一传入数据库中的原始结构
+        :param task_yaml: JobModel列表或数据库中的任务字典列表
+        """
+        jobs = [job.model_dump() if isinstance(job, BaseModel) else job for job in task_yaml]
+        content = json.dumps(
+            jobs, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str
+        )
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    @staticmethod
+    def compile(task_yaml: List[Any], plan_hash: str) -> ExecutionPlanModel:
+        """
+        校验task_yaml并编译执行计划
+        :raises ValueError: 任务参数不合法、依赖不存在或存在循环依赖
+        """
+        jobs = [
+            job if isinstance(job, JobModel) else JobModel.model_validate(job) for job in task_yaml
+        ]
+        order, levels, dependents = TaskModel.topological_sort(jobs)
+        in_degree = [0] * len(jobs)
+        for targets in dependents:
+            for target in targets:
+                in_degree[target] += 1
+
+        new_index = {position: new for new, position in enumerate(order)}
+        return ExecutionPlanModel(
+            plan_hash=plan_hash,
+            job_uids=[jobs[position].job_uid for position in order],
+            in_degree=[in_degree[position] for position in order],
+            levels=[levels[position] for position in order],
+            dependents=[
+                [new_index[target] for target in dependents[position]] for position in order
+            ],
+            payloads=[
+                {
+                    **{
+                        field: json.dumps(value)
+                        for field, value in jobs[position].model_dump(exclude={"job_uid"}).items()
+                    },
+                    "cache_key": json.dumps(
+                        jobs[position].result_cache_key() if jobs[position].cacheable else None
+                    ),
+                }
+                for position in order
+            ],
+        )
+
+    async def get_plan(self, redis_store: RedisJobStore, task_yaml: List[Any]) -> ExecutionPlanModel:
+        """
+        获取task_yaml对应的执行计划, 依次查找进程内缓存、Redis, 都未命中时编译并写入两级缓存
+        :param redis_store: Redis数据操作对象
+        :param task_yaml: JobModel列表或数据库中的任务字典列表
+        """
+        plan_hash = self.plan_hash(task_yaml)
+        plan = self._plans.get(plan_hash)
+        if plan is not None:
+            self._plans.move_to_end(plan_hash)
+            self._local_hits += 1
+            return plan
+
+        plan = await redis_store.get_plan(plan_hash)
+        if plan is not None:
+            self._redis_hits += 1
+        else:
+            plan = self.compile(task_yaml, plan_hash)
+            self._compiled += 1
+            await redis_store.save_plan(plan, self.ttl)
+        self._plans[plan_hash] = plan
+        if len(self._plans) > self.maxsize:
+            self._plans.popitem(last=False)
+        return plan
+
+    def metrics(self) -> dict:
+        """执行计划缓存指标"""
+        return {
+            "size": len(self._plans),
+            "maxsize": self.maxsize,
+            "local_hits": self._local_hits,
+            "redis_hits": self._redis_hits,
+            "compiled": self._compiled,
+        }
+
+
+# 全局执行计划缓存
+plan_cache = ExecutionPlanCache()
 
 
 class TaskProgressTracker:
@@ -276,49 +1448,81 @@ class TaskProgressTracker:
         self.redis = redis_store
         self.db = db
 
-    async def initialize(self, task: TaskModel) -> TaskProgressModel:
-        """初始化任务进度"""
+    async def initialize(
+        self,
+        task: TaskModel,
+        run_id: Optional[str] = None,
+        job_uids: Optional[List[str]] = None,
+        task_len: Optional[int] = None,
+    ) -> TaskProgressModel:
+        """
+        初始化一次运行的进度
+        :param job_uids: 本次运行需要执行的任务UID列表, 为空时从task_yaml中读取
+        :param task_len: 任务流的任务总数, 断点恢复时大于需要执行的任务数, 差值计为已完成
+        """
+        if job_uids is None:
+            job_uids = [job.job_uid for job in task.task_yaml]
+        if task_len is None:
+            task_len = len(job_uids)
+        task_completed = task_len - len(job_uids)
         progress = TaskProgressModel(
             task_uid=task.task_uid,
+            run_id=run_id,
             run_status="running",
-            task_completed=0,
-            task_len=len(task.task_yaml),
-            task_jobs=[job.job_uid for job in task.task_yaml],
+            task_completed=task_completed,
+            task_len=task_len,
+            task_jobs=[JobSchedulerModel.scoped_uid(job_uid, run_id) for job_uid in job_uids],
         )
         await self.redis.save_task_progress(progress)
         await self._update_db(
             task_uid=task.task_uid,
-            updates={"run_status": "running", "task_progress": 0},
+            updates={
+                "run_status": "running",
+                "task_progress": task_completed / task_len if task_len else 0,
+            },
         )
         return progress
 
-    async def increment_progress(self, task_uid: str):
-        """增加完成计数并更新状态"""
-        progress = await self.redis.get_task_progress(task_uid)
-        if not progress:
-            return
-
-        progress.task_completed += 1
-        if progress.task_completed == progress.task_len:
-            await self.mark_completed(task_uid)
-        else:
-            await self.redis.save_task_progress(progress)
+    async def increment_progress(self, task_uid: str, run_uid: str, job_uid: str) -> bool:
+        """
+        增加完成计数并更新状态
+        计数在Redis中原子递增且同一任务只计数一次; 中间进度按时间/变化幅度防抖写库, 完成状态立即写库
+        :return: 本次运行是否已全部完成
+        """
+        result = await self.redis.increment_task_progress(
+            run_uid,
+            job_uid,
+            flush_interval=SchedulerConfig.scheduler_progress_flush_interval,
+            flush_delta=SchedulerConfig.scheduler_progress_flush_delta,
+        )
+        if not result:
+            return False
+
+        task_completed, task_len, flush = result
+        if task_completed == task_len:
+            await self.mark_completed(task_uid, run_uid)
+            return True
+        if flush:
             await self._update_db(
                 task_uid=task_uid,
-                updates={"task_progress": progress.task_completed / progress.task_len},
+                updates={"task_progress": task_completed / task_len},
             )
+        return False
 
-    async def mark_completed(self, task_uid: str):
-        """标记任务完成"""
-        await self.redis.cleanup_task(task_uid)
+    async def mark_completed(self, task_uid: str, run_uid: str):
+        """
+        标记任务完成
+        先写库再清理Redis数据: 两步之间进程退出时, 重新投递的完成事件仍能读到任务参数并再次走到这里
+        """
         await self._update_db(
             task_uid=task_uid, updates={"run_status": "completed", "task_progress": 1.0}
         )
+        await self.redis.cleanup_run(run_uid)
 
-    async def mark_failed(self, task_uid: str):
-        """标记任务失败"""
-        await self.redis.cleanup_task(task_uid)
+    async def mark_failed(self, task_uid: str, run_uid: str):
+        """标记任务失败, 与mark_completed相同先写库再清理"""
         await self._update_db(task_uid=task_uid, updates={"run_status": "failed"})
+        await self.redis.cleanup_run(run_uid)
 
     async def _update_db(self, task_uid: str, updates: dict):
         """更新数据库状态"""
@@ -326,50 +1530,288 @@ class TaskProgressTracker:
         await self.db.commit()
 
 
+class CheckpointManager:
+    """
+    管理任务完成检查点
+    检查点以任务流UID、执行计划哈希与运行ID为键, 记录一次运行中已成功的任务, Redis位图用于快速读取,
+    sys_job_run表持久保存; 同一任务流的多次运行各自记录, 新的运行不会覆盖仍在执行的运行的检查点;
+    断点恢复从最近一次启动的运行继续, 已完成的任务带入新的运行, 只执行未完成的任务
+    """
+
+    def __init__(self, redis_store: RedisJobStore, db: AsyncSession):
+        self.redis = redis_store
+        self.db = db
+
+    async def record(
+        self, task_uid: str, run_id: Optional[str], job_uid: str, plan_hash: str, plan_index: int
+    ):
+        """
+        记录任务已成功完成
+        :param job_uid: 去掉运行ID的任务UID
+        """
+        await self.redis.mark_checkpoint(
+            task_uid, plan_hash, run_id or "", plan_index, SchedulerConfig.scheduler_checkpoint_ttl
+        )
+        await self._save_job_runs(
+            [
+                JobRunModel(
+                    task_uid=task_uid,
+                    plan_hash=plan_hash,
+                    job_index=plan_index,
+                    job_uid=job_uid,
+                    run_id=run_id or "",
+                    create_time=datetime.now(),
+                )
+            ]
+        )
+
+    async def _save_job_runs(self, job_runs: List[JobRunModel]):
+        """
+        保存任务完成记录
+        写后缓冲运行时只入队, 由后台协程批量写入, 否则直接执行一条多行INSERT语句
+        """
+        if SchedulerConfig.scheduler_log_buffer_enabled and job_run_buffer.running:
+            await job_run_buffer.put(job_runs)
+            return
+        await JobRunDao.add_job_runs_bulk_dao(self.db, job_runs)
+        await self.db.commit()
+
+    async def latest_run(self, task_uid: str) -> Optional[str]:
+        """
+        读取任务流最近一次启动的运行ID, Redis中的记录过期时取数据库中最近有完成记录的运行
+        :return: 运行ID, 任务流从未记录过检查点时返回None
+        """
+        run_id = await self.redis.get_checkpoint_run(task_uid)
+        if run_id is None:
+            run_id = await JobRunDao.get_latest_run_id_dao(self.db, task_uid)
+        return run_id
+
+    async def load(self, task_uid: str, plan: ExecutionPlanModel, run_id: str) -> Set[int]:
+        """
+        读取一次运行中已完成任务的下标, Redis中的检查点过期时从数据库恢复
+        """
+        completed = await self.redis.get_checkpoint(
+            task_uid, plan.plan_hash, run_id, len(plan.job_uids)
+        )
+        if completed is not None:
+            return completed
+        completed = {
+            index
+            for index in await JobRunDao.get_completed_indexes_dao(
+                self.db, task_uid, plan.plan_hash, run_id
+            )
+            if index < len(plan.job_uids)
+        }
+        if completed:
+            await self.redis.save_checkpoint(
+                task_uid, plan.plan_hash, run_id, completed, SchedulerConfig.scheduler_checkpoint_ttl
+            )
+        return completed
+
+    async def start(
+        self, task_uid: str, plan: ExecutionPlanModel, run_id: str, completed: AbstractSet[int]
+    ):
+        """
+        创建一次运行的检查点, 并删除已结束的其他运行的完成记录
+        仍在执行的运行的检查点保留, 各运行互不影响
+        :param completed: 断点恢复时从上一次运行带入的已完成任务下标
+        """
+        await self.redis.save_checkpoint(
+            task_uid, plan.plan_hash, run_id, completed, SchedulerConfig.scheduler_checkpoint_ttl
+        )
+        if completed:
+            now = datetime.now()
+            await self._save_job_runs(
+                [
+                    JobRunModel(
+                        task_uid=task_uid,
+                        plan_hash=plan.plan_hash,
+                        job_index=index,
+                        job_uid=plan.job_uids[index],
+                        run_id=run_id,
+                        create_time=now,
+                    )
+                    for index in sorted(completed)
+                ]
+            )
+        # 先取时间再读活跃运行, 之后才登记的运行的完成记录都晚于该时间, 不会被误删
+        before = datetime.now()
+        active_run_ids = [
+            # 运行UID为任务流UID@运行ID, 升级前的运行以任务流UID为运行UID, 运行ID为空
+            run_uid[len(task_uid) + 1 :]
+            for run_uid in await self.redis.get_task_runs(task_uid)
+        ]
+        await JobRunDao.delete_job_runs_dao(self.db, task_uid, active_run_ids + [run_id], before)
+        await self.db.commit()
+
+
 class JobExecutor:
     """任务执行器"""
 
-    def __init__(self, redis_store: RedisJobStore, db: AsyncSession):
+    # 写入任务日志所需的字段, 不包含体积较大的job_kwargs
+    LOG_FIELDS = [
+        "job_uid",
+        "task_uid",
+        "job_name",
+        "job_parties",
+        "job_dependencies",
+        "job_executor",
+        "invoke_target",
+        "job_args",
+    ]
+
+    def __init__(
+        self,
+        redis_store: RedisJobStore,
+        db: AsyncSession,
+        shards: Optional[AbstractSet[int]] = None,
+    ):
+        """
+        :param shards: 兜底扫描只处理属于这些分片的运行, 为空时处理全部分片
+        """
         self.redis = redis_store
         self.db = db
+        self.shards = shards
 
-    async def execute_all_ready_jobs(self):
-        """执行所有就绪任务"""
-        # while True:
+    async def execute_ready_jobs(self, run_uid: str):
+        """执行指定运行的就绪任务, 不会调度其他任务流或其他运行的任务"""
+        await self._dispatch(await self.redis.get_ready_jobs(run_uid))
+
+    async def execute_runs_ready_jobs(self, run_uids: AbstractSet[str]):
+        """
+        按全局优先级顺序依次执行多个运行的就绪任务, 槽位优先分配给最优先的运行
+        """
+        for run_uid in await self.redis.order_ready_runs(run_uids):
+            await self.execute_ready_jobs(run_uid)
 
-        #     job_uid = await self.redis.pop_ready_job()
-        #     if not job_uid:
-        #         break
-        #     await self.execute_one_ready_job(job_uid)
+    async def execute_all_ready_jobs(self):
+        """执行所属分片中所有运行的就绪任务, 用于兜底扫描"""
+        await self._dispatch(await self.redis.get_all_ready_jobs(shards=self.shards))
 
-        job_uids = await self.redis.get_all_ready_jobs()
+    async def _dispatch(self, job_uids: List[str]):
+        """
+        批量下发任务到算子层并记录日志
+        提交失败的任务不记录开始日志, 按执行失败向完成事件流追加失败事件,
+        与执行失败一样按重试策略延迟重试, 重试次数用尽后运行失败
+        """
         if not job_uids:
             return
 
-        job_executor = []
-        for job_uid in job_uids:
-            await self.add_job_log(job_uid, "任务开始执行", "0", commit=False)
-            job_param = await self.redis.get_job(job_uid)
-            job_executor.append(JobExecuteModel(**job_param.model_dump()))
-
-        await self.db.commit()
+        # 任务参数只获取一次, 同时用于构造执行请求和日志
+        jobs = await self.redis.get_jobs(job_uids)
+        jobs = await self._complete_cached(jobs)
+        if not jobs:
+            return
 
+        # 先记录超时时间再下发, 避免完成回调早于记录到达
+        now_ms = int(time.time() * 1000)
+        tokens = await self.redis.track_dispatched(
+            jobs,
+            {
+                job.job_uid: now_ms + int(timeout * 1000)
+                for job in jobs
+                if (timeout := self.job_timeout(job.timeout))
+            },
+        )
         async with JobSchedulerService() as scheduler:
-            await scheduler.add_jobs(job_executor)
+            results = await scheduler.add_jobs(
+                [
+                    JobDispatchModel(**job.model_dump(), dispatch_token=tokens.get(job.job_uid))
+                    for job in jobs
+                ]
+            )
+
+        create_time = datetime.now()
+        logs = []
+        failed = []
+        for job in jobs:
+            result = results.get(job.job_uid)
+            if result is None or not result.success:
+                failed.append(job)
+                continue
+            logs.append(
+                JobLogModel(
+                    **job.model_dump(include=set(self.LOG_FIELDS) - {"job_uid"}),
+                    job_uid=job.base_job_uid,
+                    job_message="任务开始执行",
+                    status="0",
+                    create_time=create_time,
+                )
+            )
+        if logs:
+            await self.add_job_logs(logs)
+        if failed:
+            # 完成事件服务依赖本模块, 在使用时导入避免循环导入
+            from module_admin.service.completion_service import CompletionStreamService
+
+            for job in failed:
+                result = results.get(job.job_uid)
+                await CompletionStreamService.publish_completion(
+                    self.redis.redis,
+                    JobExecuteResponseModel(
+                        job_uid=job.job_uid,
+                        success=False,
+                        error_detail=f"任务提交失败: {result.error_detail if result else '无提交结果'}",
+                        dispatch_token=tokens.get(job.job_uid),
+                    ),
+                )
+            logger.warning(
+                f"{len(failed)}/{len(jobs)}个任务提交失败, 按执行失败处理, {failed[0].job_uid}等"
+            )
+
+    @staticmethod
+    def job_timeout(timeout: Optional[float]) -> float:
+        """任务的执行超时时间(秒), 未配置时使用全局默认值, 0为不限制"""
+        return SchedulerConfig.scheduler_job_timeout if timeout is None else timeout
+
+    async def _complete_cached(self, jobs: List[JobSchedulerModel]) -> List[JobSchedulerModel]:
+        """
+        命中结果缓存的任务不下发, 直接追加一条成功的完成事件, 由完成事件处理释放下游任务
+        :return: 需要下发的任务
+        """
+        hits = await self.redis.lookup_results([job.cache_key for job in jobs if job.cache_key])
+        if not hits:
+            return jobs
+        # 完成事件服务依赖本模块, 在使用时导入避免循环导入
+        from module_admin.service.completion_service import CompletionStreamService
+
+        pending = []
+        for job in jobs:
+            if job.cache_key not in hits:
+                pending.append(job)
+                continue
+            await CompletionStreamService.publish_completion(
+                self.redis.redis,
+                JobExecuteResponseModel(job_uid=job.job_uid, success=True, cached=True),
+            )
+        logger.info(f"{len(jobs) - len(pending)}个任务命中结果缓存, 跳过执行")
+        return pending
 
     async def add_job_log(
         self, job_uid: str, job_message: str, status: str, commit: bool = True
     ):
         """添加任务日志"""
-        job: JobSchedulerModel = await self.redis.get_job(job_uid)
-        # 记录日志
+        job_fields = await self.redis.get_job_fields(job_uid, self.LOG_FIELDS + ["run_id"])
+        # 日志记录去掉运行ID的任务UID
+        job = JobSchedulerModel(**job_fields)
         log = JobLogModel(
-            **job.model_dump(),
+            **job.model_dump(include=set(self.LOG_FIELDS) - {"job_uid"}),
+            job_uid=job.base_job_uid,
             job_message=job_message,
             status=status,
             create_time=datetime.now(),
         )
-        await JobLogDao.add_job_log_dao(self.db, log)
+        await self.add_job_logs([log], commit=commit)
+
+    async def add_job_logs(self, logs: List[JobLogModel], commit: bool = True):
+        """
+        批量添加任务日志
+        写后缓冲运行时只入队, 否则直接执行一条多行INSERT语句
+        """
+        if SchedulerConfig.scheduler_log_buffer_enabled and job_log_buffer.running:
+            await job_log_buffer.put(logs)
+            return
+        await JobLogDao.add_job_logs_bulk_dao(self.db, logs)
         if commit:
             await self.db.commit()
 
@@ -377,54 +1819,266 @@ class JobExecutor:
 class TaskSchedulerService:
     """任务调度入口类"""
 
-    def __init__(self, redis: asyncio_redis, db: AsyncSession):
+    def __init__(
+        self, redis: asyncio_redis, db: AsyncSession, shards: Optional[AbstractSet[int]] = None
+    ):
+        """
+        :param shards: 本进程持有的分片; 超时扫描、兜底派发与槽位释放后的唤醒只处理属于这些分片的运行,
+            为空时处理全部分片
+        """
+        self.db = db
+        self.shards = shards
         self.redis_store = RedisJobStore(redis)
         self.dependency_mgr = DependencyManager(self.redis_store)
         self.progress_tracker = TaskProgressTracker(self.redis_store, db)
-        self.executor = JobExecutor(self.redis_store, db)
+        self.executor = JobExecutor(self.redis_store, db, shards)
+        self.checkpoint = CheckpointManager(self.redis_store, db)
 
-    async def add_task(self, task: TaskModel):
-        """添加新任务"""
-        await self.progress_tracker.initialize(task)
-        for job_data in task.task_yaml:
-            job = JobSchedulerModel(**job_data.model_dump(), task_uid=task.task_uid)
-            await self.redis_store.store_job(job)
-            await self.dependency_mgr.register_dependencies(job)
+    async def add_task(self, task: TaskModel, resume: bool = False) -> Optional[str]:
+        """
+        启动任务流的一次运行
+        每次运行分配独立的运行ID, 任务执行UID为任务UID@运行ID, 多次运行互不干扰;
+        禁止并发(concurrent=1)的任务流在上一次运行结束前按重叠策略拒绝或排队
+        :param resume: 是否从最近一次运行的检查点恢复, 恢复时跳过已成功的任务;
+            任务流仍有运行在执行时不允许恢复, 避免重复派发正在执行的任务
+        :return: 运行UID, 排队等待时返回None
+        """
+        try:
+            plan = await plan_cache.get_plan(self.redis_store, task.task_yaml)
+        except ValueError as e:
+            raise ServiceException(message=f"任务流{task.task_name}解析失败: {e}")
+        completed: Set[int] = set()
+        if resume:
+            if await self.redis_store.get_task_runs(task.task_uid):
+                raise ServiceException(message=f"任务流{task.task_name}正在执行, 请停止后再恢复")
+            source_run_id = await self.checkpoint.latest_run(task.task_uid)
+            if source_run_id is not None:
+                completed = await self.checkpoint.load(task.task_uid, plan, source_run_id)
+            if len(completed) == len(plan.job_uids):
+                raise ServiceException(message=f"任务流{task.task_name}已全部完成, 无需恢复")
+
+        run_id = uuid.uuid4().hex[:8]
+        run_uid = JobSchedulerModel.scoped_uid(task.task_uid, run_id)
+        if task.concurrent == "1" and not await self.redis_store.acquire_task_lock(
+            task.task_uid, run_uid
+        ):
+            if not resume and SchedulerConfig.scheduler_overlap_policy == "queue" and (
+                await self.redis_store.queue_pending_run(
+                    task.task_uid, SchedulerConfig.scheduler_max_pending_runs
+                )
+            ):
+                logger.info(f"任务流{task.task_uid}正在执行, 本次启动已排队")
+                return None
+            raise ServiceException(message=f"任务流{task.task_name}正在执行, 不允许并发执行")
+
+        if resume:
+            logger.info(
+                f"任务流{task.task_uid}从检查点恢复, 跳过已完成的{len(completed)}/{len(plan.job_uids)}个任务"
+            )
+        try:
+            await self.checkpoint.start(task.task_uid, plan, run_id, completed)
+            await self.progress_tracker.initialize(
+                task,
+                run_id,
+                [job_uid for index, job_uid in enumerate(plan.job_uids) if index not in completed],
+                len(plan.job_uids),
+            )
+            await self.dependency_mgr.register_plan(
+                plan, task.task_uid, run_id, int(task.priority or 0), completed
+            )
+        except Exception:
+            # 注册失败时清理已写入的运行数据并释放运行锁, 否则任务流在锁过期前无法再次启动
+            await self.redis_store.cleanup_run(run_uid)
+            await self.redis_store.release_task_lock(task.task_uid, run_uid)
+            raise
+        return run_uid
+
+    async def start_task(self, task: TaskModel, resume: bool = False) -> Optional[str]:
+        """启动任务流的一次运行并下发就绪任务"""
+        run_uid = await self.add_task(task, resume)
+        if run_uid:
+            await self.executor.execute_ready_jobs(run_uid)
+        return run_uid
+
+    async def load_task(self, task_uid: str) -> Optional[TaskModel]:
+        """
+        读取待启动的任务流
+        task_yaml保持数据库中的原始结构不做校验, 由执行计划缓存按内容哈希解析, 已编译过的任务流不再重复校验
+        """
+        task = await TaskDao.get_task_detail_by_uid(self.db, task_uid=task_uid)
+        if not task:
+            return None
+        return TaskModel.model_construct(**SnakeCaseUtil.transform_result(task))
+
+    async def start_pending_run(self, task_uid: str):
+        """上一次运行结束后, 启动一次排队等待的运行"""
+        if not await self.redis_store.pop_pending_run(task_uid):
+            return
+        task = await self.load_task(task_uid)
+        if not task:
+            return
+        await self.start_task(task)
 
     async def handle_job_completion(
         self,
         job_uid: str,
         success: bool,
         error_detail: Optional[str] = None,
+        cached: bool = False,
+        dispatch_token: Optional[int] = None,
     ):
-        """处理任务完成事件"""
-        job = await self.redis_store.get_job(job_uid)
-        if not job or not job.task_uid:
+        """
+        处理任务完成事件
+        失败的任务在重试次数用尽前按指数退避延迟重试, 用尽后整个运行标记为失败;
+        启用结果缓存的任务成功后写入结果缓存。
+        完成事件至少投递一次, 成功路径的每一步都可重复执行: 释放槽位、结果缓存与检查点本身幂等,
+        依赖扇出与进度计数由任务参数中的标记保证只执行一次; 处理中途失败后重新投递的事件
+        只会补完尚未完成的步骤, 重复的回调也不会重复递减下游依赖计数(任务日志可能重复记录)
+        每次派发递增任务的派发令牌, 同一次派发只接受一种结果, 属于已结束派发的事件
+        (如超时按失败处理后才到达的成功回调)被忽略, 相同结果的重复事件仍会补完未完成的步骤
+        :param cached: 是否命中结果缓存而未实际执行
+        :param dispatch_token: 算子层返回的事件所属派发的令牌,
+            为空时视为任务当前的派发(超时扫描、命中结果缓存、未返回令牌的算子层)
+        """
+        job = await self.redis_store.get_job_fields(
+            job_uid,
+            [
+                "task_uid",
+                "run_id",
+                "priority",
+                "max_retries",
+                "backoff",
+                "attempts",
+                "plan_hash",
+                "plan_index",
+                "cache_key",
+                "dispatch",
+                "retry_token",
+            ],
+        )
+        if not job or not job.get("task_uid"):
+            return
+        if dispatch_token is None:
+            dispatch_token = job.get("dispatch") or 0
+        if not await self.redis_store.claim_outcome(job_uid, dispatch_token, success):
+            logger.warning(
+                f"任务{job_uid}的完成事件属于已结束的派发(令牌{dispatch_token}), 已忽略"
+            )
             return
+        task_uid = job["task_uid"]
+        await self.redis_store.untrack_dispatched(job_uid, self.redis_store.shard_of(task_uid))
+        run_uid = JobSchedulerModel.scoped_uid(task_uid, job.get("run_id"))
+        priority = job.get("priority") or 0
+        waiting = await self.redis_store.release_slots(
+            [job_uid], self.redis_store.resolve_shards(self.shards)
+        )
 
         if success:
             # 记录日志
-            await self.executor.add_job_log(job_uid, "任务执行成功", "0")
-            await self.dependency_mgr.handle_completion(job_uid)
-            await self.progress_tracker.increment_progress(job.task_uid)
-            await self.executor.execute_all_ready_jobs()  # 触发后续任务执行
+            if cached:
+                await self.executor.add_job_log(job_uid, "命中结果缓存, 跳过执行", "0")
+            else:
+                await self.executor.add_job_log(job_uid, "任务执行成功", "0")
+                if job.get("cache_key"):
+                    await self.redis_store.store_result(
+                        job["cache_key"],
+                        {"task_uid": task_uid, "job_uid": job_uid, "create_time": int(time.time())},
+                        SchedulerConfig.scheduler_result_cache_ttl,
+                        SchedulerConfig.scheduler_result_cache_max,
+                    )
+            if job.get("plan_hash") and job.get("plan_index") is not None:
+                await self.checkpoint.record(
+                    task_uid,
+                    job.get("run_id"),
+                    JobSchedulerModel(job_uid=job_uid, run_id=job.get("run_id")).base_job_uid,
+                    job["plan_hash"],
+                    job["plan_index"],
+                )
+            await self.dependency_mgr.handle_completion(run_uid, job_uid, priority)
+            finished = await self.progress_tracker.increment_progress(task_uid, run_uid, job_uid)
+            waiting.add(run_uid)  # 触发本次运行后续任务执行
+        elif job.get("retry_token") == dispatch_token:
+            # 重新投递的失败事件, 本次派发的重试已经安排
+            finished = False
+        elif (attempts := job.get("attempts") or 0) < (job.get("max_retries") or 0):
+            delay = min(
+                (job.get("backoff") or 0) * 2**attempts,
+                SchedulerConfig.scheduler_retry_max_backoff,
+            )
+            await self.redis_store.schedule_retry(job_uid, delay, dispatch_token)
+            await self.executor.add_job_log(
+                job_uid, f"任务执行失败, {delay:g}秒后第{attempts + 1}次重试: {error_detail}", "1"
+            )
+            finished = False
         else:
-            # todo: 记录日志错误信息
             await self.executor.add_job_log(job_uid, error_detail, "1")
-            await self.progress_tracker.mark_failed(job.task_uid)
+            await self.progress_tracker.mark_failed(task_uid, run_uid)
+            finished = True
+
+        # 本次运行新就绪的任务与本进程分片中等待被释放槽位的运行按全局优先级顺序调度,
+        # 释放的槽位不会被本次运行优先占用, 也不扫描与这些槽位无关的运行
+        await self.executor.execute_runs_ready_jobs(waiting)
+        # 运行结束后释放了运行锁, 启动排队等待的下一次运行
+        if finished:
+            await self.start_pending_run(task_uid)
+
+    async def fail_timed_out_jobs(self) -> int:
+        """
+        超时仍未收到完成回调的任务通知算子层停止, 并向所属分片的完成事件流追加一条失败事件,
+        由分片的消费者按执行失败处理(重试或使运行失败);
+        超时记录在事件处理时才移除, 失败事件发布前进程退出时由之后的扫描重新发布;
+        只扫描本进程持有分片的超时记录
+        :return: 超时的任务数量
+        """
+        job_uids = await self.redis_store.lease_timed_out_jobs(
+            SchedulerConfig.scheduler_job_timeout_recheck, self.shards
+        )
+        if not job_uids:
+            return 0
+        try:
+            async with JobSchedulerService() as scheduler:
+                await scheduler.stop_jobs(list(job_uids))
+        except Exception as e:
+            logger.warning(f"停止超时任务失败: {e}")
+        # 完成事件服务依赖本模块, 在使用时导入避免循环导入
+        from module_admin.service.completion_service import CompletionStreamService
+
+        for job_uid, shard in job_uids.items():
+            job = await self.redis_store.get_job_fields(job_uid, ["task_uid", "dispatch"])
+            if not job:
+                # 所属运行已结束
+                await self.redis_store.untrack_dispatched(job_uid, shard)
+                continue
+            await CompletionStreamService.publish_completion(
+                self.redis_store.redis,
+                JobExecuteResponseModel(
+                    job_uid=job_uid,
+                    success=False,
+                    error_detail="任务执行超时",
+                    dispatch_token=job.get("dispatch") or 0,
+                ),
+            )
+        logger.warning(f"{len(job_uids)}个任务执行超时, {next(iter(job_uids))}等")
+        return len(job_uids)
 
     async def stop_task(self, task_uid: str):
-        """停止指定任务流"""
-        progress = await self.redis_store.get_task_progress(task_uid)
-        if not progress:
+        """停止指定任务流的所有活跃运行, 并丢弃排队等待的启动请求"""
+        await self.redis_store.clear_pending_runs(task_uid)
+        progresses = []
+        for run_uid in await self.redis_store.get_task_runs(task_uid):
+            progress = await self.redis_store.get_task_progress(run_uid)
+            if progress:
+                progresses.append(progress)
+        if not progresses:
             raise ValueError(f"任务流 {task_uid} 不存在或已完成")
 
-        # 停止所有关联任务
-        async with JobSchedulerService() as scheduler:
-            await scheduler.stop_jobs(progress.task_jobs)  # 调用已有停止接口
+        for progress in progresses:
+            # 停止所有关联任务
+            async with JobSchedulerService() as scheduler:
+                await scheduler.stop_jobs(progress.task_jobs)  # 调用已有停止接口
 
-        # 清理Redis数据
-        await self.redis_store.cleanup_task(task_uid)
+            # 清理Redis数据
+            await self.redis_store.cleanup_run(progress.run_uid)
 
         # 更新数据库状态
         await self.progress_tracker._update_db(
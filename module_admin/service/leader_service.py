@@ -0,0 +1,206 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+from redis.asyncio import Redis as asyncio_redis
+from config.env import SchedulerConfig
+from module_admin.service.completion_service import RELEASE_LEASE, get_worker_id
+from module_admin.service.job_service import RedisKeys
+from utils.log_util import logger
+
+
+# 竞选或续约主节点租约:
+# 租约空闲时获取并递增任期令牌, 租约由自己持有时续期; 返回当前任期令牌, 未当选返回0
+# KEYS[1]: 主节点租约 KEYS[2]: 任期令牌计数器 KEYS[3]: 主节点信息
+# ARGV[1]: 进程标识 ARGV[2]: 租约时长(毫秒) ARGV[3]: 当前时间戳(毫秒)
+ACQUIRE_LEADER = """
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    local token = redis.call('INCR', KEYS[2])
+    redis.call('HSET', KEYS[3], 'leader', ARGV[1], 'token', token,
+        'elected_at', ARGV[3], 'renewed_at', ARGV[3])
+    return token
+end
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('PEXPIRE', KEYS[1], ARGV[2])
+local token = redis.call('HGET', KEYS[3], 'token')
+if not token then
+    token = redis.call('INCR', KEYS[2])
+    redis.call('HSET', KEYS[3], 'leader', ARGV[1], 'token', token, 'elected_at', ARGV[3])
+end
+redis.call('HSET', KEYS[3], 'renewed_at', ARGV[3])
+return tonumber(token)
+"""
+
+# 仅当任期令牌仍为当前任期时写入哈希字段, 已退位的旧主节点的写入被拒绝
+# KEYS[1]: 主节点信息 KEYS[2]: 目标哈希 ARGV[1]: 任期令牌 ARGV[2]: 字段 ARGV[3]: 值
+FENCED_HSET = """
+if redis.call('HGET', KEYS[1], 'token') == ARGV[1] then
+    redis.call('HSET', KEYS[2], ARGV[2], ARGV[3])
+    return 1
+end
+return 0
+"""
+
+
+class LeaderElection:
+    """
+    主节点选举
+    多个调度进程竞争同一个Redis租约, 持有租约的进程为主节点并每1/3租约时长续约一次;
+    每次当选时递增任期令牌(fencing token), 主节点的写操作携带令牌校验,
+    失联后恢复的旧主节点即使仍认为自己是主节点, 其写入也会因令牌过期而被拒绝。
+    主节点失联后最长在一个租约时长后由其他进程接管
+    """
+
+    def __init__(
+        self,
+        lease_ms: int = SchedulerConfig.scheduler_leader_lease_ms,
+        on_elected: Optional[Callable[[asyncio_redis, int], Awaitable]] = None,
+        on_revoked: Optional[Callable[[asyncio_redis], Awaitable]] = None,
+    ):
+        """
+        :param lease_ms: 租约时长(毫秒)
+        :param on_elected: 当选后的回调协程函数, 参数为Redis连接与任期令牌
+        :param on_revoked: 退位后的回调协程函数
+        """
+        self.lease_ms = lease_ms
+        self.on_elected = on_elected
+        self.on_revoked = on_revoked
+        self.worker_id = get_worker_id()
+        self.redis: Optional[asyncio_redis] = None
+        self.token: Optional[int] = None
+        self._renewed_at = 0.0
+        self._elections = 0
+        self._loop_task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._loop_task is not None and not self._loop_task.done()
+
+    @property
+    def is_leader(self) -> bool:
+        return self.token is not None
+
+    @property
+    def keys(self) -> list:
+        return [
+            RedisKeys.SCHEDULER_LEADER,
+            RedisKeys.SCHEDULER_LEADER_TOKEN,
+            RedisKeys.SCHEDULER_LEADER_INFO,
+        ]
+
+    async def start(self, redis: asyncio_redis):
+        """立即参与一次竞选并启动续约协程"""
+        if self.running:
+            return
+        self.redis = redis
+        self.worker_id = get_worker_id()
+        self._acquire_script = redis.register_script(ACQUIRE_LEADER)
+        self._release_script = redis.register_script(RELEASE_LEASE)
+        try:
+            await self._campaign()
+        except Exception as e:
+            logger.error(f"主节点竞选失败: {e}")
+        self._loop_task = asyncio.create_task(self._loop())
+        logger.info(f"主节点选举启动, worker={self.worker_id}, leader={self.is_leader}")
+
+    async def stop(self):
+        """停止竞选, 主节点主动释放租约使其他进程立即接管"""
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+            self._loop_task = None
+        if self.is_leader:
+            await self._revoke()
+            await self._release_script(keys=[RedisKeys.SCHEDULER_LEADER], args=[self.worker_id])
+        logger.info(f"主节点选举已关闭, worker={self.worker_id}")
+
+    async def _loop(self):
+        interval = self.lease_ms / 3000
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._campaign()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"主节点租约维护失败: {e}")
+                # 连续无法续约时在租约到期前主动退位, 避免与新当选的主节点同时工作
+                if self.is_leader and time.monotonic() - self._renewed_at > 2 * interval:
+                    logger.warning(f"主节点租约无法续约, 主动退位, token={self.token}")
+                    await self._revoke()
+
+    async def _campaign(self):
+        """竞选或续约, 任期变化时触发回调"""
+        token = await self._acquire_script(
+            keys=self.keys, args=[self.worker_id, self.lease_ms, int(time.time() * 1000)]
+        )
+        if not token:
+            if self.is_leader:
+                logger.warning(f"主节点租约丢失, 退位, token={self.token}")
+                await self._revoke()
+            return
+
+        self._renewed_at = time.monotonic()
+        if token == self.token:
+            return
+        if self.is_leader:
+            await self._revoke()
+        self.token = int(token)
+        self._elections += 1
+        logger.info(f"当选主节点, worker={self.worker_id}, token={self.token}")
+        if self.on_elected is not None:
+            try:
+                await self.on_elected(self.redis, self.token)
+            except Exception as e:
+                # 当选后无法开始工作时让出租约, 由其他进程接管
+                logger.error(f"主节点启动失败, 让出租约: {e}")
+                await self._revoke()
+                await self._release_script(
+                    keys=[RedisKeys.SCHEDULER_LEADER], args=[self.worker_id]
+                )
+
+    async def _revoke(self):
+        self.token = None
+        if self.on_revoked is not None:
+            try:
+                await self.on_revoked(self.redis)
+            except Exception as e:
+                logger.error(f"主节点退位处理失败: {e}")
+
+    async def status(self) -> dict:
+        """
+        当前主节点及租约状态, 用于排查
+        staleness_ms为距离主节点最近一次续约的时间, 明显超过1/3租约时长说明主节点续约异常
+        """
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.get(RedisKeys.SCHEDULER_LEADER)
+            pipe.pttl(RedisKeys.SCHEDULER_LEADER)
+            pipe.hgetall(RedisKeys.SCHEDULER_LEADER_INFO)
+            leader, ttl, info = await pipe.execute()
+        now = int(time.time() * 1000)
+        renewed_at = int(info["renewed_at"]) if info.get("renewed_at") else None
+        return {
+            "leader": leader,
+            "token": int(info["token"]) if leader and info.get("token") else None,
+            "elected_at": int(info["elected_at"]) if leader and info.get("elected_at") else None,
+            "lease_ms": self.lease_ms,
+            "lease_ttl_ms": max(ttl, 0),
+            "staleness_ms": now - renewed_at if renewed_at else None,
+            # 没有主节点时保留上一任主节点信息
+            "last_leader": info.get("leader"),
+            "self": self.metrics(),
+        }
+
+    def metrics(self) -> dict:
+        """本进程的选举状态"""
+        return {
+            "running": self.running,
+            "worker": self.worker_id,
+            "is_leader": self.is_leader,
+            "token": self.token,
+            "elections": self._elections,
+            "last_renew_age_ms": (
+                int((time.monotonic() - self._renewed_at) * 1000) if self.is_leader else None
+            ),
+        }
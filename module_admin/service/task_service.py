@@ -12,8 +12,10 @@ from module_admin.entity.vo.task_vo import (
     TaskPageQueryModel,
 )
 from redis.asyncio import Redis as asyncio_redis
-from module_admin.service.job_service import TaskSchedulerService
+from module_admin.service.cron_service import CronEngine, build_cron_trigger
+from module_admin.service.job_service import TaskSchedulerService, plan_cache
 from utils.common_util import SnakeCaseUtil
+from utils.dag_util import DagUtil
 import uuid
 
 
@@ -76,21 +78,27 @@ class TaskService:
             raise ServiceException(
                 message=f"新增定时任务流{page_object.task_name}失败，定时任务流已存在"
             )
+        elif page_object.cron_expression and not cls.check_cron_expression(
+            page_object.cron_expression
+        ):
+            raise ServiceException(
+                message=f"新增定时任务流{page_object.task_name}失败，Cron表达式不正确"
+            )
         else:
             try:
 
                 add_task = await TaskDao.add_task_dao(query_db, page_object)
-                task_info = await cls.task_detail_services_by_uid(
-                    query_db, add_task.task_uid
-                )
+                # 与其他启动入口一致读取未校验的原始task_yaml, 同一任务流得到相同的执行计划哈希
+                task_scheduler = TaskSchedulerService(query_redis, query_db)
+                task_info = await task_scheduler.load_task(add_task.task_uid)
 
-                # todo: 添加任务执行代码
-                if task_info.status == '0':
-                    task_scheduler = TaskSchedulerService(query_redis, query_db)
-                    await task_scheduler.add_task(task_info)
-                    await task_scheduler.executor.execute_all_ready_jobs()
+                # 配置了cron表达式的任务流由定时触发引擎按计划启动, 否则立即启动
+                if task_info.status == '0' and not task_info.cron_expression:
+                    await task_scheduler.start_task(task_info)
 
                 await query_db.commit()
+                if task_info.cron_expression:
+                    await CronEngine.notify_change(query_redis, task_info.task_uid)
                 result = dict(
                     is_success=True,
                     message="新增成功",
@@ -190,21 +198,38 @@ class TaskService:
         """
         # for job in page_object.task_yaml:
         #     SchedulerUtil.remove_scheduler_job(job_uid=job.job_uid)
-        task_info = await cls.task_detail_services_by_uid(
-            query_db, page_object.task_uid
-        )
-        task_info.update_time = page_object.update_time
-        task_info.update_by = page_object.update_by
+        task_scheduler = TaskSchedulerService(query_redis, query_db)
+        task_info = await task_scheduler.load_task(page_object.task_uid)
         if task_info:
-            task_scheduler = TaskSchedulerService(query_redis, query_db)
-            await task_scheduler.add_task(task_info)
-            await task_scheduler.executor.execute_all_ready_jobs()
+            task_info.update_time = page_object.update_time
+            task_info.update_by = page_object.update_by
+            await task_scheduler.start_task(task_info)
 
             await query_db.commit()
             return CrudResponseModel(is_success=True, message="执行成功")
         else:
             raise ServiceException(message="定时任务流不存在")
 
+    @classmethod
+    async def resume_task_services(
+        cls, query_db: AsyncSession, query_redis: asyncio_redis, task_uid: str
+    ):
+        """
+        从检查点恢复任务流service, 只执行上一次运行中未成功的任务
+
+        :param query_db: orm对象
+        :param query_redis: redis连接
+        :param task_uid: 任务流UID
+        :return: 恢复结果
+        """
+        task_scheduler = TaskSchedulerService(query_redis, query_db)
+        task_info = await task_scheduler.load_task(task_uid)
+        if not task_info:
+            raise ServiceException(message="定时任务流不存在")
+        await task_scheduler.start_task(task_info, resume=True)
+        await query_db.commit()
+        return CrudResponseModel(is_success=True, message="恢复成功")
+
     @classmethod
     async def stop_task_services(
         cls,
@@ -235,12 +260,13 @@ class TaskService:
 
     @classmethod
     async def delete_task_services(
-        cls, query_db: AsyncSession, page_object: DeleteTaskModel
+        cls, query_db: AsyncSession, query_redis: asyncio_redis, page_object: DeleteTaskModel
     ):
         """
         删除定时任务流信息service
 
         :param query_db: orm对象
+        :param query_redis: redis连接
         :param page_object: 删除定时任务流对象
         :return: 删除定时任务流校验结果
         """
@@ -249,9 +275,10 @@ class TaskService:
             try:
                 for task_uid in task_uid_list:
                     await TaskDao.delete_task_dao(query_db, TaskModel(taskUid=task_uid))
-                    # todo: 从定时任务中删除对应的子任务
-                    # SchedulerUtil.remove_scheduler_task(task_uid=task_uid)
                 await query_db.commit()
+                # 从定时触发引擎中移除
+                for task_uid in task_uid_list:
+                    await CronEngine.notify_change(query_redis, task_uid)
                 return CrudResponseModel(is_success=True, message="删除成功")
             except Exception as e:
                 await query_db.rollback()
@@ -259,6 +286,45 @@ class TaskService:
         else:
             raise ServiceException(message="传入定时任务流id为空")
 
+    @classmethod
+    async def get_task_levels_services(
+        cls, query_db: AsyncSession, query_redis: asyncio_redis, task_uid: str
+    ) -> List[List[str]]:
+        """
+        获取任务流的拓扑层级service
+
+        :param query_db: orm对象
+        :param query_redis: redis连接
+        :param task_uid: 任务流UID
+        :return: 各层级的任务UID列表, 同一层级的任务之间没有依赖, 可以并行执行
+        """
+        task_scheduler = TaskSchedulerService(query_redis, query_db)
+        task_info = await task_scheduler.load_task(task_uid)
+        if not task_info:
+            raise ServiceException(message="定时任务流不存在")
+        try:
+            plan = await plan_cache.get_plan(task_scheduler.redis_store, task_info.task_yaml)
+        except ValueError as e:
+            raise ServiceException(message=f"任务流{task_info.task_name}解析失败: {e}")
+        return [
+            [plan.job_uids[position] for position in level]
+            for level in DagUtil.group_by_level(plan.levels)
+        ]
+
+    @staticmethod
+    def check_cron_expression(cron_expression: str) -> bool:
+        """
+        校验cron表达式是否可以被定时触发引擎解析
+
+        :param cron_expression: cron表达式
+        :return: 校验结果
+        """
+        try:
+            build_cron_trigger(cron_expression)
+        except ValueError:
+            return False
+        return True
+
     @classmethod
     async def task_detail_services_by_uid(cls, query_db: AsyncSession, task_uid: str):
         """
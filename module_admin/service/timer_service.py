@@ -0,0 +1,91 @@
+import asyncio
+import time
+from typing import Optional
+from redis.asyncio import Redis as asyncio_redis
+from config.database import AsyncSessionLocal
+from config.env import SchedulerConfig
+from module_admin.service.completion_service import completion_worker
+from module_admin.service.job_service import TaskSchedulerService
+from utils.log_util import logger
+
+
+class SchedulerTimer:
+    """
+    调度定时器
+    周期性为超时未回调的已下发任务发布失败事件, 将到期的等待重试任务放回就绪队列,
+    并扫描运行的就绪队列派发, 兜底处理重试到期、因并发槽位不足而未能派发且没有后续完成事件触发的任务;
+    超时扫描与就绪队列扫描只处理本进程持有分片(见ShardedCompletionWorker)的运行,
+    与完成事件的消费归属同一进程; 等待重试队列的弹出是原子操作, 多个进程同时扫描不会重复处理
+    """
+
+    def __init__(self, interval: float = SchedulerConfig.scheduler_timer_interval):
+        """
+        :param interval: 扫描间隔(秒)
+        """
+        self.interval = interval
+        self.redis: Optional[asyncio_redis] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._ticks = 0
+        self._errors = 0
+        self._last_tick_ms = 0.0
+        self._retried = 0
+        self._timed_out = 0
+
+    @property
+    def running(self) -> bool:
+        return self._loop_task is not None and not self._loop_task.done()
+
+    async def start(self, redis: asyncio_redis):
+        """启动扫描协程"""
+        if self.running:
+            return
+        self.redis = redis
+        self._loop_task = asyncio.create_task(self._loop())
+        logger.info(f"调度定时器启动, interval={self.interval}s")
+
+    async def stop(self):
+        """停止扫描, 等待进行中的一次扫描结束"""
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+            self._loop_task = None
+        logger.info("调度定时器已关闭")
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            started = time.perf_counter()
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self.tick(
+                        TaskSchedulerService(self.redis, db, completion_worker.owned_shards)
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._errors += 1
+                logger.error(f"调度定时器扫描失败: {e}")
+            self._ticks += 1
+            self._last_tick_ms = (time.perf_counter() - started) * 1000
+
+    async def tick(self, scheduler: TaskSchedulerService):
+        """一次扫描"""
+        self._timed_out += await scheduler.fail_timed_out_jobs()
+        self._retried += await scheduler.redis_store.requeue_due_jobs()
+        await scheduler.executor.execute_all_ready_jobs()
+
+    def metrics(self) -> dict:
+        """定时器运行指标"""
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "ticks": self._ticks,
+            "errors": self._errors,
+            "retried": self._retried,
+            "timed_out": self._timed_out,
+            "last_tick_ms": round(self._last_tick_ms, 3),
+        }
+
+
+# 全局调度定时器
+scheduler_timer = SchedulerTimer()
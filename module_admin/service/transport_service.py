@@ -0,0 +1,245 @@
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import aiohttp
+import httpx
+from config.env import OperatorConfig
+from utils.log_util import logger
+
+
+class TransportError(Exception):
+    """
+    派发传输异常, 各传输实现的网络/HTTP错误统一转换为该异常, 由调用方决定是否重试
+    """
+
+    def __init__(self, message: str = None):
+        super().__init__(message)
+        self.message = message
+
+
+def _flatten_params(params: Optional[Dict]) -> Optional[List[Tuple[str, str]]]:
+    """将 {"job_uids": ["a", "b"]} 展开为 [("job_uids", "a"), ("job_uids", "b")]"""
+    if not params:
+        return None
+    flat = []
+    for key, value in params.items():
+        if isinstance(value, (list, tuple)):
+            flat.extend((key, str(item)) for item in value)
+        else:
+            flat.append((key, str(value)))
+    return flat
+
+
+# 每个工作线程/进程各自持有一个同步客户端, 复用keep-alive连接
+_local = threading.local()
+
+
+def _sync_request(
+    method: str, url: str, params: Optional[List], json: Optional[List], timeout: float
+) -> Dict:
+    """同步HTTP请求, 供线程池/进程池执行(进程池要求为模块级函数)"""
+    client = getattr(_local, "client", None)
+    if client is None:
+        client = _local.client = httpx.Client(trust_env=False)
+    try:
+        response = client.request(method, url, params=params, json=json, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPError as e:
+        raise TransportError(str(e)) from None
+
+
+class DispatchTransport:
+    """
+    算子层派发传输方式基类
+    """
+
+    name = ""
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = OperatorConfig.operator_timeout,
+    ):
+        """
+        :param base_url: 算子层服务地址
+        :param timeout: 单次请求超时时间(秒)
+        """
+        self.base_url = base_url
+        self.timeout = timeout
+
+    async def start(self):
+        """创建连接池等长生命周期资源"""
+
+    async def close(self):
+        """释放长生命周期资源"""
+
+    async def request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict] = None,
+        json: Optional[List[Dict]] = None,
+    ) -> Dict:
+        """
+        发送请求并返回解析后的JSON响应体
+        :raise TransportError: 网络错误、超时或非2xx响应
+        """
+        raise NotImplementedError
+
+
+class AiohttpTransport(DispatchTransport):
+    """共享aiohttp长连接会话"""
+
+    name = "aiohttp"
+
+    def __init__(self, base_url: str, timeout: float = OperatorConfig.operator_timeout):
+        super().__init__(base_url, timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def start(self):
+        if self._session is not None and not self._session.closed:
+            return
+        self._session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            connector=aiohttp.TCPConnector(
+                limit=OperatorConfig.operator_pool_size,
+                limit_per_host=OperatorConfig.operator_pool_per_host,
+                keepalive_timeout=OperatorConfig.operator_keepalive_timeout,
+                ttl_dns_cache=OperatorConfig.operator_dns_cache_ttl,
+            ),
+        )
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def request(self, method, endpoint, params=None, json=None):
+        if self._session is None or self._session.closed:
+            await self.start()
+        try:
+            async with self._session.request(
+                method=method,
+                url=f"{self.base_url}{endpoint}",
+                params=_flatten_params(params),
+                json=json,
+            ) as response:
+                response.raise_for_status()
+                return await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise TransportError(str(e) or type(e).__name__) from e
+
+
+class HttpxTransport(DispatchTransport):
+    """共享httpx.AsyncClient"""
+
+    name = "httpx"
+
+    def __init__(self, base_url: str, timeout: float = OperatorConfig.operator_timeout):
+        super().__init__(base_url, timeout)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def start(self):
+        if self._client is not None and not self._client.is_closed:
+            return
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            # 与aiohttp保持一致, 不读取环境变量中的代理配置
+            trust_env=False,
+            limits=httpx.Limits(
+                max_connections=OperatorConfig.operator_pool_size,
+                max_keepalive_connections=OperatorConfig.operator_pool_size,
+                keepalive_expiry=OperatorConfig.operator_keepalive_timeout,
+            ),
+        )
+
+    async def close(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    async def request(self, method, endpoint, params=None, json=None):
+        if self._client is None or self._client.is_closed:
+            await self.start()
+        try:
+            response = await self._client.request(
+                method, endpoint, params=_flatten_params(params), json=json
+            )
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
+            raise TransportError(str(e) or type(e).__name__) from e
+
+
+class ThreadTransport(DispatchTransport):
+    """同步HTTP请求在共享线程池中执行"""
+
+    name = "thread"
+
+    def __init__(self, base_url: str, timeout: float = OperatorConfig.operator_timeout):
+        super().__init__(base_url, timeout)
+        self._executor = None
+
+    def _create_executor(self):
+        return ThreadPoolExecutor(
+            max_workers=OperatorConfig.operator_transport_workers,
+            thread_name_prefix="dispatch",
+        )
+
+    async def start(self):
+        if self._executor is None:
+            self._executor = self._create_executor()
+
+    async def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self._executor = None
+
+    async def request(self, method, endpoint, params=None, json=None):
+        if self._executor is None:
+            await self.start()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            _sync_request,
+            method,
+            f"{self.base_url}{endpoint}",
+            _flatten_params(params),
+            json,
+            self.timeout,
+        )
+
+
+class ProcessTransport(ThreadTransport):
+    """同步HTTP请求在共享进程池中执行, 进程池随应用生命周期创建一次"""
+
+    name = "process"
+
+    def _create_executor(self):
+        return ProcessPoolExecutor(max_workers=OperatorConfig.operator_transport_workers)
+
+
+# 可选的派发传输方式, 通过 OperatorConfig.operator_transport 选择
+TRANSPORTS = {
+    transport.name: transport
+    for transport in (AiohttpTransport, HttpxTransport, ThreadTransport, ProcessTransport)
+}
+
+
+def create_transport(
+    name: str, base_url: str, timeout: float = OperatorConfig.operator_timeout
+) -> DispatchTransport:
+    """
+    根据名称创建派发传输实例
+    :param name: 传输方式名称(aiohttp/httpx/thread/process)
+    :param base_url: 算子层服务地址
+    :param timeout: 单次请求超时时间(秒)
+    :return: 派发传输实例
+    """
+    if name not in TRANSPORTS:
+        raise ValueError(f"不支持的派发传输方式: {name}, 可选: {list(TRANSPORTS)}")
+    logger.info(f"使用派发传输方式: {name}")
+    return TRANSPORTS[name](base_url, timeout)
@@ -1,12 +1,17 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, WebSocketDisconnect
 # from fastapi.responses import Response
-from config.env import AppConfig
+from config.env import AppConfig, SchedulerConfig
 from config.get_db import init_create_table
 from config.get_redis import RedisUtil
 # from utils.common_util import worship
 from module_admin.controller.task_controller import taskController
 from module_admin.controller.log_controller import logController
+from module_admin.service.job_log_service import job_log_buffer, job_run_buffer
+from module_admin.service.job_service import JobSchedulerService
+from module_admin.service.completion_service import completion_worker
+from module_admin.service.cron_service import cron_leader
+from module_admin.service.timer_service import scheduler_timer
 from middlewares.trace_middleware import add_trace_middleware
 from exceptions.handle import handle_exception
 import os
@@ -24,13 +29,28 @@ async def lifespan(app: FastAPI):
     # worship()  # 打印启动艺术字
     await init_create_table()  # 初始化数据库表结构
     app.state.redis = await RedisUtil.create_redis_pool()  # 创建Redis连接池
+    await JobSchedulerService().start()  # 创建算子层连接池
+    if SchedulerConfig.scheduler_log_buffer_enabled:
+        await job_log_buffer.start()  # 启动任务日志写后缓冲
+        await job_run_buffer.start()  # 启动任务完成检查点写后缓冲
+    if SchedulerConfig.scheduler_completion_consumer_enabled:
+        await completion_worker.start(app.state.redis)  # 启动分片调度工作者, 消费任务完成事件
+    if SchedulerConfig.scheduler_cron_enabled:
+        await cron_leader.start(app.state.redis)  # 参与主节点选举, 当选后启动定时触发引擎
+    if SchedulerConfig.scheduler_timer_enabled:
+        await scheduler_timer.start(app.state.redis)  # 启动调度定时器, 周期性派发遗留的就绪任务
     logger.info(f"{AppConfig.app_name}启动成功")
     # 运行阶段
     yield
     # 关闭阶段
     await manager.close_all_connections()
+    await cron_leader.stop()  # 停止定时触发并释放主节点租约
+    await scheduler_timer.stop()  # 停止调度定时器
+    await completion_worker.stop()  # 等待处理中的任务完成事件
+    await job_log_buffer.stop()  # 写入缓冲中剩余的任务日志
+    await job_run_buffer.stop()  # 写入缓冲中剩余的任务完成检查点
+    await JobSchedulerService().close()  # 关闭算子层连接池
     await RedisUtil.close_redis_pool(app)  # 关闭Redis连接池
-    # await job_scheduler.close()
 
 
 # FastAPI核心对象初始化
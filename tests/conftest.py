@@ -8,6 +8,8 @@ from config.database import (
     ASYNC_SQLALCHEMY_DATABASE_URL,
 )
 
+from config.get_redis import RedisUtil
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # from urllib.parse import quote_plus
@@ -53,3 +55,13 @@ async def async_client() -> AsyncIterable[AsyncClient]:
             transport=ASGITransport(app=app), base_url="http://localhost:9099"
         ) as ac:
             yield ac
+
+
+@pytest.fixture
+async def redis() -> AsyncIterable[Redis]:
+    """测试环境的Redis连接, 用例前后清空测试库"""
+    redis = await RedisUtil.create_redis_pool()
+    await redis.flushdb()
+    yield redis
+    await redis.flushdb()
+    await redis.aclose()
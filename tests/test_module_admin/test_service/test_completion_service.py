@@ -0,0 +1,157 @@
+import asyncio
+import pytest
+from typing import List
+from config.env import SchedulerConfig
+from module_admin.entity.vo.task_vo import JobExecuteResponseModel
+from module_admin.service.completion_service import CompletionConsumer, CompletionStreamService
+from module_admin.service.job_service import RedisKeys
+
+
+async def wait_until(predicate, timeout: float = 2.0):
+    """等待条件成立, 超时后断言失败"""
+    for _ in range(int(timeout / 0.01)):
+        if await predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("等待超时")
+
+
+@pytest.mark.redis
+class TestCompletionConsumer:
+    """
+    完成事件流的消费组: 处理后确认, 失败的事件被重新认领, 超过投递次数转入死信流, 只删除已确认的事件
+    """
+
+    stream = RedisKeys.COMPLETION_STREAM.format(shard=0)
+
+    @classmethod
+    async def publish(cls, redis, job_uid: str) -> str:
+        return await redis.xadd(
+            cls.stream,
+            CompletionStreamService.encode_event(
+                JobExecuteResponseModel(job_uid=job_uid, success=True, dispatch_token=1)
+            ),
+        )
+
+    @staticmethod
+    def create_consumer(handled: List[str], failures: int = 0, **options) -> CompletionConsumer:
+        """
+        :param handled: 处理的事件对应的任务UID, 原地追加
+        :param failures: 前几次处理抛出异常
+        """
+
+        async def handler(redis, event: JobExecuteResponseModel):
+            handled.append(event.job_uid)
+            if len(handled) <= failures:
+                raise RuntimeError("处理失败")
+
+        consumer = CompletionConsumer(TestCompletionConsumer.stream, handler=handler, **options)
+        consumer.block_ms = 10
+        return consumer
+
+    @pytest.mark.anyio
+    async def test_publish_routes_to_task_shard(self, redis):
+        """
+        事件按任务流分片写入, 派发令牌随事件保存
+        """
+        task_uid = "task"
+        await redis.hset(RedisKeys.JOB_PARAM.format(job_uid="job@run"), "task_uid", '"task"')
+        await CompletionStreamService.publish_completion(
+            redis, JobExecuteResponseModel(job_uid="job@run", success=False, dispatch_token=3)
+        )
+        shard = CompletionStreamService.shard_of(task_uid)
+        stream = RedisKeys.COMPLETION_STREAM.format(shard=shard)
+        [(_, fields)] = await redis.xrange(stream)
+        event = CompletionStreamService.decode_event(fields)
+        assert (event.job_uid, event.success, event.dispatch_token) == ("job@run", False, 3)
+        assert fields["task_uid"] == task_uid
+
+    @pytest.mark.anyio
+    async def test_consume_and_ack(self, redis):
+        """
+        事件处理成功后确认, 不再处于待确认状态
+        """
+        handled = []
+        consumer = self.create_consumer(handled)
+        await consumer.start(redis)
+        try:
+            await self.publish(redis, "job1")
+            await self.publish(redis, "job2")
+            await wait_until(lambda: self.acked(redis, handled, 2))
+        finally:
+            await consumer.stop()
+        assert sorted(handled) == ["job1", "job2"]
+
+    @classmethod
+    async def acked(cls, redis, handled: List[str], count: int) -> bool:
+        """至少处理了count次且没有待确认的事件"""
+        summary = await redis.xpending(cls.stream, SchedulerConfig.scheduler_completion_group)
+        return len(handled) >= count and not summary["pending"]
+
+    @pytest.mark.anyio
+    async def test_redelivery(self, redis):
+        """
+        处理失败的事件不确认, 空闲超时后被重新认领并处理
+        """
+        handled = []
+        consumer = self.create_consumer(handled, failures=1, claim_idle_ms=10)
+        await consumer.start(redis)
+        try:
+            await self.publish(redis, "job1")
+            await wait_until(lambda: self.handled_count(handled, 1))
+            await asyncio.sleep(0.05)
+            await consumer._claim_pending()
+            await wait_until(lambda: self.acked(redis, handled, 2))
+        finally:
+            await consumer.stop()
+        assert handled == ["job1", "job1"]
+
+    @staticmethod
+    async def handled_count(handled: List[str], count: int) -> bool:
+        return len(handled) >= count
+
+    @pytest.mark.anyio
+    async def test_dead_letter(self, redis):
+        """
+        超过最大投递次数的事件转入死信流并确认
+        """
+        handled = []
+        consumer = self.create_consumer(handled, failures=10, claim_idle_ms=10, max_deliveries=1)
+        await consumer.start(redis)
+        try:
+            message_id = await self.publish(redis, "job1")
+            await wait_until(lambda: self.handled_count(handled, 1))
+            await asyncio.sleep(0.05)
+            await consumer._claim_pending()
+        finally:
+            await consumer.stop()
+        [(_, fields)] = await redis.xrange(RedisKeys.COMPLETION_DEAD_STREAM)
+        assert fields["message_id"] == message_id and fields["job_uid"] == "job1"
+        summary = await redis.xpending(self.stream, SchedulerConfig.scheduler_completion_group)
+        assert not summary["pending"]
+
+    @pytest.mark.anyio
+    async def test_trim_acked(self, redis):
+        """
+        只删除已确认的事件, 待确认与尚未投递的事件保留
+        """
+        handled = []
+        consumer = self.create_consumer(handled, failures=1, claim_idle_ms=60000)
+        await consumer.start(redis)
+        try:
+            pending_id = await self.publish(redis, "job1")
+            await wait_until(lambda: self.handled_count(handled, 1))
+            await self.publish(redis, "job2")
+            await wait_until(lambda: self.handled_count(handled, 2))
+        finally:
+            await consumer.stop()
+        undelivered_id = await self.publish(redis, "job3")
+
+        await consumer._trim_acked()
+        assert [message_id for message_id, _ in await redis.xrange(self.stream)][0] == pending_id
+        assert await redis.xlen(self.stream) == 3
+
+        await redis.xack(self.stream, SchedulerConfig.scheduler_completion_group, pending_id)
+        await consumer._trim_acked()
+        message_ids = [message_id for message_id, _ in await redis.xrange(self.stream)]
+        assert pending_id not in message_ids and undelivered_id in message_ids
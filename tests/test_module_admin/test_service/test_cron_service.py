@@ -0,0 +1,238 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from typing import List, Tuple
+from module_admin.entity.vo.task_vo import TaskModel
+from module_admin.service.cron_service import CronEngine, CronEntry, build_cron_trigger
+
+
+class TestBuildCronTrigger:
+    """
+    cron表达式转换为APScheduler CronTrigger
+    """
+
+    @staticmethod
+    def day_of_week(cron_expression: str) -> str:
+        trigger = build_cron_trigger(cron_expression)
+        return str(next(field for field in trigger.fields if field.name == "day_of_week"))
+
+    @staticmethod
+    def day(cron_expression: str) -> str:
+        trigger = build_cron_trigger(cron_expression)
+        return str(next(field for field in trigger.fields if field.name == "day"))
+
+    @classmethod
+    def test_crontab_weekday_range_from_sunday(cls):
+        """
+        标准crontab中以周日(0)开头的范围不会变为跨周范围
+        """
+        assert cls.day_of_week("0 0 * * 0-6") == "sun,mon,tue,wed,thu,fri,sat"
+        assert cls.day_of_week("0 0 * * 0-2") == "sun,mon,tue"
+        assert cls.day_of_week("0 0 * * 1-5") == "mon,tue,wed,thu,fri"
+        assert cls.day_of_week("0 0 * * 7") == "sun"
+
+    @classmethod
+    def test_crontab_weekday_step(cls):
+        """
+        步长按crontab的数字顺序(周日为0)计算
+        """
+        assert cls.day_of_week("0 0 * * */2") == "sun,tue,thu,sat"
+        assert cls.day_of_week("0 0 * * 1-5/2") == "mon,wed,fri"
+        assert cls.day_of_week("0 0 * * *") == "*"
+
+    @classmethod
+    def test_quartz_weekday(cls):
+        """
+        Quartz星期字段1-7对应周日到周六, 支持英文缩写与?
+        """
+        assert cls.day_of_week("0 0 0 ? * 1-7") == "sun,mon,tue,wed,thu,fri,sat"
+        assert cls.day_of_week("0 0 0 ? * SUN-SAT") == "sun,mon,tue,wed,thu,fri,sat"
+        assert cls.day_of_week("0 0 0 ? * MON-FRI") == "mon,tue,wed,thu,fri"
+        assert cls.day_of_week("0 0 0 ? * 1,7") == "sun,sat"
+        assert cls.day_of_week("0 0 0 * * ?") == "*"
+
+    @classmethod
+    def test_quartz_special_weekday(cls):
+        """
+        每月最后一个星期n(nL)与第m个星期n(n#m)转换为日字段表达式
+        """
+        assert cls.day("0 0 0 ? * 6L") == "last fri"
+        assert cls.day("0 0 0 ? * 2#1") == "1st mon"
+        assert cls.day("0 0 0 L * ?") == "last"
+
+    @classmethod
+    def test_invalid_expression(cls):
+        """
+        字段数量、星期或步长不正确时抛出ValueError
+        """
+        for cron_expression in ("0 0 * *", "0 0 * * 8", "0 0 * * 1/0", "0 0 * * xyz", "0 0 0 15W * ?"):
+            with pytest.raises(ValueError):
+                build_cron_trigger(cron_expression)
+
+
+class TestCronEngine:
+    """
+    定时触发引擎的错过触发策略、补偿上限与堆元素的版本号惰性删除
+    """
+
+    cron_expression = "0 * * * * ?"
+
+    @classmethod
+    def create_engine(cls, monkeypatch, max_catchup: int = 100) -> Tuple[CronEngine, List, List]:
+        """
+        创建引擎并记录触发与仅记录触发时间的调用, 不访问Redis
+        """
+        engine = CronEngine(misfire_grace=1, max_catchup=max_catchup)
+        fired, recorded = [], []
+        monkeypatch.setattr(engine, "_fire", lambda entry, fire_time: fired.append(fire_time))
+        monkeypatch.setattr(
+            engine, "_record", lambda task_uid, fire_time: recorded.append(fire_time)
+        )
+        return engine, fired, recorded
+
+    @classmethod
+    def create_entry(cls, engine: CronEngine, misfire_policy: str, minutes_ago: int) -> CronEntry:
+        """
+        创建一个计划触发时间在minutes_ago分钟前的调度表条目
+        """
+        trigger = build_cron_trigger(cls.cron_expression)
+        entry = CronEntry("task", trigger, misfire_policy, next(engine._versions))
+        now = datetime.now(trigger.timezone)
+        fire_time = trigger.get_next_fire_time(None, now - timedelta(minutes=minutes_ago))
+        engine._entries[entry.task_uid] = entry
+        engine._push(entry, fire_time)
+        return entry
+
+    @staticmethod
+    def run_due(engine: CronEngine, entry: CronEntry, limit: int = 1000):
+        """
+        依次处理所有已到期的触发, 直到下一次触发时间晚于当前时间
+        """
+        for _ in range(limit):
+            if entry.next_fire_time > datetime.now(entry.trigger.timezone):
+                return
+            engine._on_due(entry)
+        raise AssertionError("触发时间没有前进")
+
+    @classmethod
+    def test_on_time(cls, monkeypatch):
+        """
+        在容忍时间内到期的触发总是执行, 下一次触发时间晚于当前时间
+        """
+        for misfire_policy in ("1", "2", "3"):
+            engine, fired, recorded = cls.create_engine(monkeypatch)
+            entry = cls.create_entry(engine, misfire_policy, 0)
+            entry.next_fire_time = datetime.now(entry.trigger.timezone) - timedelta(seconds=0.5)
+            engine._on_due(entry)
+            assert len(fired) == 1 and not recorded
+            assert entry.next_fire_time > datetime.now(entry.trigger.timezone)
+            assert engine._misfired_total == 0
+
+    @classmethod
+    def test_misfire_fire_now(cls, monkeypatch):
+        """
+        立即执行(1): 错过的每一次触发依次补偿执行
+        """
+        engine, fired, recorded = cls.create_engine(monkeypatch)
+        entry = cls.create_entry(engine, "1", 10)
+        first = entry.next_fire_time
+        cls.run_due(engine, entry)
+        assert fired[0] == first
+        assert fired == sorted(fired) and len(set(fired)) == len(fired)
+        assert len(fired) >= 9 and not recorded
+        assert entry.next_fire_time > datetime.now(entry.trigger.timezone)
+
+    @classmethod
+    def test_misfire_catchup_cap(cls, monkeypatch):
+        """
+        立即执行(1): 连续补偿次数达到上限后不再补偿, 跳到当前时间之后的下一次触发
+        """
+        engine, fired, recorded = cls.create_engine(monkeypatch, max_catchup=3)
+        entry = cls.create_entry(engine, "1", 10)
+        cls.run_due(engine, entry)
+        assert len(fired) == 3
+        assert len(recorded) == 1 and recorded[0] > fired[-1]
+        assert entry.catchup == 0
+        assert entry.next_fire_time > datetime.now(entry.trigger.timezone)
+
+    @classmethod
+    def test_misfire_fire_once(cls, monkeypatch):
+        """
+        执行一次(2): 错过多次触发时只补偿执行一次
+        """
+        engine, fired, recorded = cls.create_engine(monkeypatch)
+        entry = cls.create_entry(engine, "2", 10)
+        cls.run_due(engine, entry)
+        assert len(fired) == 1 and not recorded
+        assert engine._misfired_total == 1
+        assert entry.next_fire_time > datetime.now(entry.trigger.timezone)
+
+    @classmethod
+    def test_misfire_skip(cls, monkeypatch):
+        """
+        放弃执行(3): 错过的触发不执行, 只记录已处理的触发时间
+        """
+        engine, fired, recorded = cls.create_engine(monkeypatch)
+        entry = cls.create_entry(engine, "3", 10)
+        cls.run_due(engine, entry)
+        assert not fired and len(recorded) == 1
+        assert entry.next_fire_time > datetime.now(entry.trigger.timezone)
+
+    @staticmethod
+    def scheduled_task(task_uid: str, status: str = "0") -> TaskModel:
+        return TaskModel.model_construct(
+            task_uid=task_uid,
+            status=status,
+            cron_expression=TestCronEngine.cron_expression,
+            misfire_policy="3",
+        )
+
+    @classmethod
+    def test_versioned_removal(cls):
+        """
+        更新或移除任务流时旧的堆元素保留, 按版本号识别为失效; 失效元素过多时重建堆
+        """
+        engine = CronEngine()
+        engine.upsert(cls.scheduled_task("task"))
+        first_version = engine._entries["task"].version
+        engine.upsert(cls.scheduled_task("task"))
+        assert engine._entries["task"].version != first_version
+        assert sorted(item[3] for item in engine._heap) == [
+            first_version,
+            engine._entries["task"].version,
+        ]
+
+        engine.upsert(cls.scheduled_task("task", status="1"))
+        assert "task" not in engine._entries and len(engine._heap) == 2
+
+        for _ in range(200):
+            engine.upsert(cls.scheduled_task("task"))
+        assert len(engine._heap) <= 2 * len(engine._entries) + 64 + 1
+        assert any(item[3] == engine._entries["task"].version for item in engine._heap)
+
+    @pytest.mark.anyio
+    async def test_run_skips_stale_items(self, monkeypatch):
+        """
+        调度协程丢弃版本号与调度表不一致或已移除任务流的到期堆元素, 只处理当前版本
+        """
+        engine = CronEngine()
+        due = []
+        monkeypatch.setattr(engine, "_on_due", lambda entry: due.append(entry.version))
+        trigger = build_cron_trigger(self.cron_expression)
+        past = datetime.now(trigger.timezone) - timedelta(seconds=1)
+
+        stale = CronEntry("task", trigger, "3", next(engine._versions))
+        current = CronEntry("task", trigger, "3", next(engine._versions))
+        removed = CronEntry("removed", trigger, "3", next(engine._versions))
+        for entry in (stale, current, removed):
+            engine._entries[entry.task_uid] = entry
+            engine._push(entry, past)
+        engine._entries["task"] = current
+        engine.remove("removed")
+
+        run = asyncio.create_task(engine._run())
+        await asyncio.sleep(0.05)
+        run.cancel()
+        await asyncio.gather(run, return_exceptions=True)
+        assert due == [current.version]
+        assert not engine._heap
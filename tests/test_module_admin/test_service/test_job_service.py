@@ -13,3 +13,417 @@
 #     async def test_add_jobs(cls):
 #         add_status = await cls.scheduler.add_jobs(job_info=cls.job_info)
 #         assert add_status is True
+
+
+import asyncio
+import json
+import uuid
+import pytest
+from typing import Dict, List, Set
+from config.env import SchedulerConfig
+from module_admin.entity.vo.task_vo import (
+    JobExecuteModel,
+    JobExecuteResponseModel,
+    JobSchedulerModel,
+    TaskModel,
+    TaskProgressModel,
+)
+from module_admin.service import job_service
+from module_admin.service.completion_service import CompletionStreamService
+from module_admin.service.job_service import (
+    JobSchedulerService,
+    RedisJobStore,
+    RedisKeys,
+    TaskProgressTracker,
+    TaskSchedulerService,
+    plan_cache,
+)
+from tests.test_data import task_data
+
+
+class TestSplitBatches:
+    """
+    派发请求按任务数和字节数切分
+    """
+
+    payloads = [{"job_uid": f"job{index}", "job_kwargs": "x" * 10} for index in range(5)]
+
+    @classmethod
+    def test_split_by_jobs(cls):
+        """
+        每批不超过最大任务数, 顺序保持不变
+        """
+        batches = JobSchedulerService.split_batches(cls.payloads, max_jobs=2, max_bytes=1 << 20)
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert [item for batch in batches for item in batch] == cls.payloads
+
+    @classmethod
+    def test_split_by_bytes(cls):
+        """
+        每批序列化后的字节数不超过上限
+        """
+        size = len(json.dumps(cls.payloads[0]).encode()) + 1
+        max_bytes = 2 + size * 2
+        batches = JobSchedulerService.split_batches(cls.payloads, max_jobs=100, max_bytes=max_bytes)
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        for batch in batches:
+            assert len(json.dumps(batch).encode()) <= max_bytes
+
+    @classmethod
+    def test_oversized_payload(cls):
+        """
+        单个任务超过字节上限时单独成批
+        """
+        batches = JobSchedulerService.split_batches(cls.payloads, max_jobs=100, max_bytes=10)
+        assert [len(batch) for batch in batches] == [1] * 5
+        assert JobSchedulerService.split_batches([], max_jobs=1, max_bytes=10) == []
+
+
+class TestAddJobs:
+    """
+    批量派发任务, 失败只影响所在批次
+    """
+
+    @pytest.mark.anyio
+    async def test_batch_failure(self, monkeypatch):
+        """
+        任一批次抛出任何异常时, 该批次的任务标记为提交失败, 其他批次不受影响
+        """
+        scheduler = JobSchedulerService()
+        monkeypatch.setattr(scheduler, "batch_max_jobs", 2)
+
+        async def send_request(method, endpoint, params=None, json=None):
+            job_uids = [item["job_uid"] for item in json]
+            if "job2" in job_uids:
+                raise KeyError("data")
+            if "job4" in job_uids:
+                return [JobExecuteResponseModel(job_uid="job4", success=True)]
+            return [JobExecuteResponseModel(job_uid=job_uid, success=True) for job_uid in job_uids]
+
+        monkeypatch.setattr(scheduler, "_send_request", send_request)
+        results = await scheduler.add_jobs(
+            [JobExecuteModel(job_uid=f"job{index}") for index in range(6)]
+        )
+
+        assert {job_uid for job_uid, result in results.items() if result.success} == {
+            "job0",
+            "job1",
+            "job4",
+        }
+        assert set(results) == {f"job{index}" for index in range(6)}
+        assert "data" in results["job2"].error_detail
+
+
+def build_task(jobs: Dict[str, List[str]], **options) -> TaskModel:
+    """
+    构造测试任务流
+    :param jobs: 任务UID -> 依赖的任务UID列表
+    :param options: 所有任务共用的任务参数(重试、超时、结果缓存等)
+    """
+    base = task_data["task_yaml"][0]
+    return TaskModel(
+        **dict(
+            task_data,
+            task_uid=uuid.uuid4().hex,
+            concurrent="0",
+            task_yaml=[
+                dict(
+                    base,
+                    job_uid=job_uid,
+                    job_name=job_uid,
+                    job_dependencies=json.dumps(deps),
+                    **options,
+                )
+                for job_uid, deps in jobs.items()
+            ],
+        )
+    )
+
+
+class FakeOperator:
+    """
+    算子层替身: 记录下发与停止的任务, 提交结果总是成功
+    """
+
+    def __init__(self):
+        self.dispatched = []
+        self.stopped = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return
+
+    async def add_jobs(self, job_info) -> Dict[str, JobExecuteResponseModel]:
+        self.dispatched.extend(job_info)
+        return {
+            job.job_uid: JobExecuteResponseModel(job_uid=job.job_uid, success=True)
+            for job in job_info
+        }
+
+    async def stop_jobs(self, job_uids: List[str]) -> bool:
+        self.stopped.extend(job_uids)
+        return True
+
+    def dispatched_uids(self) -> List[str]:
+        """已下发的任务UID(去掉运行ID)"""
+        return [job.job_uid.split("@")[0] for job in self.dispatched]
+
+
+@pytest.fixture
+def operator(monkeypatch) -> FakeOperator:
+    operator = FakeOperator()
+    monkeypatch.setattr(job_service, "JobSchedulerService", lambda: operator)
+    return operator
+
+
+@pytest.fixture
+def run_status(monkeypatch) -> List[str]:
+    """记录写入数据库的运行状态"""
+    statuses = []
+
+    async def update_db(self, task_uid: str, updates: dict):
+        if "run_status" in updates:
+            statuses.append(updates["run_status"])
+
+    monkeypatch.setattr(TaskProgressTracker, "_update_db", update_db)
+    return statuses
+
+
+@pytest.fixture
+def scheduler(redis, db_session, operator, run_status) -> TaskSchedulerService:
+    return TaskSchedulerService(redis, db_session)
+
+
+async def handle_events(scheduler: TaskSchedulerService, handled: Set[str]) -> int:
+    """
+    按顺序处理完成事件流中尚未处理的事件, 直到没有新事件
+    :param handled: 已处理的事件ID, 原地更新
+    :return: 本次处理的事件数
+    """
+    redis = scheduler.redis_store.redis
+    count = 0
+    while True:
+        events = [
+            (message_id, fields)
+            for stream in await redis.keys(RedisKeys.COMPLETION_STREAM.format(shard="*"))
+            for message_id, fields in await redis.xrange(stream)
+            if message_id not in handled
+        ]
+        if not events:
+            return count
+        for message_id, fields in events:
+            handled.add(message_id)
+            event = CompletionStreamService.decode_event(fields)
+            await scheduler.handle_job_completion(
+                event.job_uid, event.success, event.error_detail, event.cached, event.dispatch_token
+            )
+            count += 1
+
+
+@pytest.mark.redis
+class TestRedisScripts:
+    """
+    调度Lua脚本: 依赖扇出幂等、槽位准入、进度防抖与派发结果认领
+    """
+
+    @staticmethod
+    async def register(redis, jobs: Dict[str, List[str]], **options):
+        """注册一次运行, 返回任务流、运行UID与运行ID"""
+        task = build_task(jobs, **options)
+        store = RedisJobStore(redis)
+        plan = await plan_cache.get_plan(store, task.task_yaml)
+        run_id = uuid.uuid4().hex[:8]
+        await store.register_plan(plan, task.task_uid, run_id)
+        return task, JobSchedulerModel.scoped_uid(task.task_uid, run_id), run_id
+
+    @pytest.mark.anyio
+    async def test_complete_job_idempotent(self, redis):
+        """
+        同一任务重复完成只递减一次下游依赖计数, 依赖全部完成后下游任务才进入就绪队列
+        """
+        store = RedisJobStore(redis)
+        _, run_uid, run_id = await self.register(redis, {"a": [], "b": [], "c": ["a", "b"]})
+        a, b, c = (JobSchedulerModel.scoped_uid(job_uid, run_id) for job_uid in "abc")
+        assert set(await store.get_ready_jobs(run_uid)) == {a, b}
+
+        assert await store.complete_job(run_uid, a) == []
+        assert await store.complete_job(run_uid, a) == []
+        assert await redis.get(RedisKeys.DEP_COUNT.format(job_uid=c)) == "1"
+        assert await store.complete_job(run_uid, b) == [c]
+        assert await store.complete_job(run_uid, b) == []
+        assert await store.get_ready_jobs(run_uid) == [c]
+
+    @pytest.mark.anyio
+    async def test_pop_ready_jobs_slot_admission(self, redis, monkeypatch):
+        """
+        执行器槽位已满时任务留在就绪队列, 运行登记为等待该槽位; 槽位释放后唤醒该运行
+        """
+        monkeypatch.setattr(SchedulerConfig, "scheduler_executor_limits", {"default": 1})
+        store = RedisJobStore(redis)
+        task, run_uid, _ = await self.register(redis, {"a": [], "b": []})
+        shard = store.shard_of(task.task_uid)
+
+        first = await store.pop_ready_jobs(run_uid, 10)
+        assert len(first) == 1
+        assert await store.pop_ready_jobs(run_uid, 10) == []
+        assert await redis.zcard(RedisKeys.READY_JOBS.format(run_uid=run_uid)) == 1
+        waiting_key = RedisKeys.EXECUTOR_SLOTS.format(name="default") + f":waiting:{shard}"
+        assert await redis.smembers(waiting_key) == {run_uid}
+
+        # 只唤醒指定分片中等待的运行
+        assert await store.release_slots(first, {shard + 1}) == set()
+        assert await store.release_slots(first, {shard}) == set()
+        assert await redis.smembers(waiting_key) == {run_uid}
+        second = await store.pop_ready_jobs(run_uid, 10)
+        assert len(second) == 1 and second != first
+        assert await redis.scard(waiting_key) == 1
+
+        assert await store.release_slots(second, {shard}) == {run_uid}
+        assert not await redis.exists(waiting_key)
+
+    @pytest.mark.anyio
+    async def test_incr_progress_debounce(self, redis):
+        """
+        同一任务只计数一次; 距上次写库未超过最小间隔时, 进度变化达到阈值才写库
+        """
+        store = RedisJobStore(redis)
+        task, run_uid, run_id = await self.register(redis, {"a": [], "b": [], "c": [], "d": []})
+        job_uids = [JobSchedulerModel.scoped_uid(job_uid, run_id) for job_uid in "abcd"]
+        await store.save_task_progress(
+            TaskProgressModel(
+                task_uid=task.task_uid,
+                run_id=run_id,
+                run_status="running",
+                task_completed=0,
+                task_len=4,
+                task_jobs=job_uids,
+            )
+        )
+
+        async def increment(job_uid: str):
+            return await store.increment_task_progress(
+                run_uid, job_uid, flush_interval=3600, flush_delta=0.5
+            )
+
+        assert await increment(job_uids[0]) == (1, 4, True)
+        assert await increment(job_uids[0]) == (1, 4, False)
+        assert await increment(job_uids[1]) == (2, 4, False)
+        assert await increment(job_uids[2]) == (3, 4, True)
+        assert await increment(job_uids[3]) == (4, 4, False)
+
+    @pytest.mark.anyio
+    async def test_claim_outcome_and_schedule_retry(self, redis):
+        """
+        只接受当前派发的结果且同一次派发只接受一种结果; 同一次派发的失败只安排一次重试
+        """
+        store = RedisJobStore(redis)
+        task, run_uid, _ = await self.register(redis, {"a": []})
+        [job_uid] = await store.get_ready_jobs(run_uid)
+        [job] = await store.get_jobs([job_uid])
+
+        assert await store.track_dispatched([job], {}) == {job_uid: 1}
+        assert await store.claim_outcome(job_uid, 1, False)
+        assert not await store.claim_outcome(job_uid, 1, True)
+        assert await store.claim_outcome(job_uid, 1, False)
+        assert not await store.claim_outcome(job_uid, 0, False)
+
+        assert await store.schedule_retry(job_uid, 0, 1) == 1
+        assert await store.schedule_retry(job_uid, 0, 1) == 1
+        assert await store.requeue_due_jobs() == 1
+        assert await store.get_ready_jobs(run_uid) == [job_uid]
+
+        assert await store.track_dispatched([job], {}) == {job_uid: 2}
+        assert not await store.claim_outcome(job_uid, 1, True)
+        assert await store.claim_outcome(job_uid, 2, True)
+        assert await store.schedule_retry(job_uid, 0, 2) == 2
+
+
+@pytest.mark.redis
+class TestJobScheduling:
+    """
+    任务流调度: 失败重试、断点恢复、结果缓存与超时处理
+    """
+
+    @pytest.mark.anyio
+    async def test_retry_until_exhausted(self, scheduler, operator, run_status):
+        """
+        失败的任务按重试次数重新派发, 每次派发使用新的令牌; 重试次数用尽后运行失败
+        """
+        task = build_task({"a": []}, max_retries=1, backoff=0)
+        run_uid = await scheduler.start_task(task)
+        handled = set()
+        for _ in range(2):
+            [job] = operator.dispatched[-1:]
+            await CompletionStreamService.publish_completion(
+                scheduler.redis_store.redis,
+                JobExecuteResponseModel(
+                    job_uid=job.job_uid,
+                    success=False,
+                    error_detail="error",
+                    dispatch_token=job.dispatch_token,
+                ),
+            )
+            await handle_events(scheduler, handled)
+            await scheduler.redis_store.requeue_due_jobs()
+            await scheduler.executor.execute_all_ready_jobs()
+
+        assert [job.dispatch_token for job in operator.dispatched] == [1, 2]
+        assert run_status == ["running", "failed"]
+        assert await scheduler.redis_store.get_task_progress(run_uid) is None
+
+    @pytest.mark.anyio
+    async def test_resume_from_checkpoint(self, scheduler, operator, run_status):
+        """
+        停止后从检查点恢复, 新的运行只派发未完成的任务
+        """
+        task = build_task({"a": [], "b": ["a"], "c": ["b"]})
+        await scheduler.start_task(task)
+        [job] = operator.dispatched
+        await scheduler.handle_job_completion(job.job_uid, True, dispatch_token=job.dispatch_token)
+        assert operator.dispatched_uids() == ["a", "b"]
+        await scheduler.stop_task(task.task_uid)
+
+        run_uid = await scheduler.start_task(task, resume=True)
+        assert operator.dispatched_uids() == ["a", "b", "b"]
+        assert operator.dispatched[-1].job_uid == f"b@{run_uid.split('@')[1]}"
+        progress = await scheduler.redis_store.get_task_progress(run_uid)
+        assert (progress.task_completed, progress.task_len) == (1, 3)
+
+    @pytest.mark.anyio
+    async def test_result_cache(self, scheduler, operator, run_status):
+        """
+        相同输入的成功结果被复用: 第二次运行不派发命中缓存的任务, 直接按成功完成
+        """
+        task = build_task({"a": []}, cacheable=True)
+        handled = set()
+        await scheduler.start_task(task)
+        [job] = operator.dispatched
+        await scheduler.handle_job_completion(job.job_uid, True, dispatch_token=job.dispatch_token)
+
+        await scheduler.start_task(task)
+        assert len(operator.dispatched) == 1
+        assert await handle_events(scheduler, handled) == 1
+        assert run_status == ["running", "completed", "running", "completed"]
+
+    @pytest.mark.anyio
+    async def test_job_timeout(self, scheduler, operator, run_status):
+        """
+        超时的任务通知算子层停止并按失败处理, 之后到达的成功回调属于已结束的派发而被忽略
+        """
+        task = build_task({"a": [], "b": ["a"]}, timeout=0.01)
+        run_uid = await scheduler.start_task(task)
+        [job] = operator.dispatched
+        await asyncio.sleep(0.05)
+
+        assert await scheduler.fail_timed_out_jobs() == 1
+        assert operator.stopped == [job.job_uid]
+        assert await scheduler.fail_timed_out_jobs() == 0
+        assert await handle_events(scheduler, set()) == 1
+        assert run_status == ["running", "failed"]
+        assert await scheduler.redis_store.get_task_progress(run_uid) is None
+
+        await scheduler.handle_job_completion(job.job_uid, True, dispatch_token=job.dispatch_token)
+        assert operator.dispatched_uids() == ["a"]
+
@@ -0,0 +1,64 @@
+import pytest
+from utils.dag_util import CycleError, DagUtil
+
+
+class TestDagUtil:
+    """
+    有向无环图工具方法
+    """
+
+    @classmethod
+    def test_topological_sort(cls):
+        """
+        无环图按依赖顺序排序, 层级为到无依赖节点的最长路径长度
+        """
+        # 0 -> 1 -> 3, 0 -> 2 -> 3, 2 -> 4
+        dependents = [[1, 2], [3], [3, 4], [], []]
+        order, levels = DagUtil.topological_sort(dependents)
+
+        assert sorted(order) == [0, 1, 2, 3, 4]
+        position = {node: index for index, node in enumerate(order)}
+        for node, targets in enumerate(dependents):
+            for target in targets:
+                assert position[node] < position[target]
+        assert levels == [0, 1, 1, 2, 2]
+
+    @classmethod
+    def test_empty_graph(cls):
+        """
+        空图返回空结果
+        """
+        assert DagUtil.topological_sort([]) == ([], [])
+        assert DagUtil.group_by_level([]) == []
+
+    @classmethod
+    def test_self_loop(cls):
+        """
+        自环报告为只包含该节点的环
+        """
+        with pytest.raises(CycleError) as exc_info:
+            DagUtil.topological_sort([[1], [1]])
+        assert exc_info.value.cycle == [1, 1]
+
+    @classmethod
+    def test_multi_node_cycle(cls):
+        """
+        多节点环按执行顺序报告, 环外的节点不出现在环中
+        """
+        # 0 -> 1 -> 2 -> 3 -> 1, 3 -> 4
+        with pytest.raises(CycleError) as exc_info:
+            DagUtil.topological_sort([[1], [2], [3], [1, 4], []])
+        cycle = exc_info.value.cycle
+        assert cycle[0] == cycle[-1]
+        assert sorted(cycle[:-1]) == [1, 2, 3]
+        successor = {1: 2, 2: 3, 3: 1}
+        for node, target in zip(cycle, cycle[1:]):
+            assert successor[node] == target
+        assert isinstance(exc_info.value, ValueError)
+
+    @classmethod
+    def test_group_by_level(cls):
+        """
+        按层级分组, 同一层级的节点保持下标顺序
+        """
+        assert DagUtil.group_by_level([0, 1, 1, 2, 0]) == [[0, 4], [1, 2], [3]]
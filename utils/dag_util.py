@@ -0,0 +1,92 @@
+from collections import deque
+from typing import Dict, List, Tuple
+
+
+class CycleError(ValueError):
+    """
+    有向图中存在环
+    cycle为环上的节点下标, 按执行顺序(上游 -> 下游)排列, 首尾为同一节点
+    """
+
+    def __init__(self, cycle: List[int]):
+        self.cycle = cycle
+        super().__init__(f"存在环: {' -> '.join(map(str, cycle))}")
+
+
+class DagUtil:
+    """
+    有向无环图工具方法, 节点以下标表示, 边以反向邻接表(上游 -> 下游列表)表示
+    """
+
+    @classmethod
+    def topological_sort(cls, dependents: List[List[int]]) -> Tuple[List[int], List[int]]:
+        """
+        Kahn算法拓扑排序, 时间复杂度O(V+E)
+
+        :param dependents: 反向邻接表, dependents[i]为依赖节点i的节点下标列表
+        :return: (拓扑序, 各节点的层级), 层级为节点到无依赖节点的最长路径长度,
+                 同一层级的节点之间没有依赖, 可以并行执行
+        :raises CycleError: 存在环
+        """
+        in_degree = [0] * len(dependents)
+        for targets in dependents:
+            for target in targets:
+                in_degree[target] += 1
+
+        levels = [0] * len(dependents)
+        queue = deque(node for node, count in enumerate(in_degree) if not count)
+        order: List[int] = []
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for target in dependents[node]:
+                levels[target] = max(levels[target], levels[node] + 1)
+                in_degree[target] -= 1
+                if not in_degree[target]:
+                    queue.append(target)
+
+        if len(order) < len(dependents):
+            raise CycleError(
+                cls.find_cycle(dependents, [node for node, count in enumerate(in_degree) if count])
+            )
+        return order, levels
+
+    @classmethod
+    def find_cycle(cls, dependents: List[List[int]], remaining: List[int]) -> List[int]:
+        """
+        在Kahn算法剩余的节点中找出一个环
+        剩余节点的入度都不为0, 且至少有一个上游同样是剩余节点, 沿上游回溯必然回到已访问的节点
+
+        :param dependents: 反向邻接表
+        :param remaining: Kahn算法结束后入度仍不为0的节点
+        :return: 环上的节点下标, 按执行顺序排列, 首尾为同一节点
+        """
+        remaining_set = set(remaining)
+        upstream: Dict[int, int] = {}
+        for node in remaining:
+            for target in dependents[node]:
+                if target in remaining_set:
+                    upstream.setdefault(target, node)
+
+        path: List[int] = []
+        visited: Dict[int, int] = {}
+        node = remaining[0]
+        while node not in visited:
+            visited[node] = len(path)
+            path.append(node)
+            node = upstream[node]
+        cycle = path[visited[node]:][::-1]
+        return cycle + cycle[:1]
+
+    @classmethod
+    def group_by_level(cls, levels: List[int]) -> List[List[int]]:
+        """
+        按层级分组节点
+
+        :param levels: 各节点的层级
+        :return: 各层级的节点下标列表
+        """
+        groups: List[List[int]] = [[] for _ in range(max(levels, default=-1) + 1)]
+        for node, level in enumerate(levels):
+            groups[level].append(node)
+        return groups
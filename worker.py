@@ -0,0 +1,47 @@
+# 独立调度工作进程: 只消费所属分片的任务完成事件并派发就绪任务, 不提供HTTP接口
+# 可与 app.py 一起或单独启动多个实例, 分片按存活进程数自动均分
+#   APP_ENV=dev python worker.py
+import asyncio
+import signal
+from config.env import SchedulerConfig
+from config.get_redis import RedisUtil
+from module_admin.service.completion_service import completion_worker
+from module_admin.service.cron_service import cron_leader
+from module_admin.service.job_log_service import job_log_buffer, job_run_buffer
+from module_admin.service.job_service import JobSchedulerService
+from module_admin.service.timer_service import scheduler_timer
+from utils.log_util import logger, log_initializer
+
+
+async def main():
+    log_initializer.init_log()
+    redis = await RedisUtil.create_redis_pool()
+    await JobSchedulerService().start()
+    if SchedulerConfig.scheduler_log_buffer_enabled:
+        await job_log_buffer.start()
+        await job_run_buffer.start()
+    await completion_worker.start(redis)
+    if SchedulerConfig.scheduler_cron_enabled:
+        await cron_leader.start(redis)
+    if SchedulerConfig.scheduler_timer_enabled:
+        await scheduler_timer.start(redis)
+    logger.info("调度工作进程启动成功")
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+    await stop_event.wait()
+
+    await cron_leader.stop()
+    await scheduler_timer.stop()
+    await completion_worker.stop()
+    await job_log_buffer.stop()
+    await job_run_buffer.stop()
+    await JobSchedulerService().close()
+    await redis.aclose()
+    logger.info("调度工作进程已关闭")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())